@@ -26,7 +26,7 @@ timeout /t 3 /nobreak > nul
 :: Open browser to the application
 start "" "http://localhost:5000"
 
-:: Start the Flask application
+:: Start the production server
 echo.
 echo ====================================================
 echo   DLSU-D CSO Attendance System
@@ -40,7 +40,7 @@ echo.
 echo ====================================================
 echo.
 
-python app.py
+python serve.py
 
 :: If python exits, pause to show any errors
 pause
@@ -1,84 +1,75 @@
-"""Helper script to add users to the attendance system database."""
+"""
+Helper script to add users to the attendance system database in bulk.
 
-from app import app, db
-from database import User
+Reads a CSV or Excel sheet with the columns Student ID, Full Name,
+Committee and (optionally) Birthday - the same layout as the roster
+export - and adds every valid row in one transaction. Rows that cannot
+be added are listed with their line number.
 
-# Define users to add here
-users_to_add = [
-    {
-        'id_number': '20212348',
-        'full_name': 'Anna Reyes',
-        'birthday': '12-25'  # Format: MM-DD
-    },
-    {
-        'id_number': '20212349',
-        'full_name': 'Carlos Garcia',
-        'birthday': '06-10'
-    },
-    # Add more users below following the same format
-    # {
-    #     'id_number': 'YOUR_ID',
-    #     'full_name': 'Full Name',
-    #     'birthday': 'MM-DD'
-    # },
-]
+Usage:
+    python add_users.py members.xlsx            # import
+    python add_users.py members.csv --dry-run   # only check the sheet
+    python add_users.py --list                  # show everyone on the roster
+"""
 
-def add_users():
-    """Add users from the users_to_add list to the database."""
+import argparse
+import sys
+
+from app import app, init_db
+from models import User
+from imports import InvalidImport, import_users, read_sheet
+
+
+def add_users(path, dry_run=False):
+    """Import the sheet at path and print a report. Returns the number of rows with errors."""
     with app.app_context():
-        success_count = 0
-        error_count = 0
-        
-        for user_data in users_to_add:
-            try:
-                # Check if user already exists
-                existing = User.query.filter_by(id_number=user_data['id_number']).first()
-                if existing:
-                    print(f"⚠️  User {user_data['id_number']} ({user_data['full_name']}) already exists. Skipping.")
-                    continue
-                
-                # Create new user
-                user = User(**user_data)
-                db.session.add(user)
-                db.session.commit()
-                print(f"✓ Added: {user_data['id_number']} - {user_data['full_name']}")
-                success_count += 1
-            except Exception as e:
-                print(f"✗ Error adding {user_data['id_number']}: {str(e)}")
-                error_count += 1
-                db.session.rollback()
-        
-        print(f"\n{'='*50}")
-        print(f"Successfully added: {success_count} user(s)")
-        if error_count > 0:
-            print(f"Errors: {error_count} user(s)")
-        print(f"{'='*50}")
+        try:
+            result = import_users(read_sheet(path, path), dry_run=dry_run)
+        except InvalidImport as e:
+            print(f"✗ {e}")
+            return 1
+
+    for error in result['errors']:
+        print(f"✗ Row {error['row']} ({error['student_id'] or 'no ID'}): {error['message']}")
+
+    print(f"\n{'='*50}")
+    if dry_run:
+        print(f"Ready to add: {result['valid']} of {result['total']} user(s) (dry run, nothing saved)")
+    else:
+        print(f"Successfully added: {result['imported']} of {result['total']} user(s)")
+    if result['errors']:
+        print(f"Errors: {len(result['errors'])} row(s)")
+    print(f"{'='*50}")
+    return len(result['errors'])
+
 
 def list_all_users():
     """Display all users currently in the database."""
     with app.app_context():
-        users = User.query.all()
+        users = User.query.order_by(User.committee, User.full_name).all()
         print(f"\n{'='*50}")
         print(f"Total Users in Database: {len(users)}")
         print(f"{'='*50}")
         for user in users:
-            print(f"ID: {user.id_number} | Name: {user.full_name} | Birthday: {user.birthday}")
+            print(f"ID: {user.student_id} | Name: {user.full_name} | "
+                  f"Committee: {user.committee} | Birthday: {user.birthday or '-'}")
         print(f"{'='*50}\n")
 
+
 if __name__ == '__main__':
-    print("DLSU-D CSO Attendance System - User Management")
-    print("="*50)
-    print("1. Add new users")
-    print("2. List all users")
-    print("3. Add users and list all")
-    choice = input("\nSelect option (1-3): ").strip()
-    
-    if choice == '1':
-        add_users()
-    elif choice == '2':
-        list_all_users()
-    elif choice == '3':
-        add_users()
+    parser = argparse.ArgumentParser(description='DLSU-D CSO Attendance System - bulk user import')
+    parser.add_argument('file', nargs='?', help='CSV or Excel file of members to add')
+    parser.add_argument('--dry-run', action='store_true', help='check the file without adding anyone')
+    parser.add_argument('--list', action='store_true', help='list all users afterwards')
+    args = parser.parse_args()
+
+    if not args.file and not args.list:
+        parser.error('give a file to import, or --list')
+
+    # Make sure the tables (and the search index) exist
+    init_db(app)
+
+    errors = add_users(args.file, args.dry_run) if args.file else 0
+    if args.list:
         list_all_users()
-    else:
-        print("Invalid option selected.")
\ No newline at end of file
+    sys.exit(1 if errors else 0)
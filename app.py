@@ -3,50 +3,435 @@ DLSU-D CSO Attendance System - Main Application
 Flask application with routes for attendance tracking, user management, and Excel export
 """
 
+import bisect
 import os
+import shutil
+import tempfile
+import time
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, jsonify, send_file
+from types import SimpleNamespace
+from flask import (
+    Blueprint, Flask, Response, current_app, render_template, request, jsonify,
+    send_file, send_from_directory, stream_with_context
+)
+from sqlalchemy.engine import make_url
+from werkzeug.local import LocalProxy
 from werkzeug.utils import secure_filename
-from models import db, User, Attendance
-import pandas as pd
-from io import BytesIO
+from models import db, User, Attendance, DataVersion, configure_sqlite
+from photos import InvalidPhoto, delete_photo, ensure_thumbnail, save_photo
+from presence import OnlineRegistry
+from events import EventBroadcaster
+from versions import ChangeTracker
+from roster import RosterCache
+from debounce import ScanDebouncer
+from shared_state import SharedStateSync
+from metrics import RequestMetrics
+import summary
+from archive import ArchiveError, overlapping_terms
+from backup import BackupScheduler
+from search import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, ensure_index, search_users
+from jobs import JobQueue
+from artifacts import ArtifactCache
+from imports import InvalidImport, import_users, read_sheet
+import stats
+from stats import StatsCache
+from occupancy import INTERVALS, OCCUPANCY_COLUMNS, OCCUPANCY_COLUMN_WIDTHS, iter_occupancy_rows
+from exports import (
+    DTR_COLUMNS, DTR_COLUMN_WIDTHS, ROSTER_COLUMNS, ROSTER_COLUMN_WIDTHS, CSV_MIMETYPE, XLSX_MIMETYPE,
+    count_dtr_rows, dtr_version, roster_version, iter_dtr_rows, iter_roster_rows, stream_csv, stream_xlsx, write_export
+)
 
-# Initialize Flask app
-app = Flask(__name__)
-
-# Configuration
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-app.config['SECRET_KEY'] = 'dlsud-cso-attendance-secret-key-2024'
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(BASE_DIR, "attendance.db")}'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = os.path.join(BASE_DIR, 'static', 'photos')
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 
-# Initialize database
-db.init_app(app)
+# Every route lives on this blueprint; create_app() registers it
+bp = Blueprint('attendance', __name__)
+
+
+def load_config(app):
+    """Default configuration, with environment overrides where supported"""
+    app.config['SECRET_KEY'] = 'dlsud-cso-attendance-secret-key-2024'
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+        'DATABASE_URL', f'sqlite:///{os.path.join(BASE_DIR, "attendance.db")}'
+    )
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    
+    # SQLite tuning for several kiosks scanning while exports run
+    app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 15000))
+    app.config['SQLITE_CACHE_SIZE_KB'] = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 32768))
+    app.config['UPLOAD_FOLDER'] = os.path.join(BASE_DIR, 'static', 'photos')
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    
+    # Photo URLs change whenever the photo does, so browsers may keep them for a year
+    app.config['PHOTO_CACHE_MAX_AGE'] = 365 * 24 * 60 * 60
+    
+    # Under serve.py streams share one writer thread, so this is not bound by
+    # the request threads; extra dashboards fall back to polling
+    app.config['SSE_MAX_SUBSCRIBERS'] = 200
+    app.config['SSE_HEARTBEAT_SECONDS'] = 15
+    app.config['SSE_MAX_STREAM_SECONDS'] = 300  # Clients reconnect after this
+    
+    # Repeat scans of the same member within this many seconds are ignored
+    app.config['SCAN_DEBOUNCE_SECONDS'] = float(os.environ.get('SCAN_DEBOUNCE_SECONDS', 5))
+    
+    # Largest number of queued scans accepted by /api/scan/batch
+    app.config['SCAN_BATCH_MAX_SIZE'] = 10000
+    
+    # Student ID lookups kept in memory for the scan path (0 disables the cache)
+    app.config['ROSTER_CACHE_SIZE'] = int(os.environ.get('ROSTER_CACHE_SIZE', 5000))
+    
+    # Background exports: finished files are kept for an hour, and only a few
+    # exports run at once so scans always have a worker
+    app.config['EXPORT_JOB_FOLDER'] = os.environ.get(
+        'EXPORT_JOB_FOLDER', os.path.join(tempfile.gettempdir(), 'cso-attendance-exports')
+    )
+    app.config['EXPORT_JOB_WORKERS'] = int(os.environ.get('EXPORT_JOB_WORKERS', 1))
+    app.config['EXPORT_JOB_MAX_PENDING'] = 10
+    app.config['EXPORT_JOB_RETENTION_SECONDS'] = 3600
+    
+    # Generated exports are reused until their data changes (0 disables the cache)
+    app.config['EXPORT_CACHE_FOLDER'] = os.environ.get(
+        'EXPORT_CACHE_FOLDER', os.path.join(tempfile.gettempdir(), 'cso-attendance-export-cache')
+    )
+    app.config['EXPORT_CACHE_MAX_BYTES'] = int(os.environ.get('EXPORT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    
+    # Dashboard statistics: ranges that include today are recomputed at most
+    # once per STATS_CACHE_SECONDS; past ranges are kept until their data changes
+    app.config['STATS_CACHE_SECONDS'] = int(os.environ.get('STATS_CACHE_SECONDS', 60))
+    app.config['STATS_CACHE_SIZE'] = 256
+    app.config['STATS_MAX_DAYS'] = 731
+    
+    # Per-term database files of archived attendance (see archive_terms.py)
+    app.config['ARCHIVE_FOLDER'] = os.environ.get('ARCHIVE_FOLDER', os.path.join(BASE_DIR, 'archive'))
+    
+    # Online backups taken by serve.py whenever the newest snapshot is older
+    # than BACKUP_INTERVAL_HOURS (0 turns them off; python backup.py takes one
+    # by hand). Snapshots go next to the database unless BACKUP_FOLDER is set.
+    app.config['BACKUP_FOLDER'] = os.environ.get('BACKUP_FOLDER')
+    app.config['BACKUP_INTERVAL_HOURS'] = float(os.environ.get('BACKUP_INTERVAL_HOURS', 24))
+    app.config['BACKUP_COMPRESS'] = os.environ.get('BACKUP_COMPRESS', '1') == '1'
+    app.config['BACKUP_KEEP'] = int(os.environ.get('BACKUP_KEEP', 14))
+    app.config['BACKUP_MAX_AGE_DAYS'] = int(os.environ.get('BACKUP_MAX_AGE_DAYS', 30))
+    
+    # Number of processes serving this app (set by serve.py). With more than
+    # one, each process follows the others' writes through the database.
+    app.config['WORKER_PROCESSES'] = 1
+    app.config['SHARED_STATE_POLL_SECONDS'] = 1.0
+    
+    # Request and SQL timing served at /api/metrics (off unless METRICS_ENABLED=1)
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '0') == '1'
+    app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 100))
+    app.config['SLOW_REQUEST_MS'] = float(os.environ.get('SLOW_REQUEST_MS', 1000))
+
+
+def create_app(config=None):
+    """
+    Build a configured application with its own in-memory state
+
+    config overrides the defaults from load_config(). Nothing touches the
+    database here, so every worker process can call this on startup.
+    """
+    app = Flask(__name__)
+    load_config(app)
+    if config:
+        app.config.update(config)
+    
+    db.init_app(app)
+    configure_sqlite(app)
+    
+    app.extensions['cso'] = SimpleNamespace(
+        # In-memory view of online users, hydrated from the database on first use
+        online_users=OnlineRegistry(),
+        # Pushes Time In / Time Out changes to open dashboards
+        broadcaster=EventBroadcaster(max_subscribers=app.config['SSE_MAX_SUBSCRIBERS']),
+        # Data versions behind the ETags of polled endpoints
+        changes=ChangeTracker(),
+        # Cached user details for the scan path, invalidated by user changes
+        roster_cache=RosterCache(max_size=app.config['ROSTER_CACHE_SIZE']),
+        # Guards against double taps and two kiosks scanning the same ID at once
+        scan_debouncer=ScanDebouncer(window_seconds=app.config['SCAN_DEBOUNCE_SECONDS']),
+        # Runs queued exports off the request path
+        export_jobs=JobQueue(
+            app.config['EXPORT_JOB_FOLDER'],
+            max_workers=app.config['EXPORT_JOB_WORKERS'],
+            max_pending=app.config['EXPORT_JOB_MAX_PENDING'],
+            retention_seconds=app.config['EXPORT_JOB_RETENTION_SECONDS']
+        ),
+        # Finished export files, keyed by their database, parameters and data versions
+        export_cache=ArtifactCache(
+            app.config['EXPORT_CACHE_FOLDER'], max_bytes=app.config['EXPORT_CACHE_MAX_BYTES'],
+            namespace=database_path(app) or app.config['SQLALCHEMY_DATABASE_URI']
+        ),
+        # Computed /api/stats results, keyed by the data they were computed from
+        stats_cache=StatsCache(max_size=app.config['STATS_CACHE_SIZE']),
+        # Follows the other worker processes, if there are any
+        shared_state=None,
+        # Request and SQL timings, when enabled
+        metrics=None,
+        # Scheduled online backups, when enabled (started by serve.py)
+        backups=None,
+    )
+    
+    if app.config['WORKER_PROCESSES'] > 1:
+        state = app.extensions['cso']
+        state.shared_state = SharedStateSync(apply_shared_event, reset_shared_state)
+        state.changes.shared_tag = lambda: state.shared_state.tag
+    
+    if app.config['METRICS_ENABLED']:
+        state = app.extensions['cso']
+        state.metrics = RequestMetrics(
+            slow_query_seconds=app.config['SLOW_QUERY_MS'] / 1000,
+            slow_request_seconds=app.config['SLOW_REQUEST_MS'] / 1000
+        )
+        state.metrics.init_app(app)
+    
+    source = database_path(app)
+    if app.config['BACKUP_FOLDER'] is None and source is not None:
+        app.config['BACKUP_FOLDER'] = os.path.join(os.path.dirname(source), 'backups')
+    if app.config['BACKUP_INTERVAL_HOURS'] > 0 and source is not None:
+        app.extensions['cso'].backups = BackupScheduler(
+            source,
+            app.config['BACKUP_FOLDER'],
+            interval_seconds=app.config['BACKUP_INTERVAL_HOURS'] * 3600,
+            compress=app.config['BACKUP_COMPRESS'],
+            keep=app.config['BACKUP_KEEP'],
+            max_age_days=app.config['BACKUP_MAX_AGE_DAYS'],
+            archive_folder=app.config['ARCHIVE_FOLDER']
+        )
+    
+    app.register_blueprint(bp)
+    return app
+
+
+def database_path(app):
+    """Path of the app's SQLite database file, or None for other databases"""
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return None
+    return os.path.abspath(url.database)
+
+
+def services(app=None):
+    """The in-memory services (registry, caches, queues) of app, or the current app"""
+    return (app or current_app).extensions['cso']
+
+
+def start_background(app):
+    """Start the threads a serving process needs besides its request workers"""
+    state = services(app)
+    if state.shared_state is not None:
+        with app.app_context():
+            state.shared_state.sync()
+        state.shared_state.start(app, app.config['SHARED_STATE_POLL_SECONDS'])
+    if state.backups is not None:
+        state.backups.start()
+
+
+def shutdown(app, wait=True):
+    """
+    Release a serving process's resources
+
+    Open event streams are ended, queued exports are dropped (running ones
+    finish when wait is True) and database connections are closed.
+    """
+    state = services(app)
+    state.broadcaster.close()
+    if state.shared_state is not None:
+        state.shared_state.stop()
+    if state.backups is not None:
+        state.backups.stop()
+    state.export_jobs.shutdown(wait=wait)
+    with app.app_context():
+        db.engine.dispose()
+
+
+# The current app's services, so routes can use them like plain globals
+online_users = LocalProxy(lambda: services().online_users)
+broadcaster = LocalProxy(lambda: services().broadcaster)
+changes = LocalProxy(lambda: services().changes)
+roster_cache = LocalProxy(lambda: services().roster_cache)
+scan_debouncer = LocalProxy(lambda: services().scan_debouncer)
+export_jobs = LocalProxy(lambda: services().export_jobs)
+export_cache = LocalProxy(lambda: services().export_cache)
+stats_cache = LocalProxy(lambda: services().stats_cache)
+
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def toggle_status(status):
+    """Return the (new status, event type) that a scan produces"""
+    if status == 'Online':
+        return 'Offline', 'Time Out'
+    return 'Online', 'Time In'
+
+
+def begin_write():
+    """
+    Take SQLite's write lock for the rest of the current transaction
+
+    Any write statement does this, even one that matches no rows; reads made
+    afterwards cannot be invalidated by another writer before commit.
+    """
+    db.session.execute(db.text('UPDATE users SET status = status WHERE 0'))
+
+
+def event_history(user_ids, since):
+    """
+    Each user's stored events from since on, after their last one before it
+
+    Returns {user_id: ([timestamps], [event types])} in time order, for
+    finding the event that a replayed scan follows.
+    """
+    history = {user_id: ([], []) for user_id in user_ids}
+    for i in range(0, len(user_ids), 500):
+        chunk = user_ids[i:i + 500]
+        # One indexed lookup per user for the last event before since
+        last_before = db.select(Attendance.id).where(
+            Attendance.user_id == User.id, Attendance.timestamp < since
+        ).order_by(Attendance.timestamp.desc(), Attendance.id.desc()).limit(1).correlate(User).scalar_subquery()
+        rows = db.session.execute(
+            db.select(Attendance.user_id, Attendance.timestamp, Attendance.event_type).where(
+                Attendance.id.in_(db.select(last_before).where(User.id.in_(chunk)))
+            )
+        ).all()
+        rows += db.session.execute(
+            db.select(Attendance.user_id, Attendance.timestamp, Attendance.event_type).where(
+                Attendance.user_id.in_(chunk), Attendance.timestamp >= since
+            ).order_by(Attendance.user_id, Attendance.timestamp, Attendance.id)
+        ).all()
+        for user_id, timestamp, event_type in rows:
+            history[user_id][0].append(timestamp)
+            history[user_id][1].append(event_type)
+    return history
+
+
+def flip_status(user_id):
+    """
+    Atomically toggle a user's stored status within the current transaction
+
+    Each UPDATE only matches the status it expects to replace, and the first
+    one takes the write lock, so racing scans of the same user are applied
+    one after another instead of both seeing 'Offline'. Returns the
+    (new status, event type), or (None, None) if the user no longer exists.
+    """
+    for current, condition in (
+        ('Offline', db.or_(User.status.is_(None), User.status != 'Online')),
+        ('Online', User.status == 'Online'),
+    ):
+        status, event_type = toggle_status(current)
+        result = db.session.execute(
+            db.update(User)
+            .where(User.id == user_id, condition)
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return status, event_type
+    return None, None
+
+
+def find_user(student_id):
+    """Look up a user's details by student ID, going through the roster cache"""
+    user_data = roster_cache.get(student_id)
+    if user_data is None:
+        user = User.query.filter_by(student_id=student_id).first()
+        if not user:
+            return None
+        user_data = user.to_dict()
+        roster_cache.put(student_id, user_data)
+    return user_data
+
+
+def versioned_json(scope, build):
+    """
+    Return build() as JSON, tagged with the current version of a data scope
+
+    When the client already holds the current version (If-None-Match),
+    a bodyless 304 is returned without calling build() at all.
+    """
+    # Read the version before building, so a concurrent change can only
+    # make the tag older than the body, never newer
+    etag = changes.etag(scope)
+    
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def publish_presence(user_data, status):
+    """Notify open dashboards that a user came online or went offline"""
+    broadcaster.publish('presence', {
+        'status': status,
+        'user': user_data,
+        'total_count': online_users.count
+    })
+
+
+def apply_shared_event(user_data, sequence):
+    """Apply a scan recorded by another worker process"""
+    online_users.ensure_loaded()
+    if online_users.record(user_data, sequence):
+        publish_presence(user_data, user_data['status'])
+
+
+def reset_shared_state():
+    """Start over after another worker process changed users"""
+    roster_cache.clear()
+    online_users.load()
+    changes.bump('users')
+    broadcaster.publish('refresh', {'total_count': online_users.count})
+
+
+@bp.before_request
+def follow_other_workers():
+    """With several worker processes, catch up with them if the background sync is behind"""
+    shared_state = services().shared_state
+    if shared_state is not None:
+        # A round trip per request would cost more than the staleness it saves
+        shared_state.sync(max_age=2 * current_app.config['SHARED_STATE_POLL_SECONDS'])
+
+
 # ============================================
 # PAGE ROUTES
 # ============================================
 
-@app.route('/')
+@bp.route('/')
 def dashboard():
     """Render main dashboard page"""
     return render_template('dashboard.html', committees=User.COMMITTEES)
 
 
+@bp.route('/photos/<path:filename>')
+def serve_photo(filename):
+    """Serve a member photo or thumbnail with long-lived cache headers"""
+    folder = current_app.config['UPLOAD_FOLDER']
+    
+    thumbnail = filename.startswith('thumbs/')
+    if thumbnail and not ensure_thumbnail(filename[len('thumbs/'):], folder):
+        return jsonify({'success': False, 'message': 'Photo not found.'}), 404
+    
+    response = send_from_directory(folder, filename, max_age=current_app.config['PHOTO_CACHE_MAX_AGE'])
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
 # ============================================
 # ATTENDANCE API ROUTES
 # ============================================
 
-@app.route('/api/scan', methods=['POST'])
+@bp.route('/api/scan', methods=['POST'])
 def scan_id():
     """
     Process ID scan - implements no-touch logic
@@ -59,105 +444,365 @@ def scan_id():
         return jsonify({'success': False, 'message': 'Please enter an ID number.'}), 400
     
     # Find user by student ID
-    user = User.query.filter_by(student_id=student_id).first()
+    user_data = find_user(student_id)
     
-    if not user:
+    if not user_data:
         return jsonify({
             'success': False, 
             'message': 'User not found. Please check the ID number.',
             'user': None
         }), 404
     
-    # Determine action based on current status
-    current_time = datetime.now()
-    is_birthday = False
+    if not scan_debouncer.accept(user_data['id']):
+        return jsonify({
+            'success': False,
+            'message': 'Already scanned. Please wait a few seconds before scanning again.',
+            'user': None
+        }), 429
     
-    if user.status == 'Offline':
-        # Time In
-        user.status = 'Online'
-        event_type = 'Time In'
+    # Flip the stored status and record the event in one transaction
+    try:
+        status, event_type = flip_status(user_data['id'])
+        if not status:
+            db.session.rollback()
+            roster_cache.invalidate(student_id)
+            scan_debouncer.release(user_data['id'])
+            return jsonify({
+                'success': False, 
+                'message': 'User not found. Please check the ID number.',
+                'user': None
+            }), 404
         
+        # Read the clock only once the write lock is held, so that racing
+        # scans get timestamps in the same order as their In/Out toggles
+        current_time = datetime.now()
+        summary.record_scan(user_data['id'], current_time, event_type)
+        attendance = Attendance(
+            user_id=user_data['id'],
+            timestamp=current_time,
+            event_type=event_type
+        )
+        db.session.add(attendance)
+        db.session.flush()
+        sequence = attendance.id
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        scan_debouncer.release(user_data['id'])
+        raise
+    
+    changes.bump('users')
+    
+    user_data = dict(user_data, status=status)
+    online_users.ensure_loaded()
+    if online_users.record(user_data, sequence):
+        publish_presence(user_data, status)
+    
+    is_birthday = False
+    full_name = user_data['full_name']
+    
+    if event_type == 'Time In':
         # Check for birthday
-        if user.birthday:
+        if user_data['birthday']:
             today = current_time.strftime('%m-%d')
-            if user.birthday == today:
+            if user_data['birthday'] == today:
                 is_birthday = True
-                message = f"🎂 Happy Birthday, {user.full_name}! You are timed in."
+                message = f"🎂 Happy Birthday, {full_name}! You are timed in."
             else:
-                message = f"Welcome, {user.full_name}!"
+                message = f"Welcome, {full_name}!"
         else:
-            message = f"Welcome, {user.full_name}!"
+            message = f"Welcome, {full_name}!"
     else:
-        # Time Out
-        user.status = 'Offline'
-        event_type = 'Time Out'
-        message = f"Goodbye, {user.full_name}!"
-    
-    # Create attendance record
-    attendance = Attendance(
-        user_id=user.id,
-        timestamp=current_time,
-        event_type=event_type
-    )
-    
-    db.session.add(attendance)
-    db.session.commit()
+        message = f"Goodbye, {full_name}!"
     
     return jsonify({
         'success': True,
         'message': message,
         'event_type': event_type,
         'is_birthday': is_birthday,
-        'user': user.to_dict(),
+        'user': user_data,
         'timestamp': current_time.strftime('%I:%M %p')
     })
 
 
-@app.route('/api/active-users')
-def get_active_users():
-    """Get all currently active (online) users grouped by committee"""
-    active_users = User.query.filter_by(status='Online').all()
+@bp.route('/api/scan/batch', methods=['POST'])
+def scan_batch():
+    """
+    Replay scans queued by an offline kiosk
+
+    Expects {"scans": [{"student_id": ..., "timestamp": ISO 8601}, ...]}.
+    Timestamps with an offset are converted to server local time, those
+    without one are taken as local time already, and ones in the future
+    are rejected. Scans are applied in timestamp order with the same Time
+    In / Time Out toggle as /api/scan: each one follows the user's event
+    just before it, stored or replayed, so scans older than events
+    recorded since still alternate. The user's status follows their latest
+    event. Everything is committed in a single transaction. Invalid entries
+    are reported per index and do not stop the rest of the batch.
+    """
+    data = request.get_json(silent=True) or {}
+    scans = data.get('scans')
     
-    # Group by committee
-    grouped = {}
-    for committee in User.COMMITTEES:
-        grouped[committee] = []
+    if not isinstance(scans, list) or not scans:
+        return jsonify({'success': False, 'message': 'No scans to process.'}), 400
     
-    for user in active_users:
-        if user.committee in grouped:
-            grouped[user.committee].append(user.to_dict())
+    if len(scans) > current_app.config['SCAN_BATCH_MAX_SIZE']:
+        return jsonify({
+            'success': False,
+            'message': f"A batch can hold at most {current_app.config['SCAN_BATCH_MAX_SIZE']} scans."
+        }), 400
     
+    # Validate every entry before touching the database
+    results = [None] * len(scans)
+    events = []  # (timestamp, index, student_id)
+    now = datetime.now()
+    for index, scan in enumerate(scans):
+        student_id = str(scan.get('student_id', '')).strip() if isinstance(scan, dict) else ''
+        if not student_id:
+            results[index] = {'index': index, 'success': False, 'message': 'Missing ID number.'}
+            continue
+        try:
+            timestamp = datetime.fromisoformat(str(scan.get('timestamp', '')))
+        except ValueError:
+            results[index] = {
+                'index': index, 'student_id': student_id,
+                'success': False, 'message': 'Invalid timestamp.'
+            }
+            continue
+        # Times are stored as the server's local time; convert any with an
+        # offset (e.g. Date.toISOString() in UTC) rather than dropping it
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+        if timestamp > now:
+            results[index] = {
+                'index': index, 'student_id': student_id,
+                'success': False, 'message': 'Timestamp is in the future.'
+            }
+            continue
+        events.append((timestamp, index, student_id))
+    
+    # Days of archived terms live in their own files and no longer change
+    if events:
+        terms = overlapping_terms(min(events)[0].date(), max(events)[0].date())
+        kept = []
+        for timestamp, index, student_id in events:
+            if any(term.start_date <= timestamp.date() <= term.end_date for term in terms):
+                results[index] = {
+                    'index': index, 'student_id': student_id,
+                    'success': False, 'message': 'Falls in an archived term.'
+                }
+            else:
+                kept.append((timestamp, index, student_id))
+        events = kept
+    
+    # Hold the write lock from here on, so no scan can change a status
+    # between reading it and writing the replayed events
+    begin_write()
+    
+    # Load every referenced user with one query per chunk of IDs
+    student_ids = list({student_id for _, _, student_id in events})
+    users = {}
+    for i in range(0, len(student_ids), 500):
+        chunk = student_ids[i:i + 500]
+        for user in User.query.filter(User.student_id.in_(chunk)).all():
+            users[user.student_id] = user
+    
+    initial_status = {user.id: user.status for user in users.values()}
+    status = dict(initial_status)
+    history = event_history([user.id for user in users.values()], min(events)[0]) if events else {}
+    attendance_rows = []
+    
+    # Stable sort keeps the kiosk's order for scans with equal timestamps
+    for timestamp, index, student_id in sorted(events, key=lambda e: (e[0], e[1])):
+        user = users.get(student_id)
+        if not user:
+            results[index] = {
+                'index': index, 'student_id': student_id,
+                'success': False, 'message': 'User not found.'
+            }
+            continue
+        
+        # A queued scan can be older than events recorded since; it toggles
+        # from whatever event comes just before it, stored or replayed
+        times, types = history[user.id]
+        position = bisect.bisect_right(times, timestamp)
+        if position:
+            previous = 'Online' if types[position - 1] == 'Time In' else 'Offline'
+        else:
+            previous = 'Offline' if times else initial_status[user.id]
+        _, event_type = toggle_status(previous)
+        times.insert(position, timestamp)
+        types.insert(position, event_type)
+        # The live status follows the latest event
+        status[user.id] = 'Online' if types[-1] == 'Time In' else 'Offline'
+        attendance_rows.append({
+            'user_id': user.id,
+            'timestamp': timestamp,
+            'event_type': event_type
+        })
+        results[index] = {
+            'index': index, 'student_id': student_id,
+            'success': True, 'event_type': event_type
+        }
+    
+    # Serialize before committing, which would expire the loaded users
+    changed = [
+        dict(user.to_dict(), status=status[user.id])
+        for user in users.values() if status[user.id] != initial_status[user.id]
+    ]
+    
+    sequence = 0
+    if attendance_rows:
+        db.session.execute(db.insert(Attendance), attendance_rows)
+        summary.refresh_days({(row['user_id'], row['timestamp'].date()) for row in attendance_rows})
+        if changed:
+            db.session.execute(
+                db.update(User),
+                [{'id': user_data['id'], 'status': user_data['status']} for user_data in changed]
+            )
+        sequence = db.session.query(db.func.max(Attendance.id)).scalar()
+        db.session.commit()
+        changes.bump('users')
+    else:
+        db.session.rollback()
+    
+    online_users.ensure_loaded()
+    for user_data in changed:
+        if online_users.record(user_data, sequence):
+            publish_presence(user_data, user_data['status'])
+    
+    processed = len(attendance_rows)
     return jsonify({
         'success': True,
-        'active_users': grouped,
-        'total_count': len(active_users)
+        'message': f'{processed} of {len(scans)} scans recorded.',
+        'processed': processed,
+        'failed': len(scans) - processed,
+        'results': results
     })
 
 
+@bp.route('/api/active-users')
+def get_active_users():
+    """Get all currently active (online) users grouped by committee"""
+    def build():
+        online_users.ensure_loaded()
+        snapshot = online_users.snapshot()
+        return {
+            'success': True,
+            'active_users': snapshot['active_users'],
+            'total_count': snapshot['total_count']
+        }
+    
+    return versioned_json('users', build)
+
+
+@bp.route('/api/events')
+def stream_events():
+    """
+    Server-sent event stream of Time In / Time Out changes
+
+    Each open dashboard holds one connection that sits idle until a scan
+    happens. Under serve.py these requests are handed to a single writer
+    thread before they get here (see events.StreamWriter); this view serves
+    them on other servers, such as the development server, holding a
+    thread per stream. When the subscriber limit is reached, 503 is
+    returned and the dashboard falls back to polling /api/active-users.
+    """
+    subscriber = broadcaster.subscribe()
+    if subscriber is None:
+        return jsonify({'success': False, 'message': 'Too many live connections.'}), 503
+    
+    stream = broadcaster.stream(
+        subscriber,
+        heartbeat=current_app.config['SSE_HEARTBEAT_SECONDS'],
+        max_duration=current_app.config['SSE_MAX_STREAM_SECONDS']
+    )
+    
+    return Response(
+        stream,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@bp.route('/api/metrics')
+def get_metrics():
+    """
+    Request, SQL and cache metrics in Prometheus text format
+
+    Only available when METRICS_ENABLED is set. With several worker
+    processes, each scrape reports the process that happened to serve it.
+    """
+    metrics = services().metrics
+    if metrics is None:
+        return jsonify({'success': False, 'message': 'Metrics are disabled.'}), 404
+
+    body = metrics.render(extra=[
+        ('cso_sse_subscribers', 'gauge', 'Open live-update streams.', broadcaster.subscriber_count),
+        ('cso_export_jobs_pending', 'gauge', 'Export jobs queued or running.', export_jobs.pending),
+        ('cso_roster_cache_hits_total', 'counter', 'Scan lookups served from the roster cache.', roster_cache.hits),
+        ('cso_roster_cache_misses_total', 'counter', 'Scan lookups that went to the database.', roster_cache.misses),
+        ('cso_export_cache_hits_total', 'counter', 'Exports served from the export cache.', export_cache.hits),
+        ('cso_export_cache_misses_total', 'counter', 'Exports generated from scratch.', export_cache.misses),
+        ('cso_stats_cache_hits_total', 'counter', 'Statistics served from the stats cache.', stats_cache.hits),
+        ('cso_stats_cache_misses_total', 'counter', 'Statistics computed from the database.', stats_cache.misses),
+    ] + backup_metrics(services().backups))
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
+def backup_metrics(backups):
+    if backups is None:
+        return []
+    return [
+        ('cso_backup_last_success_timestamp_seconds', 'gauge',
+         'When this process last took a backup (0 if it has not).', backups.last_success or 0),
+        ('cso_backup_failures_total', 'counter', 'Scheduled backups that failed.', backups.failures),
+    ]
+
+
 # ============================================
 # USER MANAGEMENT API ROUTES
 # ============================================
 
-@app.route('/api/users', methods=['GET'])
+@bp.route('/api/users', methods=['GET'])
 def get_users():
-    """Get all users with optional search"""
+    """
+    Get one page of users, ordered by name, with optional search
+    
+    Query parameters: search, limit (default 50, at most 200) and cursor
+    (the next_cursor of the previous page).
+    """
     search = request.args.get('search', '').strip()
+    cursor = request.args.get('cursor') or None
     
-    if search:
-        users = User.query.filter(
-            (User.student_id.contains(search)) | 
-            (User.full_name.ilike(f'%{search}%'))
-        ).all()
-    else:
-        users = User.query.order_by(User.full_name).all()
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({
+            'success': False,
+            'message': f'limit must be between 1 and {MAX_PAGE_SIZE}.'
+        }), 400
     
-    return jsonify({
-        'success': True,
-        'users': [user.to_dict() for user in users]
-    })
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+    
+    def build():
+        users, next_cursor = search_users(search, limit, cursor)
+        return {
+            'success': True,
+            'users': [user.to_dict() for user in users],
+            'next_cursor': next_cursor
+        }
+    
+    return versioned_json('users', build)
 
 
-@app.route('/api/users', methods=['POST'])
+@bp.route('/api/users', methods=['POST'])
 def add_user():
     """Add a new user"""
     # Handle form data (for file upload)
@@ -187,15 +832,18 @@ def add_user():
             'message': 'A user with this Student ID already exists.'
         }), 400
     
-    # Handle photo upload
+    # Handle photo upload (stored with thumbnails under a content-hashed name)
     photo_filename = None
     if 'photo' in request.files:
         file = request.files['photo']
         if file and file.filename and allowed_file(file.filename):
-            # Create unique filename
             ext = file.filename.rsplit('.', 1)[1].lower()
-            photo_filename = f"{student_id}.{ext}"
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], photo_filename))
+            try:
+                photo_filename = save_photo(
+                    file.read(), secure_filename(student_id), ext, current_app.config['UPLOAD_FOLDER']
+                )
+            except InvalidPhoto as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
     
     # Create new user
     user = User(
@@ -208,7 +856,10 @@ def add_user():
     )
     
     db.session.add(user)
+    DataVersion.bump('users')
     db.session.commit()
+    changes.bump('users')
+    roster_cache.invalidate(student_id)
     
     return jsonify({
         'success': True,
@@ -217,7 +868,39 @@ def add_user():
     })
 
 
-@app.route('/api/users/<int:user_id>', methods=['PUT'])
+@bp.route('/api/users/import', methods=['POST'])
+def import_users_file():
+    """
+    Add members in bulk from an uploaded CSV or Excel file
+
+    Valid rows are added and the rest are reported back one by one with
+    their line number, so a sheet can be fixed and uploaded again (rows
+    already added are then reported as existing). Pass dry_run=1 to only
+    validate.
+    """
+    file = request.files.get('file')
+    if not file or not file.filename:
+        return jsonify({'success': False, 'message': 'Choose a CSV or Excel file to import.'}), 400
+
+    dry_run = request.values.get('dry_run', '0') in ('1', 'true')
+    try:
+        result = import_users(read_sheet(file.stream, file.filename), dry_run=dry_run)
+    except InvalidImport as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    if result['imported']:
+        changes.bump('users')
+        roster_cache.clear()
+
+    verb = 'can be imported' if dry_run else 'imported'
+    return jsonify(dict(
+        result,
+        success=True,
+        message=f"{result['valid']} of {result['total']} row(s) {verb}, {len(result['errors'])} with errors."
+    ))
+
+
+@bp.route('/api/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
     """Update an existing user"""
     user = User.query.get(user_id)
@@ -239,27 +922,38 @@ def update_user(user_id):
     if 'photo' in request.files:
         file = request.files['photo']
         if file and file.filename and allowed_file(file.filename):
-            # Delete old photo if exists
-            if user.photo_filename:
-                old_path = os.path.join(app.config['UPLOAD_FOLDER'], user.photo_filename)
-                if os.path.exists(old_path):
-                    os.remove(old_path)
-            
             ext = file.filename.rsplit('.', 1)[1].lower()
-            photo_filename = f"{user.student_id}.{ext}"
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], photo_filename))
+            try:
+                photo_filename = save_photo(
+                    file.read(), secure_filename(user.student_id), ext, current_app.config['UPLOAD_FOLDER']
+                )
+            except InvalidPhoto as e:
+                db.session.rollback()
+                return jsonify({'success': False, 'message': str(e)}), 400
+            
+            # Delete old photo if exists (re-uploading the same image keeps its name)
+            if user.photo_filename and user.photo_filename != photo_filename:
+                delete_photo(user.photo_filename, current_app.config['UPLOAD_FOLDER'])
             user.photo_filename = photo_filename
     
+    DataVersion.bump('users')
     db.session.commit()
+    changes.bump('users')
+    roster_cache.invalidate(user.student_id)
+    
+    user_data = user.to_dict()
+    online_users.ensure_loaded()
+    if online_users.update(user_data):
+        publish_presence(user_data, 'Online')
     
     return jsonify({
         'success': True,
         'message': f'User {user.full_name} updated successfully!',
-        'user': user.to_dict()
+        'user': user_data
     })
 
 
-@app.route('/api/users/<int:user_id>', methods=['DELETE'])
+@bp.route('/api/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
     """Delete a user and their attendance records"""
     user = User.query.get(user_id)
@@ -269,13 +963,19 @@ def delete_user(user_id):
     
     # Delete photo if exists
     if user.photo_filename:
-        photo_path = os.path.join(app.config['UPLOAD_FOLDER'], user.photo_filename)
-        if os.path.exists(photo_path):
-            os.remove(photo_path)
+        delete_photo(user.photo_filename, current_app.config['UPLOAD_FOLDER'])
     
     name = user.full_name
+    user_data = user.to_dict()
     db.session.delete(user)
+    DataVersion.bump('users')
     db.session.commit()
+    changes.bump('users')
+    roster_cache.invalidate(user_data['student_id'])
+    
+    online_users.ensure_loaded()
+    if online_users.set_offline(user_data['id']):
+        publish_presence(user_data, 'Offline')
     
     return jsonify({
         'success': True,
@@ -283,148 +983,385 @@ def delete_user(user_id):
     })
 
 
+# ============================================
+# STATISTICS API ROUTES
+# ============================================
+
+def stats_range(values, default_days):
+    """
+    Read (start_date, end_date) from request values
+
+    Dates default to the default_days ending today. Raises ValueError with
+    a user-facing message for bad input.
+    """
+    today = datetime.now().date()
+    try:
+        end_date = values.get('end_date')
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else today
+        start_date = values.get('start_date')
+        start_date = (
+            datetime.strptime(start_date, '%Y-%m-%d').date() if start_date
+            else end_date - timedelta(days=default_days - 1)
+        )
+    except ValueError:
+        raise ValueError('Dates must be in YYYY-MM-DD format.')
+    
+    if start_date > end_date:
+        raise ValueError('The start date must not be after the end date.')
+    if (end_date - start_date).days >= current_app.config['STATS_MAX_DAYS']:
+        raise ValueError(f"Statistics cover at most {current_app.config['STATS_MAX_DAYS']} days.")
+    return start_date, end_date
+
+
+def stats_version(start_date, end_date):
+    """
+    Version of the data behind a statistic over this range, for its cache key
+
+    A range that includes today changes with every scan, so it is only
+    recomputed once per STATS_CACHE_SECONDS. Past ranges use the DTR
+    export fingerprint and keep their result until their data changes.
+    """
+    if end_date >= datetime.now().date():
+        bucket = int(time.time() // max(1, current_app.config['STATS_CACHE_SECONDS']))
+        return ['live', bucket, DataVersion.get('users')]
+    return dtr_version(start_date, end_date)
+
+
+def cached_stats(name, start_date, end_date, **params):
+    """stats.<name>(start_date, end_date, **params), through the stats cache"""
+    compute = getattr(stats, name)
+    key = export_cache.key(name, start_date, end_date, params, stats_version(start_date, end_date))
+    return stats_cache.get_or_compute(key, lambda: compute(start_date, end_date, **params))
+
+
+def stats_json(name, default_days, **params):
+    """Answer a /api/stats/<name> request for the range in the query string"""
+    try:
+        start_date, end_date = stats_range(request.args, default_days)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        result = cached_stats(name, start_date, end_date, **params)
+    except ArchiveError as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+    
+    response = {'success': True, 'start_date': start_date.isoformat(), 'end_date': end_date.isoformat()}
+    response.update(result if isinstance(result, dict) else {name: result})
+    return jsonify(response)
+
+
+@bp.route('/api/stats')
+def get_stats():
+    """
+    Overview for the dashboard: today, this week, the busiest hour and current streaks
+
+    Each part is cached like the /api/stats/<name> endpoints it comes from.
+    """
+    today = datetime.now().date()
+    try:
+        headcount = cached_stats('daily_headcount', today, today)[0]
+        week = cached_stats('committee_hours', stats.week_start(today), today)[0]
+        hours = cached_stats('peak_hours', today - timedelta(days=29), today)
+        top = cached_stats('streaks', today - timedelta(days=89), today, limit=5)
+    except ArchiveError as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+    
+    busiest = max(hours, key=lambda hour: (hour['average'], hour['peak']))
+    return jsonify({
+        'success': True,
+        'today': headcount,
+        'week': week,
+        'busiest_hour': busiest if busiest['peak'] else None,
+        'streaks': top['streaks']
+    })
+
+
+@bp.route('/api/stats/committee-hours')
+def get_committee_hours():
+    """Hours rendered per committee per week (default: the last 8 weeks)"""
+    return stats_json('committee_hours', 56)
+
+
+@bp.route('/api/stats/daily-headcount')
+def get_daily_headcount():
+    """Members, sessions and hours for each day (default: the last 30 days)"""
+    return stats_json('daily_headcount', 30)
+
+
+@bp.route('/api/stats/peak-hours')
+def get_peak_hours():
+    """Most members in at once during each hour of the day, peak and average (default: the last 30 days)"""
+    return stats_json('peak_hours', 30)
+
+
+@bp.route('/api/stats/streaks')
+def get_streaks():
+    """Longest and current runs of consecutive office days (default: the last 90 days)"""
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'limit must be a number.'}), 400
+    return stats_json('streaks', 90, limit=limit)
+
+
+@bp.route('/api/stats/occupancy')
+def get_occupancy():
+    """
+    Members in the office minute by minute (default: today)
+
+    interval (minutes, default 15) sets the resolution of the timeline;
+    each bucket reports the highest count within it.
+    """
+    try:
+        interval = int(request.args.get('interval', 15))
+    except ValueError:
+        interval = None
+    if interval not in INTERVALS:
+        return jsonify({
+            'success': False,
+            'message': 'interval must be one of ' + ', '.join(map(str, INTERVALS)) + ' minutes.'
+        }), 400
+    return stats_json('occupancy', 1, interval=interval)
+
+
 # ============================================
 # EXCEL EXPORT ROUTES
 # ============================================
 
-@app.route('/api/export/dtr')
-def export_dtr():
-    """Export Daily Time Record as Excel file"""
-    # Get date range parameters
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    # Default to current month if not specified
-    if not start_date:
-        today = datetime.now()
-        start_date = today.replace(day=1).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = datetime.now().strftime('%Y-%m-%d')
-    
-    start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-    end_dt = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
-    
-    # Get all attendance records in date range
-    records = Attendance.query.filter(
-        Attendance.timestamp >= start_dt,
-        Attendance.timestamp < end_dt
-    ).order_by(Attendance.timestamp).all()
-    
-    # Process records into DTR format
-    dtr_data = []
-    user_daily_records = {}  # {(user_id, date): {'time_in': ..., 'time_out': ...}}
-    
-    for record in records:
-        date_key = record.timestamp.strftime('%Y-%m-%d')
-        user_key = (record.user_id, date_key)
-        
-        if user_key not in user_daily_records:
-            user_daily_records[user_key] = {
-                'user_name': record.user.full_name,
-                'student_id': record.user.student_id,
-                'committee': record.user.committee,
-                'date': date_key,
-                'time_in': None,
-                'time_out': None
-            }
-        
-        if record.event_type == 'Time In' and not user_daily_records[user_key]['time_in']:
-            user_daily_records[user_key]['time_in'] = record.timestamp
-        elif record.event_type == 'Time Out':
-            user_daily_records[user_key]['time_out'] = record.timestamp
-    
-    # Convert to list and calculate hours
-    for key, data in user_daily_records.items():
-        time_in = data['time_in']
-        time_out = data['time_out']
-        
-        # Calculate hours rendered
-        hours_rendered = ''
-        if time_in and time_out:
-            delta = time_out - time_in
-            hours = delta.total_seconds() / 3600
-            hours_rendered = f'{hours:.2f}'
-        
-        dtr_data.append({
-            'Date': data['date'],
-            'Student ID': data['student_id'],
-            'Full Name': data['user_name'],
-            'Committee': data['committee'],
-            'Time In': time_in.strftime('%I:%M %p') if time_in else '',
-            'Time Out': time_out.strftime('%I:%M %p') if time_out else '',
-            'Total Hours Rendered': hours_rendered
-        })
+def dtr_export_params(values):
+    """
+    Read (start_date, end_date, export_format) from request values
+
+    Dates default to the current month so far. Raises ValueError with a
+    user-facing message for bad input.
+    """
+    export_format = values.get('format', 'xlsx').lower()
+    if export_format not in ('xlsx', 'csv'):
+        raise ValueError('Invalid export format.')
     
-    # Sort by date and name
-    dtr_data.sort(key=lambda x: (x['Date'], x['Full Name']))
+    today = datetime.now().date()
+    try:
+        start_date = values.get('start_date')
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else today.replace(day=1)
+        end_date = values.get('end_date')
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else today
+    except ValueError:
+        raise ValueError('Dates must be in YYYY-MM-DD format.')
     
-    # Create DataFrame
-    df = pd.DataFrame(dtr_data)
+    return start_date, end_date, export_format
+
+
+def occupancy_sheet(start_date, end_date):
+    """The Occupancy sheet that follows the DTR in Excel exports, as extra_sheets"""
+    return [('Occupancy', OCCUPANCY_COLUMNS, iter_occupancy_rows(start_date, end_date), OCCUPANCY_COLUMN_WIDTHS)]
+
+
+def dtr_filename(start_date, end_date, export_format):
+    return f'CSO_DTR_{start_date}_to_{end_date}.{export_format}'
+
+
+def roster_filename():
+    return f'CSO_Roster_{datetime.now().strftime("%Y%m%d")}.xlsx'
+
+
+def dtr_cache_key(start_date, end_date, export_format):
+    return export_cache.key('dtr', start_date, end_date, export_format, dtr_version(start_date, end_date))
+
+
+def roster_cache_key():
+    return export_cache.key('roster', roster_version())
+
+
+def job_json(job):
+    """Public view of a background job's state"""
+    progress = None
+    if job['status'] == 'done':
+        progress = 100
+    elif job['rows_total']:
+        progress = min(99, int(job['rows_done'] * 100 / job['rows_total']))
     
-    # Create Excel file in memory
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Daily Time Record', index=False)
+    return {
+        'id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'progress': progress,
+        'rows_done': job['rows_done'],
+        'rows_total': job['rows_total'],
+        'filename': job['filename'],
+        'error': job['error'],
+        'status_url': f"/api/jobs/{job['id']}",
+        'download_url': f"/api/jobs/{job['id']}/download" if job['status'] == 'done' else None
+    }
+
+
+def cached_download(cache_key, mimetype, filename):
+    """Send a cached export file, or return None if there is none"""
+    cached = export_cache.open(cache_key)
+    if cached is None:
+        return None
+    response = send_file(cached, mimetype=mimetype, as_attachment=True, download_name=filename)
+    # send_file only knows the size of files it opens itself
+    response.content_length = os.fstat(cached.fileno()).st_size
+    return response
+
+
+def queue_export(kind, filename, mimetype, cache_key, work):
+    """
+    Submit an export job and answer 202 with its state (503 when the queue is full)
+
+    cache_key() is evaluated by the job: a cached file is copied instead of
+    running work(), and a freshly built one is added to the cache.
+    """
+    def run(output, job):
+        key = cache_key()
+        cached = export_cache.open(key)
+        if cached is not None:
+            with cached:
+                shutil.copyfileobj(cached, output)
+            return
         
-        # Auto-adjust column widths
-        worksheet = writer.sheets['Daily Time Record']
-        for idx, col in enumerate(df.columns):
-            max_length = max(
-                df[col].astype(str).map(len).max() if len(df) > 0 else 0,
-                len(col)
-            ) + 2
-            worksheet.column_dimensions[chr(65 + idx)].width = max_length
+        work(output, job)
+        output.flush()
+        export_cache.put(key, output.name)
+    
+    job = export_jobs.submit(kind, filename, mimetype, run)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': 'Too many exports are in progress. Please try again shortly.'
+        }), 503
+    
+    return jsonify({'success': True, 'job': job_json(job)}), 202
+
+
+@bp.route('/api/export/dtr')
+def export_dtr():
+    """
+    Export Daily Time Record as an Excel (default) or CSV file
+
+    The file is streamed to the client while it is generated, so memory use
+    stays flat regardless of how long the date range is.
+    """
+    try:
+        start_date, end_date, export_format = dtr_export_params(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     
-    output.seek(0)
+    filename = dtr_filename(start_date, end_date, export_format)
+    mimetype = CSV_MIMETYPE if export_format == 'csv' else XLSX_MIMETYPE
+    cache_key = dtr_cache_key(start_date, end_date, export_format)
     
-    filename = f'CSO_DTR_{start_date}_to_{end_date}.xlsx'
+    cached = cached_download(cache_key, mimetype, filename)
+    if cached is not None:
+        return cached
     
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
+    try:
+        rows = iter_dtr_rows(start_date, end_date)
+    except ArchiveError as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+    
+    if export_format == 'csv':
+        body = stream_csv(DTR_COLUMNS, rows)
+    else:
+        body = stream_xlsx(
+            'Daily Time Record', DTR_COLUMNS, rows, DTR_COLUMN_WIDTHS,
+            occupancy_sheet(start_date, end_date)
+        )
+    
+    return Response(
+        stream_with_context(export_cache.tee(cache_key, body)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+
+@bp.route('/api/export/dtr', methods=['POST'])
+def queue_export_dtr():
+    """
+    Queue a Daily Time Record export as a background job
+
+    Takes the same parameters as the GET export. Returns the job, whose
+    status_url reports progress and whose download_url serves the file
+    once it is done.
+    """
+    try:
+        start_date, end_date, export_format = dtr_export_params(request.values)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    def work(output, job):
+        rows = job.track(iter_dtr_rows(start_date, end_date), count_dtr_rows(start_date, end_date))
+        write_export(
+            output, export_format, 'Daily Time Record', DTR_COLUMNS, rows, DTR_COLUMN_WIDTHS,
+            occupancy_sheet(start_date, end_date)
+        )
+    
+    return queue_export(
+        'dtr',
+        dtr_filename(start_date, end_date, export_format),
+        CSV_MIMETYPE if export_format == 'csv' else XLSX_MIMETYPE,
+        lambda: dtr_cache_key(start_date, end_date, export_format),
+        work
     )
 
 
-@app.route('/api/export/roster')
+@bp.route('/api/export/roster')
 def export_roster():
     """Export complete user roster as Excel file"""
-    users = User.query.order_by(User.committee, User.full_name).all()
-    
-    roster_data = []
-    for user in users:
-        roster_data.append({
-            'Student ID': user.student_id,
-            'Full Name': user.full_name,
-            'Committee': user.committee,
-            'Birthday': user.birthday or '',
-            'Current Status': user.status
-        })
+    cache_key = roster_cache_key()
+    cached = cached_download(cache_key, XLSX_MIMETYPE, roster_filename())
+    if cached is not None:
+        return cached
     
-    df = pd.DataFrame(roster_data)
+    body = stream_xlsx('CSO Roster', ROSTER_COLUMNS, iter_roster_rows(), ROSTER_COLUMN_WIDTHS)
     
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='CSO Roster', index=False)
-        
-        worksheet = writer.sheets['CSO Roster']
-        for idx, col in enumerate(df.columns):
-            max_length = max(
-                df[col].astype(str).map(len).max() if len(df) > 0 else 0,
-                len(col)
-            ) + 2
-            worksheet.column_dimensions[chr(65 + idx)].width = max_length
+    return Response(
+        stream_with_context(export_cache.tee(cache_key, body)),
+        mimetype=XLSX_MIMETYPE,
+        headers={'Content-Disposition': f'attachment; filename="{roster_filename()}"'}
+    )
+
+
+@bp.route('/api/export/roster', methods=['POST'])
+def queue_export_roster():
+    """Queue a roster export as a background job"""
+    def work(output, job):
+        rows = job.track(iter_roster_rows(), User.query.count())
+        write_export(output, 'xlsx', 'CSO Roster', ROSTER_COLUMNS, rows, ROSTER_COLUMN_WIDTHS)
     
-    output.seek(0)
+    return queue_export('roster', roster_filename(), XLSX_MIMETYPE, roster_cache_key, work)
+
+
+@bp.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Status and progress of a background export"""
+    job = export_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Export not found or expired.'}), 404
     
-    filename = f'CSO_Roster_{datetime.now().strftime("%Y%m%d")}.xlsx'
+    return jsonify({'success': True, 'job': job_json(job)})
+
+
+@bp.route('/api/jobs/<job_id>/download')
+def download_job(job_id):
+    """Download the file produced by a finished export"""
+    job = export_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Export not found or expired.'}), 404
+    
+    if job['status'] != 'done':
+        return jsonify({
+            'success': False,
+            'message': 'Export is not ready yet.',
+            'job': job_json(job)
+        }), 409
     
     return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        export_jobs.output_path(job_id),
+        mimetype=job['mimetype'],
         as_attachment=True,
-        download_name=filename
+        download_name=job['filename']
     )
 
 
@@ -432,10 +1369,12 @@ def export_roster():
 # DATABASE INITIALIZATION
 # ============================================
 
-def init_db():
+def init_db(app):
     """Initialize the database and create tables"""
     with app.app_context():
         db.create_all()
+        summary.ensure_built()
+        ensure_index()
         
         # Create photos directory if it doesn't exist
         os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -443,19 +1382,37 @@ def init_db():
         print("Database initialized successfully!")
 
 
+def __getattr__(name):
+    """
+    Create the default app on first use of app.app
+
+    Scripts keep using `from app import app`, while importing create_app()
+    alone (as serve.py does) builds nothing.
+    """
+    global app
+    if name == 'app':
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # ============================================
 # MAIN ENTRY POINT
 # ============================================
 
 if __name__ == '__main__':
+    # Development server - use serve.py to run the system in production
+    app = create_app()
+    
     # Initialize database
-    init_db()
+    init_db(app)
     
     # Run the application
     print("\n" + "="*50)
-    print("DLSU-D CSO Attendance System")
+    print("DLSU-D CSO Attendance System (development server)")
     print("="*50)
     print("Server running at: http://localhost:5000")
+    print("For production use: python serve.py")
     print("Press Ctrl+C to stop the server")
     print("="*50 + "\n")
     
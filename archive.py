@@ -0,0 +1,326 @@
+"""
+DLSU-D CSO Attendance System - Term Archives
+Moves closed academic terms out of the live database into per-term SQLite
+files, and lets range queries read across both through ATTACH
+
+Each archive file holds one term's attendance and daily_summary rows, plus
+the users they refer to as they were when the term was archived, so it can
+be opened, copied or backed up on its own. The live database keeps an
+archived_terms row per file. Queries for a date range attach only the
+archives that overlap it, and union their rows with the live ones.
+"""
+
+import os
+import re
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+
+from flask import current_app
+from sqlalchemy import MetaData
+from sqlalchemy.exc import IntegrityError
+
+from models import db, User, Attendance, DailySummary, ArchivedTerm
+
+# SQLite attaches at most 10 databases to one connection; keep two free for
+# building and restoring archives
+MAX_ATTACHED_TERMS = 8
+
+# Schema names archives are attached under
+TERM_SCHEMA_PREFIX = 'term_'
+BUILD_SCHEMA = 'archive_build'
+RESTORE_SCHEMA = 'archive_restore'
+
+# Table copies per schema, built once
+_schemas = {}
+
+
+class ArchiveError(ValueError):
+    """A term cannot be archived, restored or read"""
+
+
+def tables(schema=None):
+    """The users, attendance and daily_summary tables of an attached schema (None for the live ones)"""
+    if schema is None:
+        return SimpleNamespace(
+            users=User.__table__, attendance=Attendance.__table__, daily_summary=DailySummary.__table__
+        )
+
+    cached = _schemas.get(schema)
+    if cached is None:
+        metadata = MetaData()
+        cached = _schemas[schema] = SimpleNamespace(**{
+            table.name: table.to_metadata(metadata, schema=schema)
+            for table in (User.__table__, Attendance.__table__, DailySummary.__table__)
+        })
+    return cached
+
+
+def overlapping_terms(start_date, end_date):
+    """Archived terms with at least one day in the inclusive range, oldest first"""
+    return ArchivedTerm.query.filter(
+        ArchivedTerm.start_date <= end_date,
+        ArchivedTerm.end_date >= start_date
+    ).order_by(ArchivedTerm.start_date).all()
+
+
+def terms_version(start_date, end_date):
+    """Fingerprint of the archived part of a range (archives never change)"""
+    return [
+        [term.id, term.attendance_count, term.summary_count]
+        for term in overlapping_terms(start_date, end_date)
+    ]
+
+
+def archive_path(term):
+    return os.path.join(current_app.config['ARCHIVE_FOLDER'], term.filename)
+
+
+def archive_filename(name):
+    slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or 'term'
+    return f'attendance-{slug}.db'
+
+
+def attach_terms(terms):
+    """
+    Attach the archive files of terms to the session's connection
+
+    Returns their schema names. Archives stay attached to the pooled
+    connection for the next query that needs them; any others are
+    detached. Must run before the session writes anything, since SQLite
+    refuses to ATTACH inside a write transaction.
+    """
+    if len(terms) > MAX_ATTACHED_TERMS:
+        raise ArchiveError(f'A date range can span at most {MAX_ATTACHED_TERMS} archived terms.')
+
+    wanted = {}
+    for term in terms:
+        path = os.path.abspath(archive_path(term))
+        if not os.path.exists(path):
+            raise ArchiveError(f'The archive of {term.name} is missing: {path}')
+        wanted[f'{TERM_SCHEMA_PREFIX}{term.id}'] = path
+
+    connection = db.session.connection()
+    attached = {
+        name: path for _, name, path in connection.exec_driver_sql('PRAGMA database_list')
+        if name.startswith(TERM_SCHEMA_PREFIX)
+    }
+    for name, path in attached.items():
+        # A term id can come back after a restore, with a different file
+        if not same_file(path, wanted.get(name)):
+            connection.exec_driver_sql(f'DETACH DATABASE {name}')
+    for name, path in wanted.items():
+        if not same_file(attached.get(name), path):
+            connection.exec_driver_sql(f'ATTACH DATABASE ? AS {name}', (path,))
+    return list(wanted)
+
+
+def same_file(a, b):
+    return bool(a and b) and os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+
+def span(build, start_date, end_date):
+    """
+    build() run against the live tables and every archived term in the range, as one query
+
+    build gets the tables() of one schema and returns a select of the
+    range's rows; the selects are combined with UNION ALL (archived and
+    live rows never overlap). With no archived term in the range this is
+    just the live select, so the usual indexes and plans apply.
+    """
+    live = build(tables())
+    terms = overlapping_terms(start_date, end_date)
+    if not terms:
+        return live
+    return db.union_all(live, *(build(tables(schema)) for schema in attach_terms(terms)))
+
+
+def day_range(start_date, end_date):
+    """Timestamps bounding an inclusive date range"""
+    return datetime.combine(start_date, time.min), datetime.combine(end_date + timedelta(days=1), time.min)
+
+
+def archive_term(name, start_date, end_date, vacuum=False):
+    """
+    Move a closed term's attendance into its own archive file (requires an app context)
+
+    First the term's rows are copied into a new file, which is committed
+    and checked; only then are they deleted from the live database, in the
+    same transaction that records the term. (SQLite does not commit across
+    attached databases atomically in WAL mode, hence the two steps.) With
+    vacuum the live file is compacted afterwards, which blocks scans while
+    it runs.
+
+    Returns the new ArchivedTerm.
+    """
+    name = name.strip()
+    if not name:
+        raise ArchiveError('Give the term a name.')
+    if start_date > end_date:
+        raise ArchiveError('The term must start before it ends.')
+    if end_date >= date.today():
+        raise ArchiveError('Only terms that have ended can be archived.')
+    if ArchivedTerm.query.filter_by(name=name).first():
+        raise ArchiveError(f'A term named "{name}" is already archived.')
+    overlap = overlapping_terms(start_date, end_date)
+    if overlap:
+        raise ArchiveError(f'The dates overlap the archived term "{overlap[0].name}".')
+
+    filename = archive_filename(name)
+    folder = current_app.config['ARCHIVE_FOLDER']
+    path = os.path.join(folder, filename)
+    if ArchivedTerm.query.filter_by(filename=filename).first() or os.path.exists(path):
+        raise ArchiveError(f'{path} already exists; choose another name.')
+
+    start, end = day_range(start_date, end_date)
+    in_term = db.and_(Attendance.timestamp >= start, Attendance.timestamp < end)
+    days_in_term = db.and_(DailySummary.date >= start_date, DailySummary.date <= end_date)
+
+    # New ids continue from the highest one left in the table, and multiple
+    # workers follow scans by id, so the newest event has to stay live
+    newest = db.session.query(Attendance.timestamp).order_by(Attendance.id.desc()).first()
+    if newest and newest.timestamp < end:
+        raise ArchiveError('Record at least one scan after the term before archiving it.')
+    db.session.rollback()
+
+    os.makedirs(folder, exist_ok=True)
+    staging = path + '.tmp'
+    if os.path.exists(staging):
+        os.remove(staging)
+
+    with db.engine.connect() as connection:
+        # 1. Copy the term into the new file
+        connection.exec_driver_sql(f'ATTACH DATABASE ? AS {BUILD_SCHEMA}', (staging,))
+        try:
+            target = tables(BUILD_SCHEMA)
+            for table in (target.users, target.attendance, target.daily_summary):
+                table.create(connection)
+
+            events = copy_rows(connection, Attendance.__table__, target.attendance, in_term)
+            days = copy_rows(connection, DailySummary.__table__, target.daily_summary, days_in_term)
+            copy_rows(connection, User.__table__, target.users, User.id.in_(
+                db.union(db.select(target.attendance.c.user_id), db.select(target.daily_summary.c.user_id))
+            ))
+            connection.commit()
+
+            copied = connection.execute(db.select(
+                db.select(db.func.count()).select_from(target.attendance).scalar_subquery(),
+                db.select(db.func.count()).select_from(target.daily_summary).scalar_subquery()
+            )).one()
+            connection.rollback()
+            if tuple(copied) != (events, days):
+                raise ArchiveError('The archive file does not hold every row of the term.')
+        except BaseException:
+            connection.rollback()
+            connection.exec_driver_sql(f'DETACH DATABASE {BUILD_SCHEMA}')
+            os.remove(staging)
+            raise
+        connection.exec_driver_sql(f'DETACH DATABASE {BUILD_SCHEMA}')
+        connection.commit()
+        os.replace(staging, path)
+
+        # 2. Remove the copied rows from the live database and record the term
+        try:
+            removed_events = connection.execute(db.delete(Attendance.__table__).where(in_term)).rowcount
+            removed_days = connection.execute(db.delete(DailySummary.__table__).where(days_in_term)).rowcount
+            if (removed_events, removed_days) != (events, days):
+                raise ArchiveError('Attendance in the term changed while it was being archived. Nothing was removed.')
+            connection.execute(db.insert(ArchivedTerm.__table__).values(
+                name=name,
+                start_date=start_date,
+                end_date=end_date,
+                filename=filename,
+                attendance_count=events,
+                summary_count=days,
+                archived_at=datetime.utcnow()
+            ))
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            os.remove(path)
+            raise
+
+        if vacuum:
+            connection.exec_driver_sql('VACUUM')
+            # In WAL mode the compacted pages reach the file at a checkpoint
+            connection.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+            connection.commit()
+
+    return ArchivedTerm.query.filter_by(name=name).one()
+
+
+def copy_rows(connection, source, target, condition):
+    """INSERT INTO target SELECT the rows of source matching condition; returns the row count"""
+    columns = [column.name for column in source.columns]
+    return connection.execute(target.insert().from_select(
+        columns, db.select(*source.columns).where(condition)
+    )).rowcount
+
+
+def restore_term(name):
+    """
+    Move an archived term's attendance back into the live database (requires an app context)
+
+    Rows of users deleted since the term was archived are left out. Events
+    whose id has been reused by the live table get a new one. The archive
+    file is removed once the rows are back, unless another process still
+    has it open (as Windows reports for a running server), in which case
+    its path is returned as a leftover to delete later.
+
+    Returns (events restored, days restored, events skipped, leftover path or None).
+    """
+    term = ArchivedTerm.query.filter_by(name=name).first()
+    if not term:
+        raise ArchiveError(f'No archived term is named "{name}".')
+    path = archive_path(term)
+    if not os.path.exists(path):
+        raise ArchiveError(f'The archive of {term.name} is missing: {path}')
+    term_id = term.id
+    db.session.rollback()
+
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql(f'ATTACH DATABASE ? AS {RESTORE_SCHEMA}', (path,))
+        try:
+            source = tables(RESTORE_SCHEMA)
+            live_user = source.attendance.c.user_id.in_(db.select(User.id))
+            taken = connection.execute(db.select(source.attendance.c.id).where(
+                live_user, source.attendance.c.id.in_(db.select(Attendance.id))
+            )).scalars().all()
+
+            events = copy_rows(
+                connection, source.attendance, Attendance.__table__,
+                db.and_(live_user, source.attendance.c.id.not_in(db.select(Attendance.id)))
+            )
+            event_columns = [column.name for column in source.attendance.columns if column.name != 'id']
+            for i in range(0, len(taken), 500):
+                events += connection.execute(Attendance.__table__.insert().from_select(
+                    event_columns,
+                    db.select(*(source.attendance.c[column] for column in event_columns))
+                    .where(source.attendance.c.id.in_(taken[i:i + 500]))
+                    .order_by(source.attendance.c.id)
+                )).rowcount
+            days = copy_rows(
+                connection, source.daily_summary, DailySummary.__table__,
+                source.daily_summary.c.user_id.in_(db.select(User.id))
+            )
+            skipped = connection.execute(
+                db.select(db.func.count()).select_from(source.attendance)
+            ).scalar() - events
+
+            connection.execute(db.delete(ArchivedTerm.__table__).where(ArchivedTerm.id == term_id))
+            connection.commit()
+        except IntegrityError as e:
+            connection.rollback()
+            raise ArchiveError(f'Some days of {name} are already in the live database: {e.orig}') from e
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            connection.exec_driver_sql(f'DETACH DATABASE {RESTORE_SCHEMA}')
+            connection.commit()
+
+    try:
+        os.remove(path)
+        leftover = None
+    except OSError:
+        leftover = path
+    return events, days, skipped, leftover
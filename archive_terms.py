@@ -0,0 +1,91 @@
+"""
+Move closed academic terms out of the live database, or bring them back.
+
+Each archived term gets its own file in the archive/ folder, and the
+live attendance.db keeps only current data. DTR exports still cover
+archived dates: the files are attached to the query when needed.
+
+Usage:
+    python archive_terms.py archive "AY 2024-2025 Term 1" 2024-08-12 2024-12-14
+    python archive_terms.py archive "AY 2024-2025 Term 1" 2024-08-12 2024-12-14 --vacuum
+    python archive_terms.py list
+    python archive_terms.py restore "AY 2024-2025 Term 1"
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from app import app, init_db
+from archive import ArchiveError, archive_path, archive_term, restore_term
+from models import ArchivedTerm
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError('dates must be in YYYY-MM-DD format')
+
+
+def archive(args):
+    with app.app_context():
+        term = archive_term(args.name, args.start, args.end, vacuum=args.vacuum)
+        print(f"✓ Archived {term.name} ({term.start_date} to {term.end_date}): "
+              f"{term.attendance_count} event(s), {term.summary_count} day record(s)")
+        print(f"  File: {archive_path(term)}")
+
+
+def list_terms(args):
+    with app.app_context():
+        terms = ArchivedTerm.query.order_by(ArchivedTerm.start_date).all()
+        print(f"\n{'='*80}")
+        print(f"Archived Terms: {len(terms)}")
+        print(f"{'='*80}")
+        for term in terms:
+            path = archive_path(term)
+            size = f'{os.path.getsize(path) / 1024 / 1024:.1f} MB' if os.path.exists(path) else 'MISSING'
+            print(f"{term.name:<30} {term.start_date} to {term.end_date}  "
+                  f"{term.attendance_count:>8} events  {size:>9}  {term.filename}")
+        print(f"{'='*80}\n")
+
+
+def restore(args):
+    with app.app_context():
+        events, days, skipped, leftover = restore_term(args.name)
+    print(f"✓ Restored {args.name}: {events} event(s), {days} day record(s)")
+    if skipped:
+        print(f"  {skipped} event(s) of deleted users were left out")
+    if leftover:
+        print(f"  The archive file is still open elsewhere; delete it once the server is stopped: {leftover}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='DLSU-D CSO Attendance System - term archives')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    archive_parser = commands.add_parser('archive', help='move a closed term into its own file')
+    archive_parser.add_argument('name', help='term name, e.g. "AY 2024-2025 Term 1"')
+    archive_parser.add_argument('start', type=parse_date, help='first day of the term (YYYY-MM-DD)')
+    archive_parser.add_argument('end', type=parse_date, help='last day of the term (YYYY-MM-DD)')
+    archive_parser.add_argument('--vacuum', action='store_true',
+                                help='compact attendance.db afterwards (scans wait while it runs)')
+    archive_parser.set_defaults(run=archive)
+
+    commands.add_parser('list', help='show archived terms').set_defaults(run=list_terms)
+
+    restore_parser = commands.add_parser('restore', help='move an archived term back into attendance.db')
+    restore_parser.add_argument('name', help='term name as shown by list')
+    restore_parser.set_defaults(run=restore)
+
+    args = parser.parse_args()
+
+    # Make sure the tables exist
+    init_db(app)
+
+    try:
+        args.run(args)
+    except ArchiveError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
@@ -0,0 +1,120 @@
+"""
+DLSU-D CSO Attendance System - Export Cache
+Finished export files kept on disk and reused while their data is unchanged
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+
+class ArtifactCache:
+    """
+    Size-bounded, least-recently-used cache of generated files.
+
+    Keys are built from everything that determines a file's contents (the
+    export parameters and the versions of the data behind them), so an
+    entry never needs invalidating: once the data changes, the key does
+    too and the stale file simply ages out. Recency is the file's mtime,
+    which makes the cache safe to share between worker processes. Every
+    key also includes namespace (the database the files were built from),
+    so apps on different databases can share a folder without mixing up
+    their files.
+    """
+
+    def __init__(self, folder, max_bytes=256 * 1024 * 1024, namespace=None):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, *parts):
+        """Stable key for a JSON-serializable description of a file"""
+        raw = json.dumps([self.namespace, parts], sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(raw).hexdigest()
+
+    def open(self, key):
+        """
+        The cached file for key opened for reading, or None on a miss
+
+        The caller closes it. Once open it stays readable even if another
+        process evicts the entry before the caller is done with it.
+        """
+        path = self._path(key)
+        try:
+            file = open(path, 'rb')
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # Evicted since; the open file is still whole
+        with self._lock:
+            self.hits += 1
+        return file
+
+    def put(self, key, source_path):
+        """Store a copy of source_path under key and evict down to max_bytes"""
+        if self.max_bytes <= 0:
+            return
+        os.makedirs(self.folder, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as target, open(source_path, 'rb') as source:
+            shutil.copyfileobj(source, target)
+        os.replace(temp_path, self._path(key))
+        self.evict()
+
+    def tee(self, key, chunks):
+        """
+        Pass chunks (bytes or str) through, storing them under key at the end
+
+        Nothing is stored if the consumer stops early, e.g. a cancelled
+        download.
+        """
+        if self.max_bytes <= 0:
+            yield from chunks
+            return
+
+        os.makedirs(self.folder, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as target:
+                for chunk in chunks:
+                    target.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+                    yield chunk
+            os.replace(temp_path, self._path(key))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used files until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.folder):
+                if entry.name.endswith('.bin'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Being served right now (Windows); try again next time
+                    continue
+                total -= size
+
+    def _path(self, key):
+        return os.path.join(self.folder, f'{key}.bin')
@@ -0,0 +1,319 @@
+"""
+DLSU-D CSO Attendance System - Backups
+Snapshots of the live database taken with SQLite's online backup API while
+the server keeps running, compressed, rotated and integrity-checked
+
+Usage: python backup.py [--folder DIR] [--no-compress] [--keep N] [--max-age-days N]
+       python backup.py --verify FILE
+"""
+
+import argparse
+import glob
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger('cso.backup')
+
+# Snapshot names sort by the time they were taken: attendance_20250114_180000.db(.gz)
+SNAPSHOT_PREFIX = 'attendance_'
+TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
+
+# Databases not in WAL mode are copied this many pages at a time, sleeping
+# in between so writers can take the lock
+BACKUP_STEP_PAGES = 256
+BACKUP_STEP_SLEEP = 0.05
+
+# A lock file older than this was left by a process that died mid-backup
+LOCK_STALE_SECONDS = 3600
+
+# Archived terms (archive.py) are copied once, into this subfolder
+ARCHIVE_SUBFOLDER = 'archive'
+
+
+class BackupError(Exception):
+    """A snapshot could not be taken, or failed its integrity check"""
+
+
+def snapshot(source_path, target_path):
+    """
+    Copy the database at source_path into a new, checked file at target_path
+
+    In WAL mode the copy is made in one read transaction, which sees a
+    consistent state without holding up writers (a stepped copy would
+    restart every time a scan commits). Other journal modes take a read
+    lock, so the copy is made in small steps. The snapshot is switched to
+    a rollback journal so that it is a single self-contained file, and
+    must pass PRAGMA integrity_check.
+    """
+    if os.path.exists(target_path):
+        os.remove(target_path)
+
+    source = sqlite3.connect(source_path, timeout=30)
+    try:
+        wal = source.execute('PRAGMA journal_mode').fetchone()[0].lower() == 'wal'
+        target = sqlite3.connect(target_path)
+        try:
+            if wal:
+                source.backup(target)
+            else:
+                source.backup(target, pages=BACKUP_STEP_PAGES, sleep=BACKUP_STEP_SLEEP)
+            target.execute('PRAGMA journal_mode = DELETE')
+            check_integrity(target, target_path)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+
+def check_integrity(connection, label):
+    problems = [row[0] for row in connection.execute('PRAGMA integrity_check')]
+    if problems != ['ok']:
+        raise BackupError(f'{label} failed its integrity check: ' + '; '.join(problems[:5]))
+
+
+def verify(path):
+    """Integrity-check a snapshot, compressed or not; raises BackupError"""
+    if not path.endswith('.gz'):
+        connection = sqlite3.connect(f'file:{os.path.abspath(path)}?mode=ro', uri=True)
+        try:
+            check_integrity(connection, path)
+        finally:
+            connection.close()
+        return
+
+    staging = path[:-len('.gz')] + '.verify'
+    try:
+        with gzip.open(path, 'rb') as source, open(staging, 'wb') as output:
+            shutil.copyfileobj(source, output)
+        verify(staging)
+    except (OSError, EOFError) as e:
+        raise BackupError(f'{path} cannot be decompressed: {e}') from e
+    finally:
+        if os.path.exists(staging):
+            os.remove(staging)
+
+
+def backup_database(source_path, folder, compress=True, now=None):
+    """
+    Take a checked snapshot of source_path into folder and return its path
+
+    The snapshot is written under a temporary name and only renamed into
+    place once it is complete, so a snapshot file is never partial.
+    """
+    os.makedirs(folder, exist_ok=True)
+    now = now or datetime.now()
+    path = os.path.join(folder, f'{SNAPSHOT_PREFIX}{now.strftime(TIMESTAMP_FORMAT)}.db')
+    staging = path + '.tmp'
+    try:
+        snapshot(source_path, staging)
+        if compress:
+            path += '.gz'
+            with open(staging, 'rb') as source, gzip.open(path + '.tmp', 'wb', compresslevel=6) as output:
+                shutil.copyfileobj(source, output, 1024 * 1024)
+            os.replace(path + '.tmp', path)
+        else:
+            os.replace(staging, path)
+    finally:
+        for leftover in (staging, path + '.tmp'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    return path
+
+
+def list_snapshots(folder):
+    """(taken at, path) of every snapshot in folder, newest first"""
+    snapshots = []
+    for path in glob.glob(os.path.join(folder, SNAPSHOT_PREFIX + '*.db*')):
+        if not path.endswith(('.db', '.db.gz')):
+            continue  # Temporary files
+        stamp = os.path.basename(path)[len(SNAPSHOT_PREFIX):].split('.', 1)[0]
+        try:
+            snapshots.append((datetime.strptime(stamp, TIMESTAMP_FORMAT), path))
+        except ValueError:
+            continue  # Not ours, e.g. a copy renamed by hand
+    return sorted(snapshots, reverse=True)
+
+
+def rotate(folder, keep=14, max_age_days=30, now=None):
+    """
+    Delete snapshots beyond the newest keep, or older than max_age_days
+
+    Either limit can be 0 to turn it off. The newest snapshot is always
+    kept. Returns the deleted paths.
+    """
+    now = now or datetime.now()
+    removed = []
+    for index, (taken, path) in enumerate(list_snapshots(folder)):
+        too_many = keep and index >= keep
+        too_old = max_age_days and now - taken > timedelta(days=max_age_days)
+        if index > 0 and (too_many or too_old):
+            os.remove(path)
+            removed.append(path)
+    return removed
+
+
+def copy_archives(archive_folder, folder):
+    """
+    Snapshot archived term files not yet in the backup folder
+
+    Archive files never change once written, so each is copied once.
+    Returns the paths of the new copies.
+    """
+    target_folder = os.path.join(folder, ARCHIVE_SUBFOLDER)
+    copied = []
+    for source in sorted(glob.glob(os.path.join(archive_folder, 'attendance-*.db'))):
+        target = os.path.join(target_folder, os.path.basename(source))
+        if os.path.exists(target):
+            continue
+        os.makedirs(target_folder, exist_ok=True)
+        snapshot(source, target + '.tmp')
+        os.replace(target + '.tmp', target)
+        copied.append(target)
+    return copied
+
+
+class BackupScheduler:
+    """
+    Backs up the database whenever the newest snapshot is older than interval_seconds
+
+    Runs on a daemon thread in every worker process, checking once every
+    check_seconds. The schedule follows the snapshots on disk, so restarts
+    do not trigger extra backups, and a lock file in the backup folder
+    lets only one process take each backup. Each run also rotates old
+    snapshots and copies any new archived term files.
+    """
+
+    def __init__(self, source_path, folder, interval_seconds, compress=True, keep=14,
+                 max_age_days=30, archive_folder=None):
+        self.source_path = source_path
+        self.folder = folder
+        self.interval_seconds = interval_seconds
+        self.compress = compress
+        self.keep = keep
+        self.max_age_days = max_age_days
+        self.archive_folder = archive_folder
+        self.last_success = None
+        self.failures = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    def due(self):
+        snapshots = list_snapshots(self.folder)
+        return not snapshots or datetime.now() - snapshots[0][0] >= timedelta(seconds=self.interval_seconds)
+
+    def run_once(self):
+        """Back up now if due and no other process is; returns the snapshot path or None"""
+        if not self.due():
+            return None
+
+        os.makedirs(self.folder, exist_ok=True)
+        lock = os.path.join(self.folder, 'backup.lock')
+        if not self._acquire(lock):
+            return None
+        try:
+            # Another process may have finished a backup since the check
+            if not self.due():
+                return None
+            started = time.perf_counter()
+            path = backup_database(self.source_path, self.folder, compress=self.compress)
+            removed = rotate(self.folder, keep=self.keep, max_age_days=self.max_age_days)
+            if self.archive_folder:
+                copy_archives(self.archive_folder, self.folder)
+            self.last_success = time.time()
+            logger.info(
+                'Backed up to %s in %.1f s (%d old snapshot(s) removed)',
+                path, time.perf_counter() - started, len(removed)
+            )
+            return path
+        finally:
+            os.remove(lock)
+
+    def start(self, check_seconds=60):
+        """Check every check_seconds on a background thread"""
+        def run():
+            while not self._stop.wait(check_seconds):
+                try:
+                    self.run_once()
+                except Exception:
+                    self.failures += 1
+                    logger.exception('Scheduled backup failed')
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name='database-backup', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread, letting a backup in progress finish"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @staticmethod
+    def _acquire(lock):
+        for _ in range(2):
+            try:
+                os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock) < LOCK_STALE_SECONDS:
+                        return False
+                    os.remove(lock)
+                except FileNotFoundError:
+                    pass
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='DLSU-D CSO Attendance System - database backup')
+    parser.add_argument('--folder', help='where to keep snapshots (default: BACKUP_FOLDER)')
+    parser.add_argument('--no-compress', action='store_true', help='keep the snapshot as a plain .db file')
+    parser.add_argument('--keep', type=int, help='number of snapshots to keep (0: no limit)')
+    parser.add_argument('--max-age-days', type=int, help='delete snapshots older than this (0: never)')
+    parser.add_argument('--verify', metavar='FILE', help='only check an existing snapshot')
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        try:
+            verify(args.verify)
+        except BackupError as e:
+            print(f"✗ {e}")
+            return 1
+        print(f"✓ {args.verify} passed its integrity check")
+        return 0
+
+    from app import create_app, database_path
+    app = create_app()
+    source = database_path(app)
+    if source is None or not os.path.exists(source):
+        print("✗ No database file found to back up.")
+        return 1
+    folder = args.folder or app.config['BACKUP_FOLDER']
+    compress = app.config['BACKUP_COMPRESS'] and not args.no_compress
+    keep = app.config['BACKUP_KEEP'] if args.keep is None else args.keep
+    max_age_days = app.config['BACKUP_MAX_AGE_DAYS'] if args.max_age_days is None else args.max_age_days
+
+    try:
+        path = backup_database(source, folder, compress=compress)
+        copy_archives(app.config['ARCHIVE_FOLDER'], folder)
+    except (BackupError, sqlite3.Error, OSError) as e:
+        print(f"✗ Backup failed: {e}")
+        return 1
+    removed = rotate(folder, keep=keep, max_age_days=max_age_days)
+
+    print(f"✓ Backup created: {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+    if removed:
+        print(f"  {len(removed)} old snapshot(s) removed")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Benchmarks for the DLSU-D CSO Attendance System (run with python -m benchmarks.<name>)"""
@@ -0,0 +1,72 @@
+"""
+Benchmark for the occupancy timeline
+
+Seeds a throwaway database with a semester of attendance, builds the
+per-minute occupancy timeline for it with occupancy.py, checks it against
+a per-session Python loop, and reports the time taken by each step.
+
+Usage: python -m benchmarks.bench_occupancy [--days 120] [--members 400] [--sessions-per-day 150]
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from benchmarks.common import Timer, load_app, seed_history, seed_roster
+
+
+def python_timeline(sessions, start_date, days):
+    """Reference implementation: mark every minute of every closed session"""
+    counts = np.zeros(days * 1440, dtype=np.int32)
+    origin = datetime.combine(start_date, datetime.min.time())
+    for time_in, time_out in zip(sessions['time_in'], sessions['time_out']):
+        if time_in is None or time_out is None or time_in != time_in or time_out != time_out:
+            continue  # Open or orphan session (NaT)
+        first = -(-(time_in - origin) // timedelta(minutes=1))
+        last = -(-(time_out - origin) // timedelta(minutes=1))
+        counts[first:last] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, default=120)
+    parser.add_argument('--members', type=int, default=400)
+    parser.add_argument('--sessions-per-day', type=int, default=150)
+    args = parser.parse_args()
+
+    app_module = load_app()
+    seed_roster(app_module, args.members)
+    end = datetime.now() - timedelta(days=1)
+    events = seed_history(app_module, args.days, args.sessions_per_day, end=end)
+    end_date = end.date()
+    start_date = end_date - timedelta(days=args.days - 1)
+    print(f"{events} events over {args.days} days, {args.members} members")
+
+    import occupancy
+    from dtr import pair_sessions
+
+    with app_module.app.app_context():
+        with Timer() as load:
+            loaded = occupancy.load_events(start_date, end_date)
+        with Timer() as pair:
+            sessions = pair_sessions(loaded)
+        with Timer() as sweep:
+            counts = occupancy.sweep(sessions, start_date, args.days)
+        with Timer() as total:
+            occupancy.summarize(start_date, end_date)
+
+    print(f"load events         {load.elapsed:8.3f} s")
+    print(f"pair sessions       {pair.elapsed:8.3f} s")
+    print(f"sweep               {sweep.elapsed:8.3f} s  ({len(counts)} minutes, peak {counts.max()})")
+    print(f"summarize (total)   {total.elapsed:8.3f} s")
+
+    with Timer() as loop:
+        reference = python_timeline(sessions, start_date, args.days)
+    print(f"per-session loop    {loop.elapsed:8.3f} s  ({loop.elapsed / sweep.elapsed:.1f}x slower than the sweep)")
+    print("results match" if np.array_equal(counts, reference) else "RESULTS DIFFER")
+
+
+if __name__ == '__main__':
+    main()
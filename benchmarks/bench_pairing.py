@@ -0,0 +1,93 @@
+"""
+Benchmark for the vectorized DTR pairing engine
+
+Generates a synthetic event stream (several sessions per member per day,
+with some unmatched Time Ins and Time Outs), pairs it with dtr.py and with
+a straightforward per-row Python loop, checks that both agree, and reports
+the time taken by each.
+
+Usage: python -m benchmarks.bench_pairing [--events 1000000] [--users 2000]
+"""
+
+import argparse
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import Timer
+from dtr import events_to_daily
+
+
+def synthetic_events(count, users, seed=42):
+    """Roughly count events, as alternating In/Out pairs with ~2% dropped"""
+    rng = np.random.default_rng(seed)
+    pairs = count // 2
+    user_id = rng.integers(1, users + 1, pairs)
+    day = rng.integers(0, max(1, pairs // (users * 2)) + 1, pairs)
+    start = (
+        np.datetime64('2024-08-01')
+        + day.astype('timedelta64[D]')
+        + rng.integers(7 * 3600, 18 * 3600, pairs).astype('timedelta64[s]')
+    )
+    end = start + rng.integers(10 * 60, 4 * 3600, pairs).astype('timedelta64[s]')
+
+    events = pd.DataFrame({
+        'user_id': np.concatenate([user_id, user_id]),
+        'timestamp': np.concatenate([start, end]),
+        'event_type': ['Time In'] * pairs + ['Time Out'] * pairs,
+    })
+    keep = rng.random(len(events)) > 0.02
+    return events[keep].reset_index(drop=True)
+
+
+def python_daily(events):
+    """Reference implementation: one Python iteration per event"""
+    ordered = events.sort_values(['user_id', 'timestamp'], kind='stable')
+    totals = defaultdict(lambda: [0.0, 0])
+    pending = {}
+    for user_id, timestamp, event_type in ordered.itertuples(index=False):
+        key = (user_id, timestamp.date())
+        if event_type == 'Time In':
+            pending[user_id] = (key, timestamp)
+        else:
+            opened = pending.pop(user_id, None)
+            if opened and opened[0] == key:
+                totals[key][0] += (timestamp - opened[1]).total_seconds()
+                totals[key][1] += 1
+        # Anything other than the event right after a Time In breaks the pair
+        if event_type == 'Time Out':
+            pending.pop(user_id, None)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--skip-reference', action='store_true', help='only time the vectorized engine')
+    args = parser.parse_args()
+
+    events = synthetic_events(args.events, args.users)
+    print(f"{len(events)} events, {args.users} members")
+
+    with Timer() as vectorized:
+        daily = events_to_daily(events)
+    print(f"vectorized engine   {vectorized.elapsed:8.3f} s  "
+          f"({len(events) / vectorized.elapsed:,.0f} events/s, {len(daily)} user-days)")
+
+    if args.skip_reference:
+        return
+
+    with Timer() as loop:
+        reference = python_daily(events)
+    print(f"per-row Python loop {loop.elapsed:8.3f} s  ({loop.elapsed / vectorized.elapsed:.1f}x slower)")
+
+    closed = daily[daily['session_count'] > 0]
+    same_sessions = closed['session_count'].sum() == sum(n for _, n in reference.values())
+    same_seconds = np.isclose(closed['total_seconds'].sum(), sum(s for s, _ in reference.values()))
+    print("results match" if same_sessions and same_seconds else "RESULTS DIFFER")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Polling benchmark for /api/active-users and /api/users
+
+Simulates several kiosks polling a real local server, first re-downloading
+the full body every time and then revalidating with If-None-Match, and
+reports latency and response bytes for both.
+
+Usage: python -m benchmarks.bench_polling [--kiosks 10] [--polls 200] [--users 1000]
+"""
+
+import argparse
+import json
+import threading
+import urllib.error
+import urllib.request
+
+from benchmarks.common import Timer, load_app, report, seed_roster, start_server
+
+ENDPOINTS = ['/api/active-users', '/api/users']
+
+
+def kiosk(base_url, polls, conditional, latencies, sizes, lock):
+    """Poll both endpoints, optionally sending back the last ETag seen"""
+    etags = {}
+    local_latencies = []
+    local_bytes = 0
+
+    for i in range(polls):
+        path = ENDPOINTS[i % len(ENDPOINTS)]
+        request = urllib.request.Request(base_url + path)
+        if conditional and path in etags:
+            request.add_header('If-None-Match', etags[path])
+
+        with Timer() as timer:
+            try:
+                with urllib.request.urlopen(request) as response:
+                    body = response.read()
+                    etags[path] = response.headers.get('ETag')
+            except urllib.error.HTTPError as e:
+                if e.code != 304:
+                    raise
+                body = b''
+
+        local_latencies.append(timer.elapsed)
+        local_bytes += len(body)
+
+    with lock:
+        latencies.extend(local_latencies)
+        sizes.append(local_bytes)
+
+
+def scanner(base_url, student_ids, interval, stop):
+    """Scan a random member in and out every interval seconds"""
+    index = 0
+    while not stop.wait(interval):
+        data = json.dumps({'student_id': student_ids[index % len(student_ids)]}).encode()
+        request = urllib.request.Request(
+            base_url + '/api/scan', data=data, headers={'Content-Type': 'application/json'}
+        )
+        urllib.request.urlopen(request).read()
+        index += 1
+
+
+def run(base_url, student_ids, args, conditional):
+    latencies, sizes, lock = [], [], threading.Lock()
+    stop = threading.Event()
+    scan_thread = None
+    if args.scan_interval > 0:
+        scan_thread = threading.Thread(
+            target=scanner, args=(base_url, student_ids, args.scan_interval, stop), daemon=True
+        )
+        scan_thread.start()
+
+    threads = [
+        threading.Thread(target=kiosk, args=(base_url, args.polls, conditional, latencies, sizes, lock))
+        for _ in range(args.kiosks)
+    ]
+    with Timer() as timer:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    stop.set()
+    if scan_thread:
+        scan_thread.join()
+
+    label = 'conditional (If-None-Match)' if conditional else 'unconditional (full body)'
+    total_bytes = sum(sizes)
+    report(label, latencies, timer.elapsed, f'{total_bytes / 1024:>10.1f} KiB body')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--kiosks', type=int, default=10)
+    parser.add_argument('--polls', type=int, default=200, help='requests per kiosk')
+    parser.add_argument('--users', type=int, default=1000, help='roster size')
+    parser.add_argument('--online', type=float, default=0.2, help='fraction of users online')
+    parser.add_argument('--scan-interval', type=float, default=0.5,
+                        help='seconds between background scans (0 to disable)')
+    args = parser.parse_args()
+
+    app_module = load_app()
+    # The scanner cycles through the same members on purpose
+    app_module.services(app_module.app).scan_debouncer.window_seconds = 0
+    student_ids = seed_roster(app_module, args.users, online_ratio=args.online)
+    server, base_url = start_server(app_module.app)
+
+    print(f"{args.kiosks} kiosks x {args.polls} polls, {args.users} users, "
+          f"scan every {args.scan_interval}s")
+    try:
+        run(base_url, student_ids, args, conditional=False)
+        run(base_url, student_ids, args, conditional=True)
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
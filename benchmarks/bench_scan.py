@@ -0,0 +1,55 @@
+"""
+Scan throughput microbenchmark for /api/scan
+
+Drives the scan endpoint through the Flask test client with the roster
+cache disabled and then enabled, and reports scans per second.
+
+Usage: python -m benchmarks.bench_scan [--scans 5000] [--users 2000]
+"""
+
+import argparse
+import random
+
+from benchmarks.common import Timer, load_app, report, seed_roster
+
+
+def run(app_module, student_ids, scans, cache_size, label):
+    cache = app_module.services(app_module.app).roster_cache
+    cache.max_size = cache_size
+    cache.clear()
+
+    client = app_module.app.test_client()
+    rng = random.Random(7)
+    latencies = []
+
+    with Timer() as total:
+        for _ in range(scans):
+            student_id = rng.choice(student_ids)
+            with Timer() as timer:
+                response = client.post('/api/scan', json={'student_id': student_id})
+            assert response.status_code == 200, response.get_json()
+            latencies.append(timer.elapsed)
+
+    report(label, latencies, total.elapsed, f'cache hits {cache.hits}, misses {cache.misses}')
+    cache.hits = cache.misses = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scans', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=2000, help='roster size')
+    args = parser.parse_args()
+
+    app_module = load_app()
+    # Members are scanned repeatedly on purpose
+    app_module.services(app_module.app).scan_debouncer.window_seconds = 0
+    # Only a subset of the roster shows up, as at a typical event check-in
+    student_ids = seed_roster(app_module, args.users)[:max(1, args.users // 4)]
+
+    print(f"{args.scans} scans over {len(student_ids)} members ({args.users} on the roster)")
+    run(app_module, student_ids, args.scans, 0, 'roster cache off')
+    run(app_module, student_ids, args.scans, args.users, 'roster cache on')
+
+
+if __name__ == '__main__':
+    main()
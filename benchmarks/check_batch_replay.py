@@ -0,0 +1,62 @@
+"""
+Regression check: replayed offline scans follow the stored history
+
+Seeds one member who timed in at 09:00 and out at 17:00 yesterday, then
+replays queued scans from before, between and after those events through
+/api/scan/batch. Each replayed scan must toggle from the event just before
+it rather than from the member's current status, and the member's status
+must follow the latest event. Exits with code 1 on any mismatch.
+
+Usage: python -m benchmarks.check_batch_replay
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+from benchmarks.common import load_app, seed_roster
+
+
+def main():
+    app_module = load_app()
+    student_id, = seed_roster(app_module, 1)
+    from app import services
+    from models import db, Attendance, User
+
+    app = app_module.app
+    services(app).scan_debouncer.window_seconds = 0
+    day = (datetime.now() - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    with app.app_context():
+        user = User.query.filter_by(student_id=student_id).one()
+        db.session.add_all([
+            Attendance(user_id=user.id, event_type='Time In', timestamp=day.replace(hour=9)),
+            Attendance(user_id=user.id, event_type='Time Out', timestamp=day.replace(hour=17)),
+        ])
+        db.session.commit()
+        user_id = user.id
+
+    client = app.test_client()
+    checks = []
+
+    def replay(hours, expected, expected_status):
+        scans = [{'student_id': student_id, 'timestamp': day.replace(hour=hour).isoformat()} for hour in hours]
+        results = client.post('/api/scan/batch', json={'scans': scans}).get_json()['results']
+        got = [result.get('event_type') for result in results]
+        with app.app_context():
+            status = db.session.get(User, user_id).status
+        checks.append((f"scans at {', '.join(f'{hour}:00' for hour in hours)}", got == expected, got))
+        checks.append((f"  status afterwards {expected_status}", status == expected_status, status))
+
+    # Between the stored In and Out: follows the In, and the Out stays last
+    replay([12], ['Time Out'], 'Offline')
+    # Before every stored event, and after the last one
+    replay([7, 20], ['Time In', 'Time In'], 'Online')
+
+    for name, ok, got in checks:
+        print(f"{name:<40} {'ok' if ok else f'FAILED (got {got})'}")
+    ok = all(ok for _, ok, _ in checks)
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
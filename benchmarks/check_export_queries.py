@@ -0,0 +1,105 @@
+"""
+Regression check: export query counts must not grow with the data
+
+Builds two throwaway databases, a small and a large one, runs each export
+against both and counts the SQL statements it executes with a
+before_cursor_execute listener. Exports read their rows through streaming
+cursors, so the counts must be the same at both sizes; a per-row (N+1)
+query shows up as a difference and fails the check (exit code 1).
+
+Usage: python -m benchmarks.check_export_queries [--small 10] [--large 1000] [--days 20]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import event
+
+from benchmarks.common import seed_history, seed_roster
+
+
+def build_app(members, days):
+    """An app bound to a new database holding members and days of attendance"""
+    from app import create_app, db
+    from search import ensure_index
+
+    folder = tempfile.mkdtemp(prefix='cso-queries-')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(folder, 'attendance.db')}",
+        'EXPORT_CACHE_FOLDER': os.path.join(folder, 'exports'),
+        'EXPORT_JOB_FOLDER': os.path.join(folder, 'jobs'),
+        'ARCHIVE_FOLDER': os.path.join(folder, 'archive'),
+    })
+    with app.app_context():
+        db.create_all()
+        ensure_index()
+
+    # The seeding helpers only need the app
+    seeded = SimpleNamespace(app=app)
+    seed_roster(seeded, members)
+    events = seed_history(seeded, days, members, end=datetime.now() - timedelta(days=1))
+    return app, events
+
+
+def count_queries(app, path):
+    """Statements executed while answering GET path (the whole body is read)"""
+    from app import db
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = app.test_client().get(path)
+        response.get_data()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    if response.status_code != 200:
+        raise RuntimeError(f'{path} answered {response.status_code}')
+    return len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--small', type=int, default=10, help='members in the small database')
+    parser.add_argument('--large', type=int, default=1000, help='members in the large database')
+    parser.add_argument('--days', type=int, default=20, help='days of attendance in both')
+    args = parser.parse_args()
+
+    start = (datetime.now() - timedelta(days=args.days)).date().isoformat()
+    paths = [
+        f'/api/export/dtr?start_date={start}&format=xlsx',
+        f'/api/export/dtr?start_date={start}&format=csv',
+        '/api/export/roster',
+    ]
+
+    sizes = []
+    for members in (args.small, args.large):
+        app, events = build_app(members, args.days)
+        sizes.append((members, events, [count_queries(app, path) for path in paths]))
+
+    ok = True
+    (small, small_events, small_counts), (large, large_events, large_counts) = sizes
+    print(f"{'export':<44} {f'{small} members':>12} {f'{large} members':>14}")
+    print(f"{'(attendance events)':<44} {small_events:>12} {large_events:>14}")
+    for path, small_count, large_count in zip(paths, small_counts, large_counts):
+        same = small_count == large_count
+        ok = ok and same
+        print(f"{path.split('?')[0] + ' ' + path.partition('format=')[2]:<44} "
+              f"{small_count:>12} {large_count:>14}  {'' if same else 'GROWS WITH DATA'}")
+
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
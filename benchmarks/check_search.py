@@ -0,0 +1,72 @@
+"""
+Regression check: user search finds members by partial student ID
+
+Seeds a throwaway roster and searches it through /api/users, following
+every page, for fragments taken from the start, middle and end of student
+IDs and for a name prefix. Each search must return exactly the members a
+plain substring match would, as it did before the full-text index, and
+exits with code 1 otherwise.
+
+Usage: python -m benchmarks.check_search [--users 2000]
+"""
+
+import argparse
+import sys
+
+from benchmarks.common import load_app, seed_roster
+
+
+def search_all(client, search):
+    """Student IDs of every user matching search, across all pages"""
+    found, cursor = [], None
+    while True:
+        query = {'search': search, 'limit': 200}
+        if cursor:
+            query['cursor'] = cursor
+        data = client.get('/api/users', query_string=query).get_json()
+        found += [user['student_id'] for user in data['users']]
+        cursor = data.get('next_cursor')
+        if not cursor:
+            return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    args = parser.parse_args()
+
+    app_module = load_app()
+    student_ids = seed_roster(app_module, args.users)
+    import search
+    from models import User
+
+    app = app_module.app
+    with app.app_context():
+        names = {user.student_id: user.full_name for user in User.query}
+    client = app.test_client()
+
+    ok = True
+    print(f"{args.users} users, full-text index {'on' if search.fts_available else 'off'}")
+    for fragment in ['001', '0200001', '20200', student_ids[-1][-3:], '99999']:
+        expected = sorted(student_id for student_id in student_ids if fragment in student_id)
+        found = search_all(client, fragment)
+        same = sorted(found) == expected and len(found) == len(set(found))
+        ok = ok and same
+        print(f"id fragment {fragment!r:<12} {len(found):>6} found, {len(expected):>6} expected  "
+              f"{'ok' if same else 'FAILED'}")
+
+    name = names[student_ids[0]].split()[0]
+    found = search_all(client, name[:3])
+    expected = [student_id for student_id, full_name in names.items()
+                if any(word.lower().startswith(name[:3].lower()) for word in full_name.split())]
+    same = sorted(found) == sorted(expected)
+    ok = ok and same
+    print(f"name prefix {name[:3]!r:<12} {len(found):>6} found, {len(expected):>6} expected  "
+          f"{'ok' if same else 'FAILED'}")
+
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
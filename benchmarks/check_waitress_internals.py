@@ -0,0 +1,60 @@
+"""
+Regression check: the Waitress internals serve.py relies on still exist
+
+serve.py runs Waitress's event loop itself and hands event stream
+requests to the StreamWriter, which uses attributes Waitress does not
+document (server._map, server.add_task, HTTPChannel.del_channel, ...).
+requirements.txt pins the version they were written against; run this
+after changing that pin. It builds a real server, channel and request
+parser and exits with code 1 if any attribute is missing.
+
+Usage: python -m benchmarks.check_waitress_internals
+"""
+
+import socket
+import sys
+from importlib.metadata import version
+
+from flask import Flask
+from waitress import wasyncore
+from waitress.channel import HTTPChannel
+from waitress.parser import HTTPRequestParser
+from waitress.server import create_server
+
+
+def internals():
+    """(what, object, attribute names) used by serve.run_worker and serve.hand_off_streams"""
+    server = create_server(Flask(__name__), host='127.0.0.1', port=0, threads=1)
+    ours, theirs = socket.socketpair()
+    channel = HTTPChannel(server, ours, ('127.0.0.1', 0), server.adj, map={})
+    try:
+        yield 'wasyncore', wasyncore, ['loop', 'close_all', 'dispatcher']
+        yield 'wasyncore.dispatcher', wasyncore.dispatcher, ['close']
+        yield 'server', server, ['_map', 'add_task', 'adj', 'task_dispatcher']
+        yield 'server.adj', server.adj, ['asyncore_use_poll']
+        yield 'server.task_dispatcher', server.task_dispatcher, ['lock', 'queue', 'active_count', 'shutdown']
+        yield 'channel', channel, ['requests', 'total_outbufs_len', 'del_channel', 'connected', 'socket']
+        request = HTTPRequestParser(server.adj)
+        request.received(b'GET /api/events HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        yield 'request', request, ['error', 'command', 'path', 'version']
+    finally:
+        channel.close()
+        theirs.close()
+        server.close()
+        server.task_dispatcher.shutdown()
+
+
+def main():
+    print(f"waitress {version('waitress')}")
+    ok = True
+    for what, obj, names in internals():
+        missing = [name for name in names if not hasattr(obj, name)]
+        ok = ok and not missing
+        print(f"{what:<24} {'ok' if not missing else 'MISSING ' + ', '.join(missing)}")
+
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
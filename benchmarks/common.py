@@ -0,0 +1,153 @@
+"""
+Shared helpers for the benchmark scripts
+Temporary databases, synthetic data, a local server and latency reporting
+"""
+
+import logging
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+FIRST_NAMES = ['Juan', 'Maria', 'Pedro', 'Ana', 'Carlos', 'Sofia', 'Miguel', 'Isabel', 'Jose', 'Camille']
+LAST_NAMES = ['Dela Cruz', 'Santos', 'Reyes', 'Garcia', 'Mendoza', 'Bautista', 'Villanueva', 'Ramos', 'Aquino', 'Cruz']
+
+
+def load_app(db_path=None):
+    """
+    Import the Flask app bound to a throwaway SQLite database
+
+    Must be called before anything else imports app, since the database
+    location is read from DATABASE_URL at import time.
+    """
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='cso-bench-'), 'attendance.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+
+    import app as app_module
+    from search import ensure_index
+    with app_module.app.app_context():
+        app_module.db.create_all()
+        ensure_index()
+    return app_module
+
+
+def seed_roster(app_module, count, online_ratio=0.0, seed=42):
+    """Insert count synthetic users and return their student IDs"""
+    from models import db, User
+
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        rows.append({
+            'student_id': f'{20200000 + i}',
+            'full_name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}',
+            'birthday': f'{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+            'committee': rng.choice(User.COMMITTEES),
+            'status': 'Online' if rng.random() < online_ratio else 'Offline'
+        })
+
+    with app_module.app.app_context():
+        db.session.execute(User.__table__.insert(), rows)
+        db.session.commit()
+
+    return [row['student_id'] for row in rows]
+
+
+def seed_history(app_module, days, sessions_per_day, end=None, seed=42):
+    """
+    Insert days of Time In / Time Out pairs ending at end (default: today)
+
+    Each day, sessions_per_day random members attend one session between
+    7 AM and 7 PM. The daily summary behind DTR exports is rebuilt to
+    match. Returns the number of attendance rows inserted.
+    """
+    import summary
+    from models import db, User, Attendance
+
+    rng = random.Random(seed)
+    end = (end or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    with app_module.app.app_context():
+        user_ids = [row.id for row in db.session.query(User.id)]
+        rows = []
+        for day in range(days):
+            day_start = end - timedelta(days=days - 1 - day)
+            for user_id in rng.sample(user_ids, min(sessions_per_day, len(user_ids))):
+                time_in = day_start + timedelta(minutes=rng.randint(7 * 60, 15 * 60))
+                time_out = time_in + timedelta(minutes=rng.randint(30, 4 * 60))
+                rows.append({'user_id': user_id, 'timestamp': time_in, 'event_type': 'Time In'})
+                rows.append({'user_id': user_id, 'timestamp': time_out, 'event_type': 'Time Out'})
+
+            if len(rows) >= 50000:
+                db.session.execute(Attendance.__table__.insert(), rows)
+                rows = []
+
+        if rows:
+            db.session.execute(Attendance.__table__.insert(), rows)
+        db.session.commit()
+        summary.rebuild()
+        return db.session.query(Attendance).count()
+
+
+def start_server(app, threaded=True):
+    """Run the app on a free local port in a background thread"""
+    from werkzeug.serving import make_server
+
+    # Per-request access logs would dominate the output
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    server = make_server('127.0.0.1', port, app, threaded=threaded)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://127.0.0.1:{port}'
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    """Throughput and latency percentiles in milliseconds, as a dict"""
+    return {
+        'requests': len(latencies),
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def report(label, latencies, elapsed, extra=''):
+    """Print throughput and latency percentiles (latencies in seconds) and return them"""
+    stats = summarize(latencies, elapsed)
+    print(
+        f"{label:<36} {stats['requests']:>7} req  {stats['throughput']:>9.1f} req/s  "
+        f"p50 {stats['p50_ms']:>7.2f} ms  "
+        f"p95 {stats['p95_ms']:>7.2f} ms  "
+        f"p99 {stats['p99_ms']:>7.2f} ms  {extra}"
+    )
+    return stats
+
+
+class Timer:
+    """Context manager measuring wall-clock time"""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,184 @@
+"""
+Load test comparing the development server with serve.py
+
+Seeds a throwaway database, then for each server configuration starts a
+real server process on it and drives mixed kiosk and dashboard traffic
+(scans, active-user polls, user searches and pages) from many keep-alive
+client threads. Reports throughput and latency percentiles per server.
+
+Configurations are "dev" (app.run, as `python app.py` starts it) or
+WORKERSxTHREADS for serve.py, e.g. 1x16 or 2x16.
+
+Usage: python -m benchmarks.load_test [--clients 32] [--duration 10] [--configs dev 1x1 1x16 2x16]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+from benchmarks.common import FIRST_NAMES, Timer, load_app, report, seed_history, seed_roster
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEV_SERVER = (
+    "import sys; from app import create_app; "
+    "create_app().run(debug=False, host='127.0.0.1', port=int(sys.argv[1]))"
+)
+
+# (operation, weight): dashboards poll far more often than members scan
+MIX = [('active-users', 5), ('scan', 2), ('search', 2), ('users-page', 1)]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start(config, port):
+    """Start a server process for config and wait until it answers"""
+    if config == 'dev':
+        command = [sys.executable, '-c', DEV_SERVER, str(port)]
+    else:
+        workers, threads = config.split('x')
+        command = [sys.executable, 'serve.py', '--host', '127.0.0.1', '--port', str(port),
+                   '--workers', workers, '--threads', threads]
+
+    process = subprocess.Popen(
+        command, cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if sys.platform == 'win32' else 0
+    )
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/api/active-users')
+            if connection.getresponse().status == 200:
+                connection.close()
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{config} server did not start')
+
+
+def stop(process):
+    """Ask the server to stop gracefully and return how long it took"""
+    with Timer() as timer:
+        process.send_signal(signal.CTRL_BREAK_EVENT if sys.platform == 'win32' else signal.SIGINT)
+        try:
+            process.wait(60)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return timer.elapsed
+
+
+def client(port, student_ids, deadline, seed, latencies, statuses, lock):
+    """Send weighted random requests over one keep-alive connection until deadline"""
+    rng = random.Random(seed)
+    operations = [name for name, weight in MIX for _ in range(weight)]
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+
+    while time.monotonic() < deadline:
+        operation = rng.choice(operations)
+        body, headers = None, {}
+        if operation == 'scan':
+            method, path = 'POST', '/api/scan'
+            body = json.dumps({'student_id': rng.choice(student_ids)})
+            headers['Content-Type'] = 'application/json'
+        elif operation == 'search':
+            method, path = 'GET', f'/api/users?search={rng.choice(FIRST_NAMES)[:3]}&limit=8'
+        elif operation == 'users-page':
+            method, path = 'GET', '/api/users?limit=50'
+        else:
+            method, path = 'GET', '/api/active-users'
+
+        with Timer() as timer:
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                # The server closed the connection; reconnect on the next request
+                connection.close()
+                status = 'error'
+        with lock:
+            latencies[operation].append(timer.elapsed)
+            statuses[status] += 1
+
+    connection.close()
+
+
+def run(config, student_ids, clients, duration):
+    port = free_port()
+    process = start(config, port)
+
+    latencies, statuses, lock = defaultdict(list), Counter(), threading.Lock()
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=client, args=(port, student_ids, deadline, i, latencies, statuses, lock))
+        for i in range(clients)
+    ]
+    try:
+        with Timer() as timer:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        stop_seconds = stop(process)
+
+    label = 'app.run (dev server)' if config == 'dev' else f'serve.py {config}'
+    everything = [value for values in latencies.values() for value in values]
+    failed = sum(count for status, count in statuses.items() if status == 'error' or status >= 500)
+    report(label, everything, timer.elapsed,
+           f'{failed} failed, stopped in {stop_seconds:.1f}s (exit {process.returncode})')
+    for operation, _ in MIX:
+        report(f'  {operation}', latencies[operation], timer.elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32, help='concurrent client connections')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per configuration')
+    parser.add_argument('--users', type=int, default=2000, help='roster size')
+    parser.add_argument('--days', type=int, default=60, help='days of seeded history')
+    parser.add_argument('--configs', nargs='+', default=['dev', '1x1', '1x16', '2x16'])
+    args = parser.parse_args()
+
+    # The server processes inherit DATABASE_URL from load_app()
+    app_module = load_app()
+    student_ids = seed_roster(app_module, args.users, online_ratio=0.1)
+    rows = seed_history(app_module, args.days, args.users // 10)
+    with app_module.app.app_context():
+        app_module.db.engine.dispose()
+
+    scratch = tempfile.mkdtemp(prefix='cso-load-')
+    os.environ.update({
+        # Random picks repeat members quickly; measure the server, not the debounce
+        'SCAN_DEBOUNCE_SECONDS': '0',
+        'EXPORT_JOB_FOLDER': os.path.join(scratch, 'jobs'),
+        'EXPORT_CACHE_FOLDER': os.path.join(scratch, 'cache'),
+    })
+
+    print(f"{args.clients} clients for {args.duration:.0f}s per server, "
+          f"{args.users} members, {rows} attendance rows")
+    for config in args.configs:
+        run(config, student_ids, args.clients, args.duration)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Race test for Time In / Time Out toggling
+
+Many threads scan the same student ID at the same moment. With the
+debounce window enabled exactly one scan must be accepted; with it
+disabled (--no-debounce) every scan must be recorded and the stored
+events, in timestamp order, must strictly alternate Time In / Time Out,
+ending in a status that matches the last event. The daily summary kept
+up by the scans must also match one rebuilt from the events.
+
+Usage: python -m benchmarks.stress_same_id [--threads 16] [--rounds 20] [--no-debounce]
+"""
+
+import argparse
+import sys
+import threading
+from collections import Counter
+
+from benchmarks.common import Timer, load_app, seed_roster
+
+
+def hammer(app, student_id, threads, statuses):
+    """Release all threads at once against the same ID"""
+    barrier = threading.Barrier(threads)
+    lock = threading.Lock()
+
+    def worker():
+        client = app.test_client()
+        barrier.wait()
+        response = client.post('/api/scan', json={'student_id': student_id})
+        with lock:
+            statuses[response.status_code] += 1
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+
+
+def check_history(app_module):
+    """Verify that stored events alternate in time order, match the final status and the summary"""
+    import summary
+    from models import User, Attendance, DailySummary
+
+    def daily_rows():
+        return [
+            # Sums of the same sessions can differ in the last float digits
+            (row.date, row.session_count, round(row.total_seconds, 3))
+            for row in DailySummary.query.order_by(DailySummary.user_id, DailySummary.date)
+        ]
+
+    with app_module.app.app_context():
+        user = User.query.first()
+        # Pairing (dtr.py, summary.py) goes by time, so that is the order that must alternate
+        events = [
+            record.event_type for record in
+            Attendance.query.filter_by(user_id=user.id).order_by(Attendance.timestamp, Attendance.id)
+        ]
+        expected = ['Time In' if i % 2 == 0 else 'Time Out' for i in range(len(events))]
+        alternates = events == expected
+        final_status = 'Online' if len(events) % 2 else 'Offline'
+
+        incremental = daily_rows()
+        summary.rebuild()
+        summary_matches = incremental == daily_rows()
+        return len(events), alternates, user.status == final_status, summary_matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--no-debounce', action='store_true')
+    args = parser.parse_args()
+
+    app_module = load_app()
+    debouncer = app_module.services(app_module.app).scan_debouncer
+    debouncer.window_seconds = 0 if args.no_debounce else 60
+    student_id = seed_roster(app_module, 1)[0]
+
+    statuses = Counter()
+    with Timer() as timer:
+        for _ in range(args.rounds):
+            hammer(app_module.app, student_id, args.threads, statuses)
+            # Start each round with a fresh window
+            debouncer.release(1)
+
+    count, alternates, status_matches, summary_matches = check_history(app_module)
+    total = args.threads * args.rounds
+    print(f"{total} scans of one ID in {timer.elapsed:.2f}s: " +
+          ', '.join(f'HTTP {code} x{n}' for code, n in sorted(statuses.items())))
+    print(f"events stored: {count}, alternating: {alternates}, status matches last event: {status_matches}, "
+          f"summary matches rebuild: {summary_matches}")
+
+    expected = total if args.no_debounce else args.rounds
+    ok = count == expected and alternates and status_matches and summary_matches and statuses[200] == expected
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
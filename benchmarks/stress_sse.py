@@ -0,0 +1,130 @@
+"""
+Stress test for live-update streams under the production server
+
+Starts serve.py on a throwaway database with few request threads, opens
+many more event streams than there are threads, then scans members in
+and out. Every stream must be accepted and receive every presence event,
+and ordinary requests must stay fast while the streams are open.
+
+Usage: python -m benchmarks.stress_sse [--streams 60] [--threads 4] [--scans 20]
+"""
+
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import Timer, load_app, percentile, seed_roster
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/api/active-users')
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+class Stream:
+    """One raw event stream connection, counting the presence events it reads"""
+
+    def __init__(self, port):
+        self.sock = socket.create_connection(('127.0.0.1', port), timeout=30)
+        self.sock.sendall(b'GET /api/events HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n')
+        self.status = None
+        self.presence = 0
+        self.thread = threading.Thread(target=self.read, daemon=True)
+        self.thread.start()
+
+    def read(self):
+        data = b''
+        try:
+            while True:
+                chunk = self.sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+                if self.status is None and b'\r\n' in data:
+                    self.status = int(data.split(b' ', 2)[1])
+                self.presence = data.count(b'event: presence')
+        except OSError:
+            pass
+
+    def close(self):
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--streams', type=int, default=60)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--scans', type=int, default=20)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='cso-sse-'), 'attendance.db')
+    app_module = load_app(db_path)
+    student_ids = seed_roster(app_module, args.scans)
+
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', SCAN_DEBOUNCE_SECONDS='0')
+    server = subprocess.Popen(
+        [sys.executable, 'serve.py', '--host', '127.0.0.1', '--port', str(port), '--threads', str(args.threads)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_server(port)
+        streams = [Stream(port) for _ in range(args.streams)]
+        time.sleep(1)
+        accepted = sum(1 for stream in streams if stream.status == 200)
+
+        latencies = []
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        with Timer() as timer:
+            for student_id in student_ids:
+                started = time.perf_counter()
+                connection.request('POST', '/api/scan', body=f'{{"student_id": "{student_id}"}}',
+                                   headers={'Content-Type': 'application/json'})
+                connection.getresponse().read()
+                connection.request('GET', '/api/active-users')
+                connection.getresponse().read()
+                latencies.append(time.perf_counter() - started)
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and any(s.presence < args.scans for s in streams):
+            time.sleep(0.1)
+        delivered = sum(1 for stream in streams if stream.presence == args.scans)
+        for stream in streams:
+            stream.close()
+    finally:
+        server.terminate()
+        server.wait(30)
+
+    print(f"{args.streams} streams on {args.threads} request threads: {accepted} accepted, "
+          f"{delivered} received all {args.scans} presence events")
+    print(f"scan + active-users while streaming: {args.scans} in {timer.elapsed:.2f}s, "
+          f"p50 {percentile(latencies, 50) * 1000:.1f} ms, p99 {percentile(latencies, 99) * 1000:.1f} ms")
+    ok = accepted == args.streams and delivered == args.streams
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Benchmark suite for the API
+
+Seeds a synthetic roster and attendance history into a throwaway SQLite
+database, then drives the scan, active-users, user search and both export
+endpoints, first through the Flask test client (application cost alone)
+and then against a real local server with several concurrent clients.
+Reports throughput and p50/p95/p99 latency per endpoint.
+
+Save a run with --json and pass it to --compare on later runs to fail
+(exit code 1) when an endpoint got slower than the tolerance allows.
+
+Usage: python -m benchmarks.suite [--users 2000] [--days 120] [--json out.json] [--compare baseline.json]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from benchmarks.common import FIRST_NAMES, Timer, load_app, report, seed_history, seed_roster, start_server
+
+
+def scenarios(student_ids, days):
+    """Map scenario name to a function building (method, path, json body) from an rng"""
+    end = datetime.now()
+    start = end - timedelta(days=days)
+    dtr = f'/api/export/dtr?start_date={start:%Y-%m-%d}&end_date={end:%Y-%m-%d}&format='
+
+    return {
+        'scan': lambda rng: ('POST', '/api/scan', {'student_id': rng.choice(student_ids)}),
+        'active-users': lambda rng: ('GET', '/api/active-users', None),
+        'users-search': lambda rng: ('GET', f'/api/users?search={rng.choice(FIRST_NAMES)[:3]}&limit=8', None),
+        'export-dtr-csv': lambda rng: ('GET', dtr + 'csv', None),
+        'export-dtr-xlsx': lambda rng: ('GET', dtr + 'xlsx', None),
+        'export-roster': lambda rng: ('GET', '/api/export/roster', None),
+    }
+
+
+def drive_client(app, build, count):
+    """Send count requests through the test client, one at a time"""
+    client = app.test_client()
+    rng = random.Random(1)
+    latencies, failures = [], 0
+
+    with Timer() as total:
+        for _ in range(count):
+            method, path, body = build(rng)
+            with Timer() as timer:
+                response = client.open(path, method=method, json=body)
+                response.get_data()
+            latencies.append(timer.elapsed)
+            failures += response.status_code != 200
+
+    return latencies, total.elapsed, failures
+
+
+def drive_server(base_url, build, count, concurrency):
+    """Send count requests to a real server from concurrency keep-alive connections"""
+    host, port = urlsplit(base_url).hostname, urlsplit(base_url).port
+    latencies, failures, lock = [], [0], threading.Lock()
+    remaining = iter(range(count))
+
+    def worker(seed):
+        rng = random.Random(seed)
+        connection = http.client.HTTPConnection(host, port, timeout=300)
+        for _ in remaining:
+            method, path, body = build(rng)
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            data = json.dumps(body) if body is not None else None
+            with Timer() as timer:
+                try:
+                    connection.request(method, path, body=data, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    ok = response.status == 200
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    ok = False
+            with lock:
+                latencies.append(timer.elapsed)
+                failures[0] += not ok
+        connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    with Timer() as total:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    return latencies, total.elapsed, failures[0]
+
+
+def compare(results, baseline, tolerance):
+    """Return a line for every result worse than baseline by more than tolerance"""
+    regressions = []
+    for mode, by_scenario in results.items():
+        for name, current in by_scenario.items():
+            before = baseline.get(mode, {}).get(name)
+            if before is None:
+                continue
+            if current['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{mode} {name}: p95 {before['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+            if current['throughput'] < before['throughput'] * (1 - tolerance):
+                regressions.append(
+                    f"{mode} {name}: {before['throughput']:.1f} -> {current['throughput']:.1f} req/s"
+                )
+            if current['failures'] > before['failures']:
+                regressions.append(f"{mode} {name}: {before['failures']} -> {current['failures']} failures")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000, help='roster size')
+    parser.add_argument('--days', type=int, default=120, help='days of seeded history')
+    parser.add_argument('--sessions', type=int, default=300, help='attendance sessions per day')
+    parser.add_argument('--online', type=float, default=0.1, help='fraction of users online')
+    parser.add_argument('--requests', type=int, default=500, help='requests per API scenario')
+    parser.add_argument('--exports', type=int, default=3, help='requests per export scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='client connections against the server')
+    parser.add_argument('--only', nargs='+', metavar='SCENARIO', help='run only these scenarios')
+    parser.add_argument('--modes', nargs='+', choices=['client', 'server'], default=['client', 'server'])
+    parser.add_argument('--export-cache', action='store_true',
+                        help='keep the export cache on (repeated exports then measure cache hits)')
+    parser.add_argument('--json', metavar='PATH', help='write the results to a JSON file')
+    parser.add_argument('--compare', metavar='PATH', help='fail on regressions against a saved run')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown before --compare fails (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    if not args.export_cache:
+        os.environ['EXPORT_CACHE_MAX_BYTES'] = '0'
+
+    app_module = load_app()
+    # Random picks repeat members quickly; measure the endpoint, not the debounce
+    app_module.services(app_module.app).scan_debouncer.window_seconds = 0
+    student_ids = seed_roster(app_module, args.users, online_ratio=args.online)
+    rows = seed_history(app_module, args.days, min(args.sessions, args.users))
+
+    available = scenarios(student_ids, args.days)
+    names = args.only or list(available)
+    unknown = set(names) - set(available)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}; choose from {', '.join(available)}")
+
+    print(f"{args.users} members, {rows} attendance rows over {args.days} days")
+
+    results = {}
+    server = base_url = None
+    try:
+        for mode in args.modes:
+            if mode == 'server':
+                server, base_url = start_server(app_module.app)
+                print(f"\nreal server, {args.concurrency} concurrent connections")
+            else:
+                print("\ntest client")
+
+            results[mode] = {}
+            for name in names:
+                count = args.exports if name.startswith('export') else args.requests
+                if mode == 'server':
+                    latencies, elapsed, failures = drive_server(base_url, available[name], count, args.concurrency)
+                else:
+                    latencies, elapsed, failures = drive_client(app_module.app, available[name], count)
+                stats = report(name, latencies, elapsed, f'{failures} failed' if failures else '')
+                results[mode][name] = dict(stats, failures=failures)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'options': vars(args),
+                'rows': rows,
+                'results': results,
+            }, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"\nCompared with {args.compare} (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  REGRESSION {line}")
+        print("  no regressions" if not regressions else f"  {len(regressions)} regression(s)")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
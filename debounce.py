@@ -0,0 +1,48 @@
+"""
+DLSU-D CSO Attendance System - Scan Debouncing
+Ignores repeat scans of the same member within a short window
+"""
+
+import threading
+import time
+
+
+class ScanDebouncer:
+    """
+    Remembers when each user last scanned and rejects a repeat scan that
+    arrives within the window (double taps, or two kiosks at once).
+
+    The check and the update happen under one lock, so of several
+    simultaneous scans exactly one is let through. A window of 0 disables
+    debouncing.
+    """
+
+    def __init__(self, window_seconds=5.0):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._last_scan = {}  # {user_id: monotonic time of the accepted scan}
+
+    def accept(self, user_id):
+        """Return True and start a new window if the scan should be processed"""
+        if self.window_seconds <= 0:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_scan.get(user_id)
+            if last is not None and now - last < self.window_seconds:
+                return False
+            self._last_scan[user_id] = now
+
+            # Forget expired entries once in a while so the map stays small
+            if len(self._last_scan) > 1000:
+                cutoff = now - self.window_seconds
+                self._last_scan = {
+                    key: value for key, value in self._last_scan.items() if value >= cutoff
+                }
+            return True
+
+    def release(self, user_id):
+        """Forget a user's window, e.g. when their scan failed"""
+        with self._lock:
+            self._last_scan.pop(user_id, None)
@@ -74,6 +74,57 @@ def check_database():
         print(f"✗ Cannot load database: {str(e)}")
         return False
 
+# Frequent queries that should be served by an index: (description, SQL)
+HOT_QUERIES = [
+    ('DTR export date range',
+     "SELECT daily_summary.date FROM daily_summary JOIN users ON daily_summary.user_id = users.id "
+     "WHERE daily_summary.date >= '2024-01-01' AND daily_summary.date <= '2024-01-31' "
+     "ORDER BY daily_summary.date, users.full_name"),
+    ('Attendance date range',
+     "SELECT attendance.timestamp FROM attendance JOIN users ON attendance.user_id = users.id "
+     "WHERE attendance.timestamp >= '2024-01-01' AND attendance.timestamp < '2024-02-01' "
+     "ORDER BY attendance.timestamp"),
+    ("Today's attendance",
+     "SELECT timestamp, event_type FROM attendance "
+     "WHERE timestamp >= '2024-01-01' AND timestamp < '2024-01-02' ORDER BY timestamp DESC"),
+    ("User attendance history",
+     "SELECT timestamp, event_type FROM attendance WHERE user_id = 1 ORDER BY timestamp DESC"),
+    ("Online users",
+     "SELECT id FROM users WHERE status = 'Online'"),
+]
+
+def check_query_plans():
+    print_header("Checking Query Plans")
+    try:
+        from sqlalchemy import text
+        from app import app, db
+        
+        all_ok = True
+        with app.app_context():
+            for description, sql in HOT_QUERIES:
+                plan = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+                details = [row[-1] for row in plan]
+                
+                # A plain "SCAN <table>" means every row is read
+                full_scans = [
+                    detail for detail in details
+                    if detail.startswith('SCAN ') and 'INDEX' not in detail
+                ]
+                if full_scans:
+                    print(f"✗ {description} - full table scan ({full_scans[0]})")
+                    all_ok = False
+                else:
+                    print(f"✓ {description} - uses an index")
+        
+        if not all_ok:
+            print("\nTo create the missing indexes, run:")
+            print("  python migrate_database.py")
+        
+        return all_ok
+    except Exception as e:
+        print(f"✗ Cannot check query plans: {str(e)}")
+        return False
+
 def check_files():
     print_header("Checking Project Files")
     required_files = {
@@ -139,7 +190,8 @@ def run_diagnostics():
         'Project Files': check_files(),
         'Folders': check_folders(),
         'Imports': test_imports(),
-        'Database': check_database()
+        'Database': check_database(),
+        'Query Plans': check_query_plans()
     }
     
     print_header("Diagnostic Summary")
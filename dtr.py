@@ -0,0 +1,127 @@
+"""
+DLSU-D CSO Attendance System - DTR Pairing Engine
+Turns raw Time In / Time Out events into sessions and daily totals
+"""
+
+import numpy as np
+import pandas as pd
+
+EVENT_COLUMNS = ['user_id', 'timestamp', 'event_type']
+
+SESSION_COLUMNS = ['user_id', 'date', 'time_in', 'time_out', 'seconds']
+
+DAILY_COLUMNS = ['user_id', 'date', 'first_in', 'last_out', 'total_seconds', 'session_count']
+
+
+def events_frame(rows):
+    """
+    A DataFrame of EVENT_COLUMNS from (user_id, timestamp, event_type) rows
+
+    Timestamps are expected as their stored ISO text: pandas parses them in
+    bulk, which is far cheaper than converting them one row at a time.
+    """
+    events = pd.DataFrame(rows, columns=EVENT_COLUMNS)
+    events['timestamp'] = pd.to_datetime(events['timestamp'], format='ISO8601')
+    return events
+
+
+def pair_sessions(events):
+    """
+    Pair events into sessions, per user and per calendar day.
+
+    events is a DataFrame with user_id, timestamp and event_type columns, in
+    any order. A Time In immediately followed (for the same user, on the
+    same day) by a Time Out forms a closed session. A Time In without such a
+    Time Out becomes an open session (time_out is NaT), and a Time Out
+    without a preceding Time In becomes an orphan session (time_in is NaT).
+    seconds is only set for closed sessions.
+
+    All of this is done with whole-array operations: a stable sort by user
+    and time, then comparing each event with its neighbour.
+    """
+    if events.empty:
+        return pd.DataFrame(columns=SESSION_COLUMNS)
+
+    user_id = events['user_id'].to_numpy()
+    timestamp = pd.to_datetime(events['timestamp']).to_numpy()
+    is_in = (events['event_type'] == 'Time In').to_numpy()
+
+    # np.lexsort is stable and much cheaper than a multi-column sort_values
+    order = np.lexsort((timestamp.view('int64'), user_id))
+    user_id, timestamp, is_in = user_id[order], timestamp[order], is_in[order]
+    date = timestamp.astype('datetime64[D]')
+
+    # Does the next event belong to the same user on the same day?
+    same_as_next = np.zeros(len(events), dtype=bool)
+    same_as_next[:-1] = (user_id[1:] == user_id[:-1]) & (date[1:] == date[:-1])
+
+    next_is_out = np.zeros(len(events), dtype=bool)
+    next_is_out[:-1] = ~is_in[1:]
+
+    # A Time In that opens a closed session, and the Time Out that closes it
+    opens = is_in & same_as_next & next_is_out
+    closes = np.zeros(len(events), dtype=bool)
+    closes[1:] = opens[:-1]
+
+    open_ins = is_in & ~opens
+    orphan_outs = ~is_in & ~closes
+
+    closed_in = np.flatnonzero(opens)
+    closed_out = closed_in + 1
+    nat = np.full(len(events), np.datetime64('NaT'), dtype=timestamp.dtype)
+
+    sessions = pd.concat([
+        pd.DataFrame({
+            'user_id': user_id[closed_in],
+            'date': date[closed_in],
+            'time_in': timestamp[closed_in],
+            'time_out': timestamp[closed_out],
+        }),
+        pd.DataFrame({
+            'user_id': user_id[open_ins],
+            'date': date[open_ins],
+            'time_in': timestamp[open_ins],
+            'time_out': nat[open_ins],
+        }),
+        pd.DataFrame({
+            'user_id': user_id[orphan_outs],
+            'date': date[orphan_outs],
+            'time_in': nat[orphan_outs],
+            'time_out': timestamp[orphan_outs],
+        }),
+    ], ignore_index=True)
+
+    sessions['date'] = pd.to_datetime(sessions['date'])
+    sessions['seconds'] = (sessions['time_out'] - sessions['time_in']).dt.total_seconds()
+
+    order = np.lexsort((
+        sessions['time_in'].to_numpy().view('int64'),
+        sessions['date'].to_numpy().view('int64'),
+        sessions['user_id'].to_numpy(),
+    ))
+    return sessions.take(order).reset_index(drop=True)
+
+
+def daily_totals(sessions):
+    """
+    Summarize sessions per (user, day).
+
+    first_in and last_out are the earliest Time In and the latest Time Out
+    of the day (matched or not), total_seconds sums the closed sessions and
+    session_count counts them.
+    """
+    if sessions.empty:
+        return pd.DataFrame(columns=DAILY_COLUMNS)
+
+    totals = sessions.groupby(['user_id', 'date'], sort=True).agg(
+        first_in=('time_in', 'min'),
+        last_out=('time_out', 'max'),
+        total_seconds=('seconds', 'sum'),
+        session_count=('seconds', 'count'),
+    ).reset_index()
+    return totals[DAILY_COLUMNS]
+
+
+def events_to_daily(events):
+    """Shortcut for daily_totals(pair_sessions(events))"""
+    return daily_totals(pair_sessions(events))
@@ -0,0 +1,318 @@
+"""
+DLSU-D CSO Attendance System - Server-Sent Events
+Fan-out of attendance changes to open dashboards
+"""
+
+import json
+import queue
+import selectors
+import socket
+import threading
+import time
+
+# Path of the event stream, which serve.py hands to a StreamWriter
+EVENTS_PATH = '/api/events'
+
+# Sent first on every stream: how long EventSource waits before reconnecting
+RETRY_MESSAGE = 'retry: 3000\n\n'
+
+
+class EventBroadcaster:
+    """
+    Publishes events to every subscribed dashboard.
+
+    Each subscriber owns a small bounded queue. Publishing never blocks: a
+    subscriber that stops reading and lets its queue fill up is dropped, and
+    its stream ends so the browser reconnects and resynchronizes.
+    """
+
+    def __init__(self, max_subscribers=50, queue_size=100):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self, subscriber=None):
+        """
+        Register a subscriber, or return None if the limit is reached
+
+        A subscriber is a new bounded queue unless one is given; anything
+        with a put_nowait() that raises queue.Full when it falls behind will
+        do (see StreamWriter).
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            if subscriber is None:
+                subscriber = queue.Queue(maxsize=self.queue_size)
+            self._subscribers.add(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Remove a subscriber"""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event, data):
+        """Send an event to every subscriber"""
+        message = format_sse(event, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Too far behind - drop it and let the client reconnect
+                self._end(subscriber)
+
+    def close(self):
+        """End every open stream, e.g. when the server is shutting down"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            self._end(subscriber)
+
+    def _end(self, subscriber):
+        """Unsubscribe and make the subscriber's stream finish"""
+        self.unsubscribe(subscriber)
+        try:
+            subscriber.put_nowait(None)
+        except queue.Full:
+            try:
+                subscriber.get_nowait()
+                subscriber.put_nowait(None)
+            except (queue.Empty, queue.Full):
+                pass
+
+    def stream(self, subscriber, heartbeat=15, max_duration=300):
+        """
+        Yield SSE messages for one subscriber.
+
+        A comment line is sent when idle so dead connections are noticed,
+        and the stream is closed after max_duration seconds; EventSource
+        reconnects on its own, which keeps abandoned connections from
+        accumulating.
+        """
+        deadline = time.monotonic() + max_duration
+        try:
+            yield RETRY_MESSAGE
+            while time.monotonic() < deadline:
+                try:
+                    message = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+class SocketStream:
+    """A subscriber whose messages are buffered for a StreamWriter to send"""
+
+    def __init__(self, writer, sock, head, deadline):
+        self.writer = writer
+        self.sock = sock
+        self.buffer = bytearray(head + RETRY_MESSAGE.encode())
+        self.closing = False
+        self.deadline = deadline
+        self.last_write = time.monotonic()
+        self.events = 0
+
+    def put_nowait(self, message):
+        self.writer.enqueue(self, message)
+
+
+class StreamWriter:
+    """
+    Serves every open event stream from a single thread.
+
+    The production server (serve.py) hands over the socket of each event
+    stream request instead of giving it a request thread, so open
+    dashboards cost a buffer each rather than a thread. Each stream is a
+    broadcaster subscriber: published messages are appended to its buffer
+    and written out as the socket accepts them. Idle streams get a comment
+    every heartbeat seconds, a stream whose client stops reading is
+    dropped once max_buffer bytes are waiting, and every stream is closed
+    after max_duration seconds so the browser reconnects.
+    """
+
+    def __init__(self, broadcaster, heartbeat=15, max_duration=300, max_buffer=64 * 1024):
+        self.broadcaster = broadcaster
+        self.heartbeat = heartbeat
+        self.max_duration = max_duration
+        self.max_buffer = max_buffer
+        self._lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._streams = set()
+        self._adopted = []
+        self._stopping = False
+        self._thread = None
+        # Written to by other threads to wake the writer from select()
+        self._wake_read, self._wake_write = socket.socketpair()
+        for end in (self._wake_read, self._wake_write):
+            end.setblocking(False)
+        self._selector.register(self._wake_read, selectors.EVENT_READ)
+
+    def adopt(self, sock, http_version='1.1'):
+        """
+        Take over sock, whose request for the stream has been read, and stream events to it
+
+        Returns False, leaving sock alone, when the broadcaster has no room
+        for another subscriber.
+        """
+        head = (
+            f'HTTP/{http_version} 200 OK\r\n'
+            'Content-Type: text/event-stream\r\n'
+            'Cache-Control: no-cache\r\n'
+            'X-Accel-Buffering: no\r\n'
+            'Connection: close\r\n\r\n'
+        ).encode()
+        stream = SocketStream(self, sock, head, time.monotonic() + self.max_duration)
+        if self.broadcaster.subscribe(stream) is None:
+            return False
+
+        sock.setblocking(False)
+        with self._lock:
+            self._adopted.append(stream)
+        self._wake()
+        return True
+
+    def enqueue(self, stream, message):
+        """Buffer a message for stream (None ends it); called by the broadcaster"""
+        with self._lock:
+            if message is None:
+                stream.closing = True
+            elif len(stream.buffer) > self.max_buffer:
+                raise queue.Full
+            else:
+                stream.buffer += message.encode()
+        self._wake()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='event-streams', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Close every stream and stop the thread"""
+        with self._lock:
+            self._stopping = True
+        self._wake()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def stream_count(self):
+        with self._lock:
+            return len(self._streams) + len(self._adopted)
+
+    def _wake(self):
+        try:
+            self._wake_write.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass  # Already woken, or stopped
+
+    def _run(self):
+        while True:
+            with self._lock:
+                adopted, self._adopted = self._adopted, []
+                stopping = self._stopping
+            for stream in adopted:
+                self._streams.add(stream)
+                stream.events = selectors.EVENT_READ
+                self._selector.register(stream.sock, stream.events, stream)
+            if stopping:
+                break
+
+            now = time.monotonic()
+            timeout = None
+            for stream in list(self._streams):
+                with self._lock:
+                    if now >= stream.deadline:
+                        stream.closing = True
+                    elif not stream.buffer and now - stream.last_write >= self.heartbeat:
+                        stream.buffer += b': keep-alive\n\n'
+                if self._flush(stream, now):
+                    wait = max(0, min(stream.deadline, stream.last_write + self.heartbeat) - now)
+                    timeout = wait if timeout is None else min(timeout, wait)
+
+            for key, mask in self._selector.select(timeout):
+                if key.fileobj is self._wake_read:
+                    try:
+                        while self._wake_read.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                elif mask & selectors.EVENT_READ:
+                    # Clients send nothing after the request; this is a hang-up
+                    self._read(key.data)
+
+        for stream in list(self._streams):
+            self._close(stream)
+        self._selector.close()
+        self._wake_read.close()
+        self._wake_write.close()
+
+    def _flush(self, stream, now):
+        """Send what the socket takes; returns False once the stream is closed"""
+        if stream not in self._streams:
+            return False
+        with self._lock:
+            data = bytes(stream.buffer)
+        sent = 0
+        if data:
+            try:
+                sent = stream.sock.send(data)
+            except BlockingIOError:
+                pass
+            except OSError:
+                self._close(stream)
+                return False
+        with self._lock:
+            del stream.buffer[:sent]
+            remaining = len(stream.buffer)
+            closing = stream.closing
+        if sent:
+            stream.last_write = now
+        if closing and not remaining:
+            self._close(stream)
+            return False
+
+        # Wait for the socket to take more only while something is waiting
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if remaining else 0)
+        if events != stream.events:
+            stream.events = events
+            self._selector.modify(stream.sock, events, stream)
+        return True
+
+    def _read(self, stream):
+        try:
+            data = stream.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._close(stream)
+
+    def _close(self, stream):
+        if stream not in self._streams:
+            return
+        self._streams.discard(stream)
+        self.broadcaster.unsubscribe(stream)
+        self._selector.unregister(stream.sock)
+        stream.sock.close()
+
+
+def format_sse(event, data):
+    """Format a single server-sent event"""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
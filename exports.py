@@ -0,0 +1,238 @@
+"""
+DLSU-D CSO Attendance System - Export Helpers
+Streaming generators for DTR and roster exports (CSV and write-only Excel)
+"""
+
+import csv
+import tempfile
+from datetime import datetime, time, timedelta
+from io import StringIO
+
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+import archive
+from models import db, FETCH_SIZE, User, Attendance, DataVersion
+
+# Size of each chunk sent to the client when streaming a finished workbook
+CHUNK_SIZE = 64 * 1024
+
+# Files larger than this are spooled from memory onto disk while building
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Bump when the layout of an export changes, so cached files are not reused
+EXPORT_LAYOUT_VERSION = 2
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_MIMETYPE = 'text/csv'
+
+DTR_COLUMNS = [
+    'Date',
+    'Student ID',
+    'Full Name',
+    'Committee',
+    'Time In',
+    'Time Out',
+    'Sessions',
+    'Total Hours Rendered'
+]
+
+# Fixed column widths - rows are streamed, so widths cannot be measured up front
+DTR_COLUMN_WIDTHS = [12, 14, 32, 24, 10, 10, 10, 22]
+
+ROSTER_COLUMNS = ['Student ID', 'Full Name', 'Committee', 'Birthday', 'Current Status']
+
+ROSTER_COLUMN_WIDTHS = [14, 32, 24, 10, 16]
+
+# '%I:%M %p' for every minute of the day, so rows skip strftime()
+CLOCK_TIMES = [
+    f"{(minute // 60) % 12 or 12:02d}:{minute % 60:02d} {'AM' if minute < 720 else 'PM'}"
+    for minute in range(24 * 60)
+]
+
+
+def iter_dtr_rows(start_date, end_date):
+    """
+    Rows of a DTR for the given inclusive date range, as an iterator.
+
+    Rows come straight from the daily_summary table, which scans keep up to
+    date, joined to the user columns they need and read through a streaming
+    cursor - an indexed range read rather than a pass over raw events.
+    Archived terms in the range are read from their own files, with members
+    as they were when the term was archived. Archives are attached here,
+    before the first row is asked for, so a missing one fails the export
+    up front.
+    """
+    def select_days(schema):
+        days, users = schema.daily_summary, schema.users
+        return db.select(
+            days.c.date,
+            users.c.student_id,
+            users.c.full_name,
+            users.c.committee,
+            days.c.first_in,
+            days.c.last_out,
+            days.c.session_count,
+            days.c.total_seconds
+        ).join_from(days, users, days.c.user_id == users.c.id).where(
+            days.c.date >= start_date,
+            days.c.date <= end_date
+        )
+
+    statement = archive.span(select_days, start_date, end_date)
+    columns = statement.selected_columns
+    result = db.session.execute(
+        statement.order_by(columns.date, columns.full_name),
+        execution_options={'yield_per': FETCH_SIZE}
+    )
+    return format_dtr_rows(result)
+
+
+def format_dtr_rows(result):
+    for row in result:
+        hours_rendered = ''
+        if row.session_count:
+            hours_rendered = f'{row.total_seconds / 3600:.2f}'
+
+        yield [
+            row.date.isoformat(),
+            row.student_id,
+            row.full_name,
+            row.committee,
+            clock_time(row.first_in),
+            clock_time(row.last_out),
+            row.session_count,
+            hours_rendered
+        ]
+
+
+def count_dtr_rows(start_date, end_date):
+    """Number of rows iter_dtr_rows() will yield, for progress reporting"""
+    def select_days(schema):
+        days = schema.daily_summary
+        return db.select(days.c.date).where(days.c.date >= start_date, days.c.date <= end_date)
+
+    days = archive.span(select_days, start_date, end_date).subquery()
+    return db.session.query(db.func.count()).select_from(days).scalar()
+
+
+def dtr_version(start_date, end_date):
+    """
+    Fingerprint of everything a DTR export for this range depends on
+
+    The count and highest id of the range's attendance events change with
+    every scan, replayed scan or deletion inside it (but not outside it, so
+    past months keep their fingerprint), and the users version covers
+    renames and committee changes. Both come from the timestamp index.
+    Archived terms in the range are fixed, so their ids stand for them.
+    """
+    count, last_id = db.session.query(
+        db.func.count(Attendance.id), db.func.max(Attendance.id)
+    ).filter(
+        Attendance.timestamp >= datetime.combine(start_date, time.min),
+        Attendance.timestamp < datetime.combine(end_date + timedelta(days=1), time.min)
+    ).one()
+    return [
+        EXPORT_LAYOUT_VERSION, count, last_id, DataVersion.get('users'),
+        archive.terms_version(start_date, end_date)
+    ]
+
+
+def roster_version():
+    """Fingerprint of the roster: user edits, plus any scan (statuses change)"""
+    last_id = db.session.query(db.func.max(Attendance.id)).scalar()
+    return [EXPORT_LAYOUT_VERSION, last_id, DataVersion.get('users')]
+
+
+def iter_roster_rows():
+    """Yield roster rows ordered by committee, then name"""
+    query = db.session.query(
+        User.student_id,
+        User.full_name,
+        User.committee,
+        User.birthday,
+        User.status
+    ).order_by(User.committee, User.full_name).yield_per(FETCH_SIZE)
+
+    for row in query:
+        yield [row.student_id, row.full_name, row.committee, row.birthday or '', row.status]
+
+
+def clock_time(value):
+    """Format a datetime as e.g. '08:05 AM' (empty for None)"""
+    if value is None:
+        return ''
+    return CLOCK_TIMES[value.hour * 60 + value.minute]
+
+
+def stream_csv(columns, rows):
+    """Yield a CSV document line by line"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def write_csv(output, columns, rows):
+    """Write a UTF-8 CSV document to a binary file"""
+    for chunk in stream_csv(columns, rows):
+        output.write(chunk.encode('utf-8'))
+
+
+def write_xlsx(output, sheet_name, columns, rows, widths=None, extra_sheets=()):
+    """
+    Write an Excel workbook to a binary file.
+
+    The workbook is built in write-only mode, which serializes each row as
+    it is appended instead of keeping cell objects around. extra_sheets
+    are (sheet_name, columns, rows, widths) tuples written after the first
+    sheet, in order.
+    """
+    workbook = Workbook(write_only=True)
+
+    for name, sheet_columns, sheet_rows, sheet_widths in [(sheet_name, columns, rows, widths), *extra_sheets]:
+        worksheet = workbook.create_sheet(name)
+
+        # Column widths must be set before the first row is written
+        for idx, col in enumerate(sheet_columns):
+            width = sheet_widths[idx] if sheet_widths else len(col) + 2
+            worksheet.column_dimensions[get_column_letter(idx + 1)].width = width
+
+        worksheet.append(sheet_columns)
+        for row in sheet_rows:
+            worksheet.append(row)
+
+    workbook.save(output)
+
+
+def write_export(output, export_format, sheet_name, columns, rows, widths=None, extra_sheets=()):
+    """Write rows to a binary file as 'csv' or 'xlsx' (CSV has no room for extra_sheets)"""
+    if export_format == 'csv':
+        write_csv(output, columns, rows)
+    else:
+        write_xlsx(output, sheet_name, columns, rows, widths, extra_sheets)
+
+
+def stream_xlsx(sheet_name, columns, rows, widths=None, extra_sheets=()):
+    """
+    Yield an Excel workbook in chunks.
+
+    The workbook is saved to a spooled temporary file by write_xlsx() and
+    then streamed back to the client.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as output:
+        write_xlsx(output, sheet_name, columns, rows, widths, extra_sheets)
+        output.seek(0)
+        while True:
+            chunk = output.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,171 @@
+"""
+DLSU-D CSO Attendance System - Roster Import
+Bulk-adds members from a CSV or Excel sheet, validating every row at once
+"""
+
+import os
+import re
+
+import pandas as pd
+
+from models import db, User, DataVersion
+
+IMPORT_EXTENSIONS = {'csv', 'xlsx'}
+
+# Largest sheet accepted in one import
+MAX_IMPORT_ROWS = 5000
+
+REQUIRED_COLUMNS = ['student_id', 'full_name', 'committee']
+
+# Column names as shown in error messages
+LABELS = {'student_id': 'Student ID', 'full_name': 'Full Name', 'committee': 'Committee'}
+
+# Other headers accepted for each column, after normalizing (lowercase,
+# words joined by underscores); the roster export's own headers work as is
+COLUMN_ALIASES = {
+    'student_id': ['id_number', 'id', 'student_number', 'student_no', 'id_no'],
+    'full_name': ['name', 'member', 'member_name'],
+    'committee': ['committee_name'],
+    'birthday': ['birthdate', 'date_of_birth'],
+}
+
+# Limits of the users table columns
+MAX_LENGTHS = {'student_id': 20, 'full_name': 100}
+
+MONTH_DAY = re.compile(r'^(\d{1,2})[-/](\d{1,2})$')
+
+
+class InvalidImport(ValueError):
+    """The file as a whole cannot be imported (unreadable, columns missing, too large)"""
+
+
+def read_sheet(source, filename):
+    """
+    Read the first sheet of a CSV or Excel file into a DataFrame of strings
+
+    source is a path or a binary file object. Headers are normalized and
+    mapped onto the users table columns.
+    """
+    ext = os.path.splitext(filename)[1].lower().lstrip('.')
+    if ext not in IMPORT_EXTENSIONS:
+        raise InvalidImport('Upload a .csv or .xlsx file.')
+
+    try:
+        if ext == 'csv':
+            frame = pd.read_csv(source, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+        else:
+            frame = pd.read_excel(source, dtype=str, keep_default_na=False)
+    except Exception as e:
+        raise InvalidImport(f'Could not read {filename}: {e}') from e
+
+    frame.columns = [normalize_header(column) for column in frame.columns]
+    for column, aliases in COLUMN_ALIASES.items():
+        if column not in frame.columns:
+            alias = next((alias for alias in aliases if alias in frame.columns), None)
+            if alias:
+                frame = frame.rename(columns={alias: column})
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+    if missing:
+        raise InvalidImport(
+            'Missing column(s): ' + ', '.join(LABELS[column] for column in missing)
+        )
+    if len(frame) > MAX_IMPORT_ROWS:
+        raise InvalidImport(f'At most {MAX_IMPORT_ROWS} rows can be imported at once.')
+
+    if 'birthday' not in frame.columns:
+        frame['birthday'] = ''
+    return frame[REQUIRED_COLUMNS + ['birthday']]
+
+
+def normalize_header(header):
+    return re.sub(r'[^a-z0-9]+', '_', str(header).strip().lower()).strip('_')
+
+
+def import_users(frame, dry_run=False):
+    """
+    Validate every row of frame and insert the valid ones (requires an app context)
+
+    All checks run on whole columns: committees against User.COMMITTEES
+    (case-insensitive), birthdays as MM-DD (full dates are cut down to
+    MM-DD), student IDs repeated within the file, and student IDs already
+    on the roster - found with a single query. Valid rows are inserted in
+    one batch and one transaction; with dry_run nothing is written.
+
+    Returns {'total', 'valid', 'imported', 'errors'}, where each error is
+    {'row', 'student_id', 'message'} and row is the line in the sheet
+    (the header being line 1).
+    """
+    frame = frame.apply(lambda column: column.str.strip())
+    rows = pd.Series(frame.index + 2, index=frame.index)
+    errors = {}
+
+    def reject(mask, message):
+        # Keep the first problem found for each row
+        for index in frame.index[mask]:
+            errors.setdefault(index, message if isinstance(message, str) else message(index))
+
+    # Blank lines are skipped rather than reported
+    frame = frame[(frame != '').any(axis=1)].copy()
+    rows = rows[frame.index]
+
+    for column in REQUIRED_COLUMNS:
+        reject(frame[column] == '', f'{LABELS[column]} is required.')
+    for column, limit in MAX_LENGTHS.items():
+        reject(frame[column].str.len() > limit, f'{LABELS[column]} is longer than {limit} characters.')
+
+    committees = {name.lower(): name for name in User.COMMITTEES}
+    frame['committee'] = frame['committee'].str.lower().map(committees)
+    reject(frame['committee'].isna(), 'Invalid committee. Use one of: ' + ', '.join(User.COMMITTEES) + '.')
+
+    frame['birthday'] = normalize_birthdays(frame['birthday'])
+    reject(frame['birthday'].isna(), 'Birthday must be MM-DD or a date.')
+
+    first_rows = rows.groupby(frame['student_id']).transform('first')
+    repeated = frame['student_id'].duplicated(keep='first') & (frame['student_id'] != '')
+    reject(repeated, lambda index: f'Student ID also appears on row {first_rows[index]}.')
+
+    candidates = frame.loc[~frame.index.isin(list(errors)), 'student_id']
+    existing = set()
+    if len(candidates):
+        existing = set(db.session.scalars(
+            db.select(User.student_id).where(User.student_id.in_(candidates.tolist()))
+        ))
+    reject(frame['student_id'].isin(existing), 'A user with this Student ID already exists.')
+
+    valid = frame[~frame.index.isin(list(errors))]
+    records = [
+        dict(record, birthday=record['birthday'] or None, status='Offline')
+        for record in valid.to_dict('records')
+    ]
+
+    if records and not dry_run:
+        db.session.execute(User.__table__.insert(), records)
+        DataVersion.bump('users')
+        db.session.commit()
+
+    return {
+        'total': len(frame),
+        'imported': 0 if dry_run else len(records),
+        'valid': len(records),
+        'errors': [
+            {'row': int(rows[index]), 'student_id': frame.at[index, 'student_id'], 'message': message}
+            for index, message in sorted(errors.items())
+        ],
+    }
+
+
+def normalize_birthdays(values):
+    """
+    Return birthdays as 'MM-DD', '' where blank, or NaN where invalid
+
+    Accepts MM-DD (or M/D) as stored by the app, and full dates as Excel
+    gives them (e.g. '2003-05-14 00:00:00').
+    """
+    parts = values.str.extract(MONTH_DAY)
+    month_day = pd.to_datetime(
+        '2000-' + parts[0].str.zfill(2) + '-' + parts[1].str.zfill(2), format='%Y-%m-%d', errors='coerce'
+    )
+    full_date = pd.to_datetime(values.where(parts[0].isna()), errors='coerce', format='mixed')
+    parsed = month_day.fillna(full_date).dt.strftime('%m-%d')
+    return parsed.where(values != '', '')
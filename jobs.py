@@ -0,0 +1,183 @@
+"""
+DLSU-D CSO Attendance System - Background Jobs
+Runs exports on a small thread pool so they never hold up a request worker
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+# Progress is saved after this many rows
+PROGRESS_INTERVAL = 5000
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class JobQueue:
+    """
+    Bounded queue of background jobs that each produce one file.
+
+    At most max_workers jobs run at once (the rest wait their turn), and at
+    most max_pending jobs may be queued or running before submit() refuses
+    new ones. Job state is kept as a small JSON file next to the job's
+    output in folder, so any worker process can report on any job. Jobs and
+    their files are removed retention_seconds after they finish.
+    """
+
+    def __init__(self, folder, max_workers=1, max_pending=10, retention_seconds=3600):
+        self.folder = folder
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='export-job')
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def submit(self, kind, filename, mimetype, work):
+        """
+        Queue work(output, job) and return the new job's state
+
+        work is called inside an app context with a binary file to write to,
+        and may call job.track() to report progress. Returns None when the
+        queue is full.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return None
+            self._pending += 1
+
+        self.prune()
+        os.makedirs(self.folder, exist_ok=True)
+
+        job = Job(self, uuid.uuid4().hex, {
+            'kind': kind,
+            'status': 'queued',
+            'filename': filename,
+            'mimetype': mimetype,
+            'rows_done': 0,
+            'rows_total': None,
+            'error': None,
+            'created_at': time.time(),
+            'finished_at': None,
+        })
+        job.save()
+        state = dict(job.state)
+
+        app = current_app._get_current_object()
+        try:
+            self._executor.submit(self._run, app, job, work)
+        except RuntimeError:
+            # Executor already shut down
+            self._release()
+            return None
+        return state
+
+    def get(self, job_id):
+        """Current state of a job, or None if it is unknown or expired"""
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        try:
+            with open(self._state_path(job_id), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def output_path(self, job_id):
+        """Where a job's file is written"""
+        return os.path.join(self.folder, f'{job_id}.out')
+
+    def prune(self):
+        """Delete jobs that finished more than retention_seconds ago"""
+        cutoff = time.time() - self.retention_seconds
+        try:
+            names = os.listdir(self.folder)
+        except FileNotFoundError:
+            return
+
+        for name in names:
+            job_id, ext = os.path.splitext(name)
+            if ext != '.json':
+                continue
+            state = self.get(job_id)
+            finished_at = state and state.get('finished_at')
+            if finished_at and finished_at < cutoff:
+                for path in (self.output_path(job_id), self._state_path(job_id)):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs, optionally waiting for running ones"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    @property
+    def pending(self):
+        """Jobs queued or running in this process"""
+        with self._lock:
+            return self._pending
+
+    def _run(self, app, job, work):
+        try:
+            job.update(status='running')
+            with app.app_context():
+                with open(self.output_path(job.id), 'wb') as output:
+                    work(output, job)
+            job.update(status='done', finished_at=time.time())
+        except Exception as e:
+            app.logger.exception('Background job %s failed', job.id)
+            if os.path.exists(self.output_path(job.id)):
+                os.remove(self.output_path(job.id))
+            job.update(status='failed', error=str(e), finished_at=time.time())
+        finally:
+            self._release()
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _state_path(self, job_id):
+        return os.path.join(self.folder, f'{job_id}.json')
+
+
+class Job:
+    """Handle given to a running job for reporting progress"""
+
+    def __init__(self, queue, job_id, state):
+        self.queue = queue
+        self.id = job_id
+        self.state = dict(state, id=job_id)
+
+    def track(self, rows, total=None):
+        """Pass rows through unchanged, recording how many have been produced"""
+        self.update(rows_total=total)
+        done = 0
+        for row in rows:
+            yield row
+            done += 1
+            if done % PROGRESS_INTERVAL == 0:
+                self.update(rows_done=done)
+        self.update(rows_done=done)
+
+    def update(self, **changes):
+        self.state.update(changes)
+        self.save()
+
+    def save(self):
+        """Write the state file atomically, so readers never see half of it"""
+        fd, temp_path = tempfile.mkstemp(dir=self.queue.folder, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+
+        # On Windows the rename fails while a poll has the old file open
+        for attempt in range(10):
+            try:
+                os.replace(temp_path, self.queue._state_path(self.id))
+                return
+            except PermissionError:
+                time.sleep(0.05)
+        os.remove(temp_path)
@@ -9,8 +9,8 @@ import sys
 script_dir = os.path.dirname(os.path.abspath(__file__))
 os.chdir(script_dir)
 
-# Start the Flask application without showing console
+# Start the production server without showing console
 subprocess.Popen(
-    [sys.executable, 'app.py'],
+    [sys.executable, 'serve.py'],
     creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
 )
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+DLSU-D CSO Attendance System - Request Metrics
+Opt-in request timing and SQL instrumentation, rendered for Prometheus
+"""
+
+import bisect
+import logging
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from models import db
+
+logger = logging.getLogger('cso.metrics')
+
+# Histogram upper bounds, in seconds and in statements per request
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+
+class Histogram:
+    """Fixed-bucket histogram (not thread-safe; RequestMetrics holds the lock)"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """(upper bound, observations <= bound) pairs, ending with +Inf"""
+        total = 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestMetrics:
+    """
+    Per-route latency, SQL statement counts and database time for an app.
+
+    Engine events time every SQL statement. Statements run while a request
+    is being handled (including while its body streams) are charged to that
+    request; the rest (background jobs, the shared-state poller) are only
+    counted. Statement time covers execution, not fetching: for streamed
+    results (yield_per) most of the reading happens later, in the request's
+    own time. Statements slower than slow_query_seconds and requests slower
+    than slow_request_seconds are logged as warnings to 'cso.metrics'.
+
+    Requests are grouped by their URL rule (e.g. /api/users/<int:user_id>),
+    so the number of series stays small. Event streams are left out: they
+    stay open for minutes by design. Each process keeps its own numbers.
+    """
+
+    def __init__(self, slow_query_seconds=0.1, slow_request_seconds=1.0):
+        self.slow_query_seconds = slow_query_seconds
+        self.slow_request_seconds = slow_request_seconds
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._query_counts = {}
+        self._db_times = {}
+        self._responses = Counter()
+        self.background_queries = 0
+        self.slow_queries = 0
+        self.slow_requests = 0
+
+    def init_app(self, app):
+        """Hook into app's requests and its database engine"""
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def render(self, extra=()):
+        """
+        Everything in Prometheus text format
+
+        extra is a list of (name, type, help, value) samples to append,
+        for numbers owned by other parts of the app.
+        """
+        with self._lock:
+            lines = []
+            self._render_histogram(
+                lines, 'cso_http_request_duration_seconds',
+                'Time to serve a request, including streaming its body.',
+                self._durations, ('route', 'method')
+            )
+            lines += [
+                '# HELP cso_http_requests_total Responses sent, by status code.',
+                '# TYPE cso_http_requests_total counter',
+            ]
+            for (route, method, status), count in sorted(self._responses.items()):
+                lines.append(f'cso_http_requests_total{_labels(route=route, method=method, status=status)} {count}')
+            self._render_histogram(
+                lines, 'cso_db_queries_per_request',
+                'SQL statements executed per request.',
+                self._query_counts, ('route',)
+            )
+            self._render_histogram(
+                lines, 'cso_db_seconds_per_request',
+                'Time spent in SQL statements per request.',
+                self._db_times, ('route',)
+            )
+            samples = [
+                ('cso_db_background_queries_total', 'counter',
+                 'SQL statements executed outside requests.', self.background_queries),
+                ('cso_db_slow_queries_total', 'counter',
+                 'SQL statements slower than the slow query threshold.', self.slow_queries),
+                ('cso_http_slow_requests_total', 'counter',
+                 'Requests slower than the slow request threshold.', self.slow_requests),
+                ('cso_process_start_time_seconds', 'gauge',
+                 'When this process started collecting metrics.', self.started),
+            ]
+
+        for name, kind, description, value in samples + list(extra):
+            lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+    def _start_request(self):
+        g.metrics_request = {'start': time.perf_counter(), 'queries': 0, 'db_time': 0.0}
+
+    def _finish_request(self, response):
+        current = g.get('metrics_request')
+        if current is None or response.mimetype == 'text/event-stream':
+            return response
+
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        method = request.method
+        status = str(response.status_code)
+        path = request.full_path.rstrip('?')
+
+        def record():
+            duration = time.perf_counter() - current['start']
+            with self._lock:
+                self._histogram(self._durations, (route, method), DURATION_BUCKETS).observe(duration)
+                self._histogram(self._query_counts, (route,), QUERY_COUNT_BUCKETS).observe(current['queries'])
+                self._histogram(self._db_times, (route,), DURATION_BUCKETS).observe(current['db_time'])
+                self._responses[route, method, status] += 1
+                if duration > self.slow_request_seconds:
+                    self.slow_requests += 1
+            if duration > self.slow_request_seconds:
+                logger.warning(
+                    'Slow request (%.0f ms, %d queries, %.0f ms in SQL): %s %s',
+                    duration * 1000, current['queries'], current['db_time'] * 1000, method, path
+                )
+
+        if response.is_streamed and response.status_code < 400:
+            # Streamed bodies (exports) are produced after this hook returns,
+            # so record the request once the server closes the response.
+            # (Error pages also count as streamed, but are already complete.)
+            response.call_on_close(record)
+        else:
+            record()
+        return response
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_query_start'].pop()
+        current = g.get('metrics_request') if has_request_context() else None
+
+        with self._lock:
+            if current is not None:
+                current['queries'] += 1
+                current['db_time'] += elapsed
+            else:
+                self.background_queries += 1
+            if elapsed > self.slow_query_seconds:
+                self.slow_queries += 1
+
+        if elapsed > self.slow_query_seconds:
+            logger.warning('Slow query (%.0f ms): %s', elapsed * 1000, ' '.join(statement.split())[:500])
+
+    @staticmethod
+    def _histogram(table, key, buckets):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram(buckets)
+        return histogram
+
+    @staticmethod
+    def _render_histogram(lines, name, description, table, label_names):
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+        for key, histogram in sorted(table.items()):
+            labels = dict(zip(label_names, key))
+            for bound, count in histogram.cumulative():
+                lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {count}')
+            lines.append(f'{name}_sum{_labels(**labels)} {histogram.sum}')
+            lines.append(f'{name}_count{_labels(**labels)} {histogram.count}')
+
+
+def _labels(**labels):
+    """Format Prometheus labels, escaping values as the text format requires"""
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
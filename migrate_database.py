@@ -1,11 +1,22 @@
 """
 Database Migration Script
 Upgrades the old database schema to include committee and photo_filename fields
+and the indexes used by exports and attendance views
 """
 
 import sqlite3
 import os
 
+from backup import BackupError, snapshot
+
+# Indexes used by exports, attendance views and user paging: (name, table, columns)
+INDEXES = [
+    ('ix_attendance_timestamp', 'attendance', 'timestamp'),
+    ('ix_attendance_user_timestamp', 'attendance', 'user_id, timestamp'),
+    ('ix_users_status', 'users', 'status'),
+    ('ix_users_full_name', 'users', 'full_name'),
+]
+
 def migrate_database():
     db_path = 'attendance.db'
     
@@ -19,6 +30,7 @@ def migrate_database():
     print("\nThis will upgrade your database to include:")
     print("  - Committee field for each user")
     print("  - Photo filename field for profile pictures")
+    print("  - Indexes for faster attendance lookups and exports")
     print("\nYour attendance data will be preserved.")
     
     response = input("\nDo you want to continue? (yes/no): ")
@@ -30,8 +42,12 @@ def migrate_database():
     backup_path = f'attendance_backup_{int(os.path.getmtime(db_path))}.db'
     print(f"\n Creating backup: {backup_path}")
     
-    import shutil
-    shutil.copy2(db_path, backup_path)
+    try:
+        snapshot(db_path, backup_path)
+    except (BackupError, sqlite3.Error) as e:
+        print(f"✗ Backup failed: {e}")
+        print("Migration cancelled.")
+        return
     print("✓ Backup created successfully")
     
     try:
@@ -56,6 +72,8 @@ def migrate_database():
         else:
             print("\n  'photo_filename' column already exists")
         
+        create_indexes(cursor)
+        
         conn.commit()
         conn.close()
         
@@ -74,5 +92,18 @@ def migrate_database():
         print(f"  1. Delete attendance.db")
         print(f"  2. Rename {backup_path} to attendance.db")
 
+def create_indexes(cursor):
+    """Create any missing indexes (safe to run repeatedly)"""
+    for name, table, columns in INDEXES:
+        cursor.execute(f"PRAGMA index_list({table})")
+        existing = [index[1] for index in cursor.fetchall()]
+        
+        if name not in existing:
+            print(f"\n✓ Creating index '{name}'...")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+            print(f"  Index on {table}({columns}) created")
+        else:
+            print(f"\n  Index '{name}' already exists")
+
 if __name__ == '__main__':
     migrate_database()
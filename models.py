@@ -4,25 +4,64 @@ SQLAlchemy models for User and Attendance tracking
 """
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from datetime import datetime
 
+from photos import photo_urls
+
 db = SQLAlchemy()
 
+# Rows fetched from the database cursor per round trip by streaming reads
+FETCH_SIZE = 1000
+
+
+def configure_sqlite(app):
+    """
+    Apply the SQLite pragmas from the app config to every new connection
+
+    WAL lets exports and polling read while a scan is writing, and the busy
+    timeout makes concurrent writers wait for the lock instead of failing
+    with "database is locked".
+    """
+    with app.app_context():
+        engine = db.engine
+    
+    if engine.dialect.name != 'sqlite':
+        return
+    
+    pragmas = [
+        ('journal_mode', app.config['SQLITE_JOURNAL_MODE']),
+        ('synchronous', app.config['SQLITE_SYNCHRONOUS']),
+        ('busy_timeout', int(app.config['SQLITE_BUSY_TIMEOUT_MS'])),
+        # Negative values are in KiB rather than pages
+        ('cache_size', -int(app.config['SQLITE_CACHE_SIZE_KB'])),
+        ('temp_store', 'MEMORY'),
+    ]
+    
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
 class User(db.Model):
     """User model for storing student/member information"""
     __tablename__ = 'users'
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.String(20), unique=True, nullable=False)
-    full_name = db.Column(db.String(100), nullable=False)
+    full_name = db.Column(db.String(100), nullable=False, index=True)  # Paged in name order
     birthday = db.Column(db.String(5), nullable=True)  # Format: "MM-DD"
     committee = db.Column(db.String(50), nullable=False)
     photo_filename = db.Column(db.String(255), nullable=True)
-    status = db.Column(db.String(10), default='Offline')  # "Online" or "Offline"
+    status = db.Column(db.String(10), default='Offline', index=True)  # "Online" or "Offline"
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationship to attendance records
     attendance_records = db.relationship('Attendance', backref='user', lazy=True, cascade='all, delete-orphan')
+    daily_summaries = db.relationship('DailySummary', lazy=True, cascade='all, delete-orphan')
     
     # Valid committees
     COMMITTEES = [
@@ -43,6 +82,7 @@ class User(db.Model):
             'birthday': self.birthday,
             'committee': self.committee,
             'photo_filename': self.photo_filename,
+            **photo_urls(self.photo_filename),
             'status': self.status
         }
     
@@ -53,6 +93,11 @@ class User(db.Model):
 class Attendance(db.Model):
     """Attendance model for tracking time in/out events"""
     __tablename__ = 'attendance'
+    __table_args__ = (
+        # Date range scans (exports, today's records) and per-user history
+        db.Index('ix_attendance_timestamp', 'timestamp'),
+        db.Index('ix_attendance_user_timestamp', 'user_id', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -71,3 +116,86 @@ class Attendance(db.Model):
     
     def __repr__(self):
         return f'<Attendance {self.user_id}: {self.event_type} at {self.timestamp}>'
+
+
+class DailySummary(db.Model):
+    """Per-user, per-day attendance totals, kept up to date by scans"""
+    __tablename__ = 'daily_summary'
+    __table_args__ = (
+        db.Index('ix_daily_summary_date', 'date'),
+    )
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    first_in = db.Column(db.DateTime, nullable=True)   # Earliest Time In of the day
+    last_out = db.Column(db.DateTime, nullable=True)   # Latest Time Out of the day
+    total_seconds = db.Column(db.Float, nullable=False, default=0)  # Closed sessions only
+    session_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<DailySummary {self.user_id} on {self.date}: {self.session_count} sessions>'
+
+
+class DataVersion(db.Model):
+    """
+    Persistent change counters, bumped in the same transaction as the change
+
+    Unlike the in-memory ChangeTracker these survive restarts and are shared
+    by every worker process, so they can key caches kept on disk.
+    """
+    __tablename__ = 'data_versions'
+    
+    scope = db.Column(db.String(20), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    @classmethod
+    def bump(cls, scope):
+        """Increment a scope's counter inside the caller's transaction"""
+        statement = sqlite_insert(cls).values(scope=scope, version=1)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['scope'], set_={'version': cls.version + 1}
+        ))
+    
+    @classmethod
+    def get(cls, scope):
+        """Current counter of a scope (0 if it was never bumped)"""
+        return db.session.query(cls.version).filter_by(scope=scope).scalar() or 0
+    
+    def __repr__(self):
+        return f'<DataVersion {self.scope}: {self.version}>'
+
+
+class ArchivedTerm(db.Model):
+    """
+    A closed academic term whose attendance was moved to its own database file
+
+    The file (in ARCHIVE_FOLDER) holds the term's attendance and
+    daily_summary rows, plus the users they refer to as they were when
+    the term was archived. See archive.py.
+    """
+    __tablename__ = 'archived_terms'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)  # Inclusive
+    filename = db.Column(db.String(255), unique=True, nullable=False)
+    attendance_count = db.Column(db.Integer, nullable=False, default=0)
+    summary_count = db.Column(db.Integer, nullable=False, default=0)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert archived term to dictionary"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'filename': self.filename,
+            'attendance_count': self.attendance_count,
+            'summary_count': self.summary_count,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ArchivedTerm {self.name}: {self.start_date} to {self.end_date}>'
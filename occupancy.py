@@ -0,0 +1,160 @@
+"""
+DLSU-D CSO Attendance System - Occupancy Timeline
+How many members were in the office at every minute of a date range,
+computed from the Time In / Time Out events with a sweep over sorted events
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import archive
+from dtr import events_frame, pair_sessions
+from exports import CLOCK_TIMES
+from models import db
+
+MINUTES_PER_DAY = 24 * 60
+
+# Bucket sizes (in minutes) the timeline can be reported at; all divide a day
+INTERVALS = [1, 5, 10, 15, 30, 60]
+
+OCCUPANCY_COLUMNS = ['Date', 'Peak Members', 'Peak At', 'Occupied Hours', 'Member Hours'] + [
+    f"{hour % 12 or 12} {'AM' if hour < 12 else 'PM'}" for hour in range(24)
+]
+
+OCCUPANCY_COLUMN_WIDTHS = [12, 14, 10, 16, 14] + [7] * 24
+
+
+def load_events(start_date, end_date):
+    """The range's attendance events (live and archived) as a DataFrame of EVENT_COLUMNS"""
+    start, end = archive.day_range(start_date, end_date)
+
+    def select_events(schema):
+        events = schema.attendance
+        # Timestamps are read as text for events_frame()
+        return db.select(
+            events.c.user_id, db.cast(events.c.timestamp, db.String), events.c.event_type
+        ).where(events.c.timestamp >= start, events.c.timestamp < end)
+
+    return events_frame(db.session.execute(archive.span(select_events, start_date, end_date)).all())
+
+
+def sweep(sessions, start_date, days, now=None):
+    """
+    Members present at the start of every minute of days days from start_date
+
+    Each closed session adds +1 at the first minute boundary on or after
+    its Time In and -1 at the first one on or after its Time Out; the
+    running total of those changes is the occupancy. Open sessions on the
+    day of now count until now; any other open session, and Time Outs
+    without a Time In, are left out, as they are in the DTR's hours.
+    Returns an int32 array of days * 1440 counts.
+    """
+    minutes = days * MINUTES_PER_DAY
+    time_in = sessions['time_in'].to_numpy(dtype='datetime64[ns]')
+    time_out = sessions['time_out'].to_numpy(dtype='datetime64[ns]')
+
+    if now is not None:
+        now = np.datetime64(now, 'ns')
+        still_in = (
+            np.isnat(time_out) & ~np.isnat(time_in)
+            & (time_in.astype('datetime64[D]') == now.astype('datetime64[D]'))
+            & (time_in <= now)
+        )
+        time_out = np.where(still_in, now, time_out)
+
+    closed = ~np.isnat(time_in) & ~np.isnat(time_out)
+    origin = np.datetime64(start_date, 'ns')
+    one_minute = np.timedelta64(1, 'm')
+
+    def boundary(values):
+        # Index of the first minute boundary at or after each timestamp
+        return np.clip(-((origin - values[closed]) // one_minute), 0, minutes).astype(np.int64)
+
+    changes = (
+        np.bincount(boundary(time_in), minlength=minutes + 1)
+        - np.bincount(boundary(time_out), minlength=minutes + 1)
+    )
+    return np.cumsum(changes[:minutes], dtype=np.int32)
+
+
+def timeline(start_date, end_date, now=None):
+    """
+    Per-minute occupancy for an inclusive date range (requires an app context)
+
+    Returns (minute counts, as from sweep(), sessions paired).
+    """
+    sessions = pair_sessions(load_events(start_date, end_date))
+    days = (end_date - start_date).days + 1
+    return sweep(sessions, start_date, days, now), len(sessions)
+
+
+def daily_summary(counts, start_date):
+    """
+    One dict per day of a timeline: its peak, the minute it was first
+    reached, minutes with anyone in, member-minutes and the peak per hour
+    """
+    by_day = counts.reshape(-1, MINUTES_PER_DAY)
+    peaks = by_day.max(axis=1)
+    peak_at = by_day.argmax(axis=1)
+    occupied = (by_day > 0).sum(axis=1)
+    member_minutes = by_day.sum(axis=1, dtype=np.int64)
+    hourly = by_day.reshape(len(by_day), 24, 60).max(axis=2)
+
+    return [
+        {
+            'date': (start_date + timedelta(days=index)).isoformat(),
+            'peak': int(peaks[index]),
+            'peak_at': CLOCK_TIMES[peak_at[index]] if peaks[index] else None,
+            'occupied_hours': round(occupied[index] / 60, 2),
+            'member_hours': round(member_minutes[index] / 60, 2),
+            'hourly_peak': hourly[index].tolist()
+        }
+        for index in range(len(by_day))
+    ]
+
+
+def changes(counts, start_date, interval=1):
+    """
+    The timeline as [time, members] pairs, one wherever the count changes
+
+    With an interval above one minute, each bucket of that many minutes
+    reports the highest count within it.
+    """
+    if interval > 1:
+        counts = counts.reshape(-1, interval).max(axis=1)
+    if not len(counts):
+        return []
+    starts = np.flatnonzero(np.diff(counts, prepend=-1))
+    origin = datetime.combine(start_date, datetime.min.time())
+    return [
+        [(origin + timedelta(minutes=int(index) * interval)).isoformat(timespec='minutes'), int(counts[index])]
+        for index in starts
+    ]
+
+
+def summarize(start_date, end_date, interval=15, now=None):
+    """Occupancy for /api/stats/occupancy: the per-day summary and the timeline's changes"""
+    counts, sessions = timeline(start_date, end_date, now)
+    days = daily_summary(counts, start_date)
+    peak = max(days, key=lambda day: day['peak'])
+    return {
+        'interval_minutes': interval,
+        'sessions': sessions,
+        'peak': {'members': peak['peak'], 'date': peak['date'], 'at': peak['peak_at']} if peak['peak'] else None,
+        'days': days,
+        'timeline': changes(counts, start_date, interval)
+    }
+
+
+def iter_occupancy_rows(start_date, end_date):
+    """Rows of the DTR export's Occupancy sheet, one per day (closed sessions only)"""
+    counts, _ = timeline(start_date, end_date)
+    for day in daily_summary(counts, start_date):
+        yield [
+            day['date'],
+            day['peak'],
+            day['peak_at'] or '',
+            day['occupied_hours'],
+            day['member_hours']
+        ] + day['hourly_peak']
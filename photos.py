@@ -0,0 +1,155 @@
+"""
+DLSU-D CSO Attendance System - Photo Pipeline
+Stores uploaded photos under content-hashed names and makes WebP thumbnails
+"""
+
+import glob
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Square thumbnails, sized for 2x displays: small for the sidebar, search
+# results and users table (32-40px), medium for the 180px scan photo frame
+THUMBNAIL_SIZES = {
+    'small': 96,
+    'medium': 360,
+}
+
+THUMBNAIL_FOLDER = 'thumbs'
+WEBP_QUALITY = 80
+
+# Length of the content hash kept in file names
+HASH_LENGTH = 12
+
+
+class InvalidPhoto(ValueError):
+    """The upload is not an image Pillow can read"""
+
+
+def photo_urls(photo_filename):
+    """URLs of the original photo and its thumbnails (all None without a photo)"""
+    if not photo_filename:
+        return {'photo_url': None, 'photo_small_url': None, 'photo_medium_url': None}
+    return {
+        'photo_url': f'/photos/{photo_filename}',
+        'photo_small_url': f'/photos/{THUMBNAIL_FOLDER}/{thumbnail_filename(photo_filename, "small")}',
+        'photo_medium_url': f'/photos/{THUMBNAIL_FOLDER}/{thumbnail_filename(photo_filename, "medium")}',
+    }
+
+
+def thumbnail_filename(photo_filename, size):
+    """e.g. 20201234-3f2a9c0b1d4e.jpg -> 20201234-3f2a9c0b1d4e-small.webp"""
+    stem = os.path.splitext(photo_filename)[0]
+    return f'{stem}-{size}.webp'
+
+
+def save_photo(data, student_id, ext, upload_folder):
+    """
+    Store an uploaded photo and its thumbnails, returning the new file name
+
+    The name includes a hash of the contents, so a replaced photo always
+    gets a new URL and every URL can be cached forever. Raises InvalidPhoto
+    (before anything is written) if the data is not a readable image.
+    """
+    image = _open(data)
+
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    photo_filename = f'{student_id}-{digest}.{ext}'
+
+    _write_atomic(os.path.join(upload_folder, photo_filename), lambda f: f.write(data))
+    for size in THUMBNAIL_SIZES:
+        _write_thumbnail(image, size, os.path.join(
+            upload_folder, THUMBNAIL_FOLDER, thumbnail_filename(photo_filename, size)
+        ))
+
+    return photo_filename
+
+
+def delete_photo(photo_filename, upload_folder):
+    """Remove a photo and its thumbnails, ignoring files that are already gone"""
+    paths = [os.path.join(upload_folder, photo_filename)]
+    paths += [
+        os.path.join(upload_folder, THUMBNAIL_FOLDER, thumbnail_filename(photo_filename, size))
+        for size in THUMBNAIL_SIZES
+    ]
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def ensure_thumbnail(thumbnail_name, upload_folder):
+    """
+    Make sure a requested thumbnail exists, creating it from its original
+
+    Photos uploaded before thumbnails existed get theirs on first request.
+    Returns False if the name is unknown or the original cannot be read.
+    """
+    if os.path.basename(thumbnail_name) != thumbnail_name or thumbnail_name.startswith('.'):
+        return False
+
+    path = os.path.join(upload_folder, THUMBNAIL_FOLDER, thumbnail_name)
+    if os.path.exists(path):
+        return True
+
+    stem, _, extension = thumbnail_name.rpartition('.')
+    stem, _, size = stem.rpartition('-')
+    if extension != 'webp' or size not in THUMBNAIL_SIZES or not stem:
+        return False
+
+    originals = [
+        candidate for candidate in glob.glob(os.path.join(upload_folder, glob.escape(stem) + '.*'))
+        if os.path.isfile(candidate)
+    ]
+    if not originals:
+        return False
+
+    try:
+        with open(originals[0], 'rb') as f:
+            image = _open(f.read())
+    except InvalidPhoto:
+        return False
+
+    _write_thumbnail(image, size, path)
+    return True
+
+
+def _open(data):
+    """Decode image bytes, upright according to their EXIF orientation"""
+    try:
+        image = Image.open(BytesIO(data))
+        # Let JPEGs decode at a reduced scale; nothing needs more than this
+        largest = max(THUMBNAIL_SIZES.values())
+        image.draft('RGB', (largest * 2, largest * 2))
+        image.load()
+    except Image.DecompressionBombError as e:
+        # A small file can declare huge dimensions; Pillow refuses to decode it
+        raise InvalidPhoto('The uploaded image is too large.') from e
+    except (UnidentifiedImageError, OSError) as e:
+        raise InvalidPhoto('The uploaded file is not a valid image.') from e
+    return ImageOps.exif_transpose(image)
+
+
+def _write_thumbnail(image, size, path):
+    """Center-crop to a square of the given size and save as WebP"""
+    pixels = THUMBNAIL_SIZES[size]
+    mode = 'RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB'
+    thumbnail = ImageOps.fit(image.convert(mode), (pixels, pixels), Image.LANCZOS)
+    _write_atomic(path, lambda f: thumbnail.save(f, 'WEBP', quality=WEBP_QUALITY, method=4))
+
+
+def _write_atomic(path, write):
+    """Write to a temporary file and rename it, so readers never see half a file"""
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
@@ -0,0 +1,101 @@
+"""
+DLSU-D CSO Attendance System - Online Users Registry
+Process-level, in-memory view of who is currently timed in
+"""
+
+import threading
+
+from models import User
+
+
+class OnlineRegistry:
+    """
+    Thread-safe registry of online users, keyed by user id.
+
+    The database stays the source of truth: the registry is hydrated from
+    an indexed status query on first use (and therefore after every restart)
+    and is then kept in sync by the routes that change a user's status or
+    details. The grouped payload served to the sidebar is rebuilt only when
+    something changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = {}  # {user_id: user dict}
+        self._sequence = {}  # {user_id: id of the last attendance record applied}
+        self._loaded = False
+        self._snapshot = None
+
+    def load(self):
+        """(Re)load online users from the database - requires an app context"""
+        users = User.query.filter_by(status='Online').all()
+        with self._lock:
+            self._users = {user.id: user.to_dict() for user in users}
+            self._snapshot = None
+            self._loaded = True
+
+    def ensure_loaded(self):
+        """Hydrate the registry from the database if it has not been yet"""
+        if not self._loaded:
+            self.load()
+
+    def record(self, user_data, sequence):
+        """
+        Apply the status in user_data as of a given attendance record id.
+
+        Racing scans can commit in one order and reach the registry in
+        another; a record no newer than the last one applied for the same
+        user is ignored. Returns True if the registry changed.
+        """
+        user_id = user_data['id']
+        with self._lock:
+            if sequence <= self._sequence.get(user_id, 0):
+                return False
+            self._sequence[user_id] = sequence
+            if user_data['status'] == 'Online':
+                self._users[user_id] = user_data
+            elif self._users.pop(user_id, None) is None:
+                return False
+            self._snapshot = None
+            return True
+
+    def set_offline(self, user_id):
+        """Record a user as offline - returns True if they were online"""
+        with self._lock:
+            if self._users.pop(user_id, None) is None:
+                return False
+            self._snapshot = None
+            return True
+
+    def update(self, user_data):
+        """Refresh the details of a user if they are currently online"""
+        with self._lock:
+            if user_data['id'] not in self._users:
+                return False
+            self._users[user_data['id']] = user_data
+            self._snapshot = None
+            return True
+
+    def is_online(self, user_id):
+        """Whether a user is currently timed in"""
+        with self._lock:
+            return user_id in self._users
+
+    @property
+    def count(self):
+        with self._lock:
+            return len(self._users)
+
+    def snapshot(self):
+        """Return online users grouped by committee, plus the total count"""
+        with self._lock:
+            if self._snapshot is None:
+                grouped = {committee: [] for committee in User.COMMITTEES}
+                for user_data in self._users.values():
+                    if user_data['committee'] in grouped:
+                        grouped[user_data['committee']].append(user_data)
+                self._snapshot = {
+                    'active_users': grouped,
+                    'total_count': len(self._users)
+                }
+            return self._snapshot
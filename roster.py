@@ -0,0 +1,56 @@
+"""
+DLSU-D CSO Attendance System - Roster Cache
+Bounded in-process student ID -> user lookup for the scan hot path
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class RosterCache:
+    """
+    Least-recently-used cache of user details keyed by student ID.
+
+    Entries are plain dicts from User.to_dict() and must be treated as
+    read-only. Status is deliberately not trusted from the cache since it
+    changes on every scan. Routes that change or remove a user invalidate
+    that user's entry; a max_size of 0 disables caching entirely.
+    """
+
+    def __init__(self, max_size=5000):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, student_id):
+        """Return the cached user dict, or None on a miss"""
+        with self._lock:
+            user_data = self._entries.get(student_id)
+            if user_data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(student_id)
+            self.hits += 1
+            return user_data
+
+    def put(self, student_id, user_data):
+        """Cache a user dict, evicting the least recently used entry if full"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[student_id] = user_data
+            self._entries.move_to_end(student_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, student_id):
+        """Drop a single entry"""
+        with self._lock:
+            self._entries.pop(student_id, None)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,170 @@
+"""
+DLSU-D CSO Attendance System - User Search
+Full-text index over names and student IDs, and keyset-paginated queries
+"""
+
+import base64
+import json
+import re
+
+from sqlalchemy.exc import OperationalError
+
+from models import db, User
+
+# FTS5 table mirroring users.student_id and users.full_name. It stores no
+# copy of the text (content='users'), and triggers keep it in sync with
+# every insert, delete and rename - including bulk or raw SQL writes.
+# Status flips on scans do not touch it.
+FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        student_id, full_name,
+        content='users', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(rowid, student_id, full_name)
+        VALUES (new.id, new.student_id, new.full_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, student_id, full_name)
+        VALUES ('delete', old.id, old.student_id, old.full_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF student_id, full_name ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, student_id, full_name)
+        VALUES ('delete', old.id, old.student_id, old.full_name);
+        INSERT INTO users_fts(rowid, student_id, full_name)
+        VALUES (new.id, new.student_id, new.full_name);
+    END
+    """,
+]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Set by ensure_index(); searches fall back to LIKE when FTS5 is missing
+fts_available = False
+
+
+def ensure_index():
+    """
+    Create the search index and its triggers if needed (requires an app context)
+
+    A newly created index is filled from the users table. Returns False
+    when this SQLite build has no FTS5 support.
+    """
+    global fts_available
+
+    if db.engine.dialect.name != 'sqlite':
+        fts_available = False
+        return False
+
+    exists = db.session.execute(db.text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users_fts'"
+    )).first() is not None
+
+    try:
+        for statement in FTS_SCHEMA:
+            db.session.execute(db.text(statement))
+        if not exists:
+            rebuild_index()
+        db.session.commit()
+    except OperationalError:
+        # e.g. "no such module: fts5"
+        db.session.rollback()
+        fts_available = False
+        return False
+
+    fts_available = True
+    return True
+
+
+def rebuild_index():
+    """Re-read every user into the search index"""
+    db.session.execute(db.text("INSERT INTO users_fts(users_fts) VALUES ('rebuild')"))
+
+
+def match_expression(search):
+    """
+    Turn free text into an FTS5 query: every word must match as a prefix
+
+    Words are quoted, so FTS5 operators typed by the user are taken
+    literally. Returns None when the text has no searchable words.
+    """
+    words = re.findall(r'\w+', search)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def encode_cursor(user):
+    """Opaque cursor pointing just after the given user in name order"""
+    raw = json.dumps([user.full_name, user.id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor(); raises ValueError for anything malformed"""
+    try:
+        full_name, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception as e:
+        raise ValueError('Invalid cursor.') from e
+    if not isinstance(full_name, str) or not isinstance(user_id, int):
+        raise ValueError('Invalid cursor.')
+    return full_name, user_id
+
+
+def search_users(search='', limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """
+    One page of users ordered by name, optionally filtered by a search
+
+    Pages are keyset-based (name, id) so each one costs the same no matter
+    how deep it is, and rows added or removed between pages never cause
+    skips or repeats. Returns (users, next_cursor); next_cursor is None on
+    the last page.
+    """
+    query = User.query
+
+    search = search.strip()
+    if search:
+        match = match_expression(search)
+        if fts_available:
+            # The index only matches word prefixes, so partial student IDs
+            # ("001" for 2021001) still need a substring match
+            by_id = User.student_id.contains(search)
+            if match is None:
+                query = query.filter(by_id)
+            else:
+                matches = db.text(
+                    'SELECT rowid FROM users_fts WHERE users_fts MATCH :match'
+                ).bindparams(match=match).columns(db.column('rowid', db.Integer))
+                query = query.filter(User.id.in_(matches) | by_id)
+        else:
+            query = query.filter(
+                (User.student_id.contains(search)) |
+                (User.full_name.ilike(f'%{search}%'))
+            )
+
+    if cursor:
+        full_name, user_id = decode_cursor(cursor)
+        query = query.filter(db.or_(
+            User.full_name > full_name,
+            db.and_(User.full_name == full_name, User.id > user_id)
+        ))
+
+    # Fetch one extra row to learn whether another page follows
+    users = query.order_by(User.full_name, User.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1])
+
+    return users, next_cursor
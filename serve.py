@@ -0,0 +1,221 @@
+"""
+DLSU-D CSO Attendance System - Production Server
+Serves the app with Waitress: a pool of threads in one or more processes
+
+Usage: python serve.py [--host 0.0.0.0] [--port 5000] [--threads 16] [--workers 1]
+
+One process with several threads suits most deployments, since SQLite
+accepts one writer at a time anyway. Extra worker processes share the
+listening socket; each follows the others' writes through the database
+(see shared_state.py). Live dashboards' event streams are handed from
+the request threads to one writer thread per process (events.StreamWriter),
+so open dashboards do not tie up request threads. Ctrl+C, SIGTERM or
+SIGBREAK stops the server gracefully: it stops accepting connections, lets
+requests in progress finish for up to --graceful-timeout seconds, then exits.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from waitress import wasyncore
+from waitress.server import create_server
+
+from events import EVENTS_PATH, StreamWriter
+
+logger = logging.getLogger('cso.serve')
+
+STOP_SIGNALS = [signal.SIGINT, signal.SIGTERM] + (
+    [signal.SIGBREAK] if hasattr(signal, 'SIGBREAK') else []
+)
+
+
+def configure_logging():
+    """Log to the console; spawned workers need this as well as the supervisor"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+
+def on_stop_signal(stopping):
+    """Set stopping when the process is asked to stop"""
+    for signum in STOP_SIGNALS:
+        signal.signal(signum, lambda *args: stopping.set())
+
+
+def run_worker(sock, threads, workers, graceful_timeout, stop_event=None):
+    """Serve requests arriving on sock until stopped, then shut down cleanly"""
+    configure_logging()
+    from app import create_app, services, shutdown, start_background
+    from search import ensure_index
+
+    app = create_app({'WORKER_PROCESSES': workers})
+    with app.app_context():
+        ensure_index()
+    start_background(app)
+
+    streams = StreamWriter(
+        services(app).broadcaster,
+        heartbeat=app.config['SSE_HEARTBEAT_SECONDS'],
+        max_duration=app.config['SSE_MAX_STREAM_SECONDS']
+    )
+    streams.start()
+
+    server = create_server(app, sockets=[sock], threads=threads, ident='cso-attendance')
+    hand_off_streams(server, streams)
+
+    stopping = threading.Event()
+    on_stop_signal(stopping)
+    if stop_event is not None:
+        # Set by the supervisor; on Windows there is no signal to forward
+        threading.Thread(
+            target=lambda: (stop_event.wait(), stopping.set()), daemon=True
+        ).start()
+
+    logger.info('Worker %d serving on http://%s:%d with %d threads',
+                os.getpid(), *sock.getsockname()[:2], threads)
+    # server.run() loops forever; loop in slices so stopping is noticed
+    channels = server._map
+    while not stopping.is_set():
+        wasyncore.loop(timeout=0.5, map=channels, use_poll=server.adj.asyncore_use_poll, count=1)
+
+    logger.info('Worker %d stopping', os.getpid())
+
+    # Stop accepting (keeping the trigger that wakes the loop for responses),
+    # and end event streams
+    wasyncore.dispatcher.close(server)
+    services(app).broadcaster.close()
+
+    # Keep the loop running (it writes the responses) until requests finish
+    dispatcher = server.task_dispatcher
+    deadline = time.monotonic() + graceful_timeout
+    while time.monotonic() < deadline:
+        with dispatcher.lock:
+            busy = dispatcher.queue or dispatcher.active_count
+        if not busy:
+            break
+        wasyncore.loop(timeout=0.05, map=channels, count=1)
+
+    dispatcher.shutdown(cancel_pending=True, timeout=1)
+    flush_until = time.monotonic() + 0.5
+    while len(channels) > 1 and time.monotonic() < flush_until:
+        wasyncore.loop(timeout=0.05, map=channels, count=1)
+    wasyncore.close_all(channels)
+    streams.stop()
+
+    shutdown(app)
+    logger.info('Worker %d stopped', os.getpid())
+
+
+def hand_off_streams(server, streams):
+    """
+    Give event stream requests to streams instead of the request threads
+
+    Waitress queues every complete request for its thread pool through
+    server.add_task(). Requests for the event stream that the loop thread
+    reads are handed to the StreamWriter instead, socket and all, and the
+    channel is dropped from the loop without closing it. Anything else,
+    or a stream the broadcaster has no room for, goes to the pool as
+    usual (where the app answers 503 when full). None of this is public
+    Waitress API; benchmarks/check_waitress_internals.py checks it.
+    """
+    add_task = server.add_task
+    loop_thread = threading.current_thread()
+
+    def add_stream_or_task(channel):
+        request = channel.requests[0]
+        if (threading.current_thread() is loop_thread
+                and len(channel.requests) == 1
+                and not channel.total_outbufs_len
+                and not request.error
+                and request.command == 'GET'
+                and request.path == EVENTS_PATH
+                and streams.adopt(channel.socket, request.version)):
+            channel.del_channel()
+            channel.requests = []
+            channel.connected = False
+            channel.socket = None
+            return
+        add_task(channel)
+
+    server.add_task = add_stream_or_task
+
+
+def supervise(sock, args):
+    """Run args.workers worker processes on sock, restarting any that die"""
+    context = multiprocessing.get_context('spawn')
+    stop_event = context.Event()
+
+    def start_worker():
+        process = context.Process(
+            target=run_worker,
+            args=(sock, args.threads, args.workers, args.graceful_timeout, stop_event),
+            name='cso-worker'
+        )
+        process.start()
+        return process
+
+    stopping = threading.Event()
+    on_stop_signal(stopping)
+
+    processes = [start_worker() for _ in range(args.workers)]
+    while not stopping.wait(1.0):
+        for index, process in enumerate(processes):
+            if not process.is_alive():
+                logger.warning('Worker %d exited with code %s, restarting', process.pid, process.exitcode)
+                processes[index] = start_worker()
+
+    stop_event.set()
+    for process in processes:
+        process.join(args.graceful_timeout + 10)
+        if process.is_alive():
+            logger.warning('Worker %d did not stop in time, terminating', process.pid)
+            process.terminate()
+            process.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the attendance system in production')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=16, help='request threads per worker')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes')
+    parser.add_argument('--graceful-timeout', type=float, default=30,
+                        help='seconds to let requests in progress finish when stopping')
+    args = parser.parse_args(argv)
+
+    configure_logging()
+
+    # Create or upgrade the database once, before any worker starts
+    from app import create_app, init_db, shutdown
+    setup_app = create_app()
+    init_db(setup_app)
+    shutdown(setup_app)
+
+    sock = socket.create_server((args.host, args.port), backlog=1024)
+    sock.setblocking(False)
+
+    print("\n" + "="*50)
+    print("DLSU-D CSO Attendance System")
+    print("="*50)
+    print(f"Server running at: http://localhost:{args.port}")
+    print(f"{args.workers} worker process(es) x {args.threads} threads")
+    print("Press Ctrl+C to stop the server")
+    print("="*50 + "\n")
+
+    try:
+        if args.workers > 1:
+            supervise(sock, args)
+        else:
+            run_worker(sock, args.threads, 1, args.graceful_timeout)
+    finally:
+        sock.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+DLSU-D CSO Attendance System - Shared State
+Keeps each worker process's in-memory state in step with the other workers
+"""
+
+import threading
+import time
+
+from models import db, User, Attendance, DataVersion
+
+
+class SharedStateSync:
+    """
+    Follows writes made by other worker processes through the database.
+
+    Every process keeps its own online registry, roster cache and ETag
+    versions. With several processes, a background thread runs sync()
+    every poll_seconds, which also lets processes with no traffic push
+    live updates to their dashboards. Requests only sync themselves when
+    that thread has fallen behind (see max_age).
+
+    sync() reads the newest attendance id and the users data version. New
+    attendance rows are handed to on_event(user_data, attendance_id) one
+    by one, in order. User edits or deletions, or a backlog larger than
+    max_backlog, call on_reset() instead, which should rebuild from scratch.
+    """
+
+    def __init__(self, on_event, on_reset, max_backlog=1000):
+        self.on_event = on_event
+        self.on_reset = on_reset
+        self.max_backlog = max_backlog
+        self._lock = threading.Lock()
+        self._last_id = None
+        self._users_version = None
+        self._tag = None
+        self._synced_at = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def tag(self):
+        """Identifies the database state last synced (shared by all processes)"""
+        if self._tag is None:
+            self.sync()
+        return self._tag
+
+    def sync(self, max_age=None):
+        """
+        Catch up with writes from other processes (requires an app context)
+
+        With max_age, nothing is done if the last sync finished less than
+        max_age seconds ago.
+        """
+        if max_age is not None and self._synced_at is not None:
+            if time.monotonic() - self._synced_at < max_age:
+                return
+        with self._lock:
+            last_id, users_version = db.session.query(
+                db.select(db.func.max(Attendance.id)).scalar_subquery(),
+                db.select(DataVersion.version).where(DataVersion.scope == 'users').scalar_subquery()
+            ).one()
+            last_id = last_id or 0
+            users_version = users_version or 0
+
+            if self._last_id is None:
+                pass
+            elif (users_version != self._users_version or last_id < self._last_id
+                    or last_id - self._last_id > self.max_backlog):
+                # Ids can also go down: deleting a user deletes their
+                # events, and SQLite may then reuse the highest ids
+                self.on_reset()
+            elif last_id > self._last_id:
+                self._apply_events(self._last_id, last_id)
+
+            self._last_id = last_id
+            self._users_version = users_version
+            self._tag = f'{users_version}.{last_id}'
+            self._synced_at = time.monotonic()
+
+    def start(self, app, poll_seconds=1.0):
+        """Sync every poll_seconds on a background thread"""
+        def run():
+            while not self._stop.wait(poll_seconds):
+                try:
+                    with app.app_context():
+                        self.sync()
+                except Exception:
+                    app.logger.exception('Shared state sync failed')
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name='shared-state-sync', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _apply_events(self, after_id, up_to_id):
+        rows = db.session.query(Attendance.id, Attendance.event_type, User).join(
+            User, Attendance.user_id == User.id
+        ).filter(
+            Attendance.id > after_id,
+            Attendance.id <= up_to_id
+        ).order_by(Attendance.id)
+
+        for attendance_id, event_type, user in rows:
+            status = 'Online' if event_type == 'Time In' else 'Offline'
+            self.on_event(dict(user.to_dict(), status=status), attendance_id)
@@ -3,5 +3,5 @@ REM DLSU-D CSO Attendance System Auto-Start Script
 REM Replace the path below with your actual project directory path
 
 cd /d "%~dp0"
-python app.py
+python serve.py
 pause
\ No newline at end of file
@@ -5,12 +5,22 @@
 
 let currentEditUserId = null;
 let searchTimeout = null;
+let eventSource = null;
+let pollInterval = null;
+let usersTableSearch = '';
+let usersTableCursor = null;
+let usersTableRequest = 0;
+
+const USERS_PAGE_SIZE = 50;
+const SEARCH_RESULTS_LIMIT = 8;
+const EXPORT_POLL_INTERVAL = 1000;
+const IMPORT_ERRORS_SHOWN = 15;
 
 document.addEventListener('DOMContentLoaded', function() {
     updateDateTime();
     setInterval(updateDateTime, 1000);
     refreshActiveUsers();
-    setInterval(refreshActiveUsers, 30000);
+    connectLiveUpdates();
     setupEventListeners();
     setDefaultExportDates();
     document.getElementById('idInput').focus();
@@ -66,6 +76,7 @@ function setupEventListeners() {
     });
     
     document.getElementById('userForm').addEventListener('submit', handleUserFormSubmit);
+    document.getElementById('importUsersInput').addEventListener('change', importUsersFile);
     
     document.getElementById('formPhoto').addEventListener('change', function() {
         const fileName = this.files[0] ? this.files[0].name : 'Choose a file...';
@@ -94,7 +105,7 @@ async function processIdScan(studentId) {
                 showStatus(data.message, 'success');
                 document.getElementById('photoFrame').classList.add('active');
             }
-            refreshActiveUsers();
+            if (!isLive()) refreshActiveUsers();
             setTimeout(() => resetScanner(), 3000);
         } else {
             showStatus(data.message, 'error');
@@ -111,8 +122,8 @@ async function processIdScan(studentId) {
 function updateUserPhoto(user) {
     const photoPlaceholder = document.getElementById('photoPlaceholder');
     const userPhoto = document.getElementById('userPhoto');
-    if (user && user.photo_filename) {
-        userPhoto.src = `/static/photos/${user.photo_filename}`;
+    if (user && user.photo_medium_url) {
+        userPhoto.src = user.photo_medium_url;
         userPhoto.classList.remove('hidden');
         photoPlaceholder.style.display = 'none';
     } else {
@@ -138,6 +149,51 @@ function resetScanner() {
     document.getElementById('userPhoto').classList.add('hidden');
 }
 
+function connectLiveUpdates() {
+    // Fall back to polling when the browser or server cannot stream events
+    if (!window.EventSource) { startPolling(); return; }
+    eventSource = new EventSource('/api/events');
+    eventSource.onopen = function() {
+        stopPolling();
+        refreshActiveUsers();
+    };
+    eventSource.addEventListener('presence', function(e) {
+        applyPresenceEvent(JSON.parse(e.data));
+    });
+    // Sent when members were edited elsewhere; reload the whole list
+    eventSource.addEventListener('refresh', refreshActiveUsers);
+    eventSource.onerror = function() {
+        if (eventSource.readyState === EventSource.CLOSED) {
+            eventSource = null;
+            startPolling();
+            setTimeout(connectLiveUpdates, 60000);
+        }
+    };
+}
+
+function isLive() { return eventSource !== null && eventSource.readyState === EventSource.OPEN; }
+
+function startPolling() { if (!pollInterval) pollInterval = setInterval(refreshActiveUsers, 30000); }
+
+function stopPolling() { clearInterval(pollInterval); pollInterval = null; }
+
+function applyPresenceEvent(data) {
+    const user = data.user;
+    document.querySelectorAll(`.user-list li[data-user-id="${user.id}"]`).forEach(li => {
+        const section = li.closest('.committee-section');
+        li.remove();
+        if (!section.querySelector('li')) section.classList.remove('has-users');
+    });
+    if (data.status === 'Online') {
+        const section = document.querySelector(`.committee-section[data-committee="${user.committee}"]`);
+        if (section) {
+            section.querySelector('.user-list').insertAdjacentHTML('beforeend', renderActiveUser(user));
+            section.classList.add('has-users');
+        }
+    }
+    document.getElementById('activeCount').textContent = data.total_count;
+}
+
 async function refreshActiveUsers() {
     try {
         const response = await fetch('/api/active-users');
@@ -157,15 +213,7 @@ function updateActiveUsersSidebar(groupedUsers) {
         const users = groupedUsers[committee];
         if (users.length > 0) {
             section.classList.add('has-users');
-            userList.innerHTML = users.map(user => `
-                <li>
-                    ${user.photo_filename 
-                        ? `<img src="/static/photos/${user.photo_filename}" alt="${user.full_name}" class="user-avatar">`
-                        : `<div class="user-avatar-placeholder"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><path d="M20 21v-2a4 4 0 0 0-4-4H8a4 4 0 0 0-4 4v2"/><circle cx="12" cy="7" r="4"/></svg></div>`}
-                    <div class="user-info"><div class="user-name">${user.full_name}</div><div class="user-id">${user.student_id}</div></div>
-                    <span class="online-indicator"></span>
-                </li>
-            `).join('');
+            userList.innerHTML = users.map(renderActiveUser).join('');
         } else {
             section.classList.remove('has-users');
             userList.innerHTML = '';
@@ -173,16 +221,28 @@ function updateActiveUsersSidebar(groupedUsers) {
     });
 }
 
+function renderActiveUser(user) {
+    return `
+        <li data-user-id="${user.id}">
+            ${user.photo_small_url 
+                ? `<img src="${user.photo_small_url}" alt="${user.full_name}" class="user-avatar">`
+                : `<div class="user-avatar-placeholder"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><path d="M20 21v-2a4 4 0 0 0-4-4H8a4 4 0 0 0-4 4v2"/><circle cx="12" cy="7" r="4"/></svg></div>`}
+            <div class="user-info"><div class="user-name">${user.full_name}</div><div class="user-id">${user.student_id}</div></div>
+            <span class="online-indicator"></span>
+        </li>
+    `;
+}
+
 async function handleSearch(query) {
     const searchResults = document.getElementById('searchResults');
     if (!query.trim()) { searchResults.classList.remove('active'); return; }
     try {
-        const response = await fetch(`/api/users?search=${encodeURIComponent(query)}`);
+        const response = await fetch(`/api/users?search=${encodeURIComponent(query)}&limit=${SEARCH_RESULTS_LIMIT}`);
         const data = await response.json();
         if (data.success && data.users.length > 0) {
             searchResults.innerHTML = data.users.map(user => `
                 <div class="search-result-item" onclick="selectSearchResult('${user.student_id}')">
-                    ${user.photo_filename ? `<img src="/static/photos/${user.photo_filename}" alt="${user.full_name}">` : `<div class="placeholder-avatar"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><path d="M20 21v-2a4 4 0 0 0-4-4H8a4 4 0 0 0-4 4v2"/><circle cx="12" cy="7" r="4"/></svg></div>`}
+                    ${user.photo_small_url ? `<img src="${user.photo_small_url}" alt="${user.full_name}">` : `<div class="placeholder-avatar"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><path d="M20 21v-2a4 4 0 0 0-4-4H8a4 4 0 0 0-4 4v2"/><circle cx="12" cy="7" r="4"/></svg></div>`}
                     <div class="info"><div class="name">${user.full_name}</div><div class="details">${user.student_id} • ${user.committee}</div></div>
                 </div>
             `).join('');
@@ -249,7 +309,7 @@ async function handleUserFormSubmit(e) {
             showToast(data.message, 'success');
             closeUserModal();
             if (document.getElementById('manageUsersModal').classList.contains('active')) loadUsersTable();
-            refreshActiveUsers();
+            if (!isLive()) refreshActiveUsers();
         } else { showToast(data.message, 'error'); }
     } catch (error) {
         console.error('Error saving user:', error);
@@ -266,35 +326,55 @@ function openManageUsersModal() {
 function closeManageUsersModal() { document.getElementById('manageUsersModal').classList.remove('active'); }
 
 async function loadUsersTable(search = '') {
+    usersTableSearch = search;
+    usersTableCursor = null;
+    await fetchUsersPage(false);
+}
+
+function loadMoreUsers() { fetchUsersPage(true); }
+
+async function fetchUsersPage(append) {
+    // Only the latest request may render, so slow responses to earlier
+    // keystrokes cannot overwrite newer results
+    const requestId = ++usersTableRequest;
+    const params = new URLSearchParams({ search: usersTableSearch, limit: USERS_PAGE_SIZE });
+    if (append && usersTableCursor) params.set('cursor', usersTableCursor);
     try {
-        const response = await fetch(`/api/users?search=${encodeURIComponent(search)}`);
+        const response = await fetch(`/api/users?${params}`);
         const data = await response.json();
-        if (data.success) {
-            const tbody = document.getElementById('usersTableBody');
-            if (data.users.length === 0) {
-                tbody.innerHTML = `<tr><td colspan="7" class="text-center" style="padding: 40px; color: var(--gray-500);">No users found</td></tr>`;
-                return;
-            }
-            tbody.innerHTML = data.users.map(user => `
-                <tr>
-                    <td>${user.photo_filename ? `<img src="/static/photos/${user.photo_filename}" alt="${user.full_name}" class="user-avatar-small">` : `<div class="avatar-placeholder"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><path d="M20 21v-2a4 4 0 0 0-4-4H8a4 4 0 0 0-4 4v2"/><circle cx="12" cy="7" r="4"/></svg></div>`}</td>
-                    <td>${user.student_id}</td>
-                    <td>${user.full_name}</td>
-                    <td>${user.committee}</td>
-                    <td>${user.birthday || '-'}</td>
-                    <td><span class="status-badge ${user.status === 'Online' ? 'status-online' : 'status-offline'}">${user.status}</span></td>
-                    <td>
-                        <div class="actions">
-                            <button class="action-btn edit" onclick='openEditUserModal(${JSON.stringify(user)})' title="Edit"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><path d="M11 4H4a2 2 0 0 0-2 2v14a2 2 0 0 0 2 2h14a2 2 0 0 0 2-2v-7"/><path d="M18.5 2.5a2.121 2.121 0 0 1 3 3L12 15l-4 1 1-4 9.5-9.5z"/></svg></button>
-                            <button class="action-btn delete" onclick="deleteUser(${user.id}, '${user.full_name}')" title="Delete"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><polyline points="3 6 5 6 21 6"/><path d="M19 6v14a2 2 0 0 1-2 2H7a2 2 0 0 1-2-2V6m3 0V4a2 2 0 0 1 2-2h4a2 2 0 0 1 2 2v2"/></svg></button>
-                        </div>
-                    </td>
-                </tr>
-            `).join('');
+        if (requestId !== usersTableRequest || !data.success) return;
+        const tbody = document.getElementById('usersTableBody');
+        usersTableCursor = data.next_cursor;
+        document.getElementById('loadMoreUsersBtn').style.display = data.next_cursor ? '' : 'none';
+        if (!append && data.users.length === 0) {
+            tbody.innerHTML = `<tr><td colspan="7" class="text-center" style="padding: 40px; color: var(--gray-500);">No users found</td></tr>`;
+            return;
         }
+        const html = renderUserRows(data.users);
+        if (append) tbody.insertAdjacentHTML('beforeend', html);
+        else tbody.innerHTML = html;
     } catch (error) { console.error('Error loading users table:', error); }
 }
 
+function renderUserRows(users) {
+    return users.map(user => `
+        <tr>
+            <td>${user.photo_small_url ? `<img src="${user.photo_small_url}" alt="${user.full_name}" class="user-avatar-small" loading="lazy">` : `<div class="avatar-placeholder"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><path d="M20 21v-2a4 4 0 0 0-4-4H8a4 4 0 0 0-4 4v2"/><circle cx="12" cy="7" r="4"/></svg></div>`}</td>
+            <td>${user.student_id}</td>
+            <td>${user.full_name}</td>
+            <td>${user.committee}</td>
+            <td>${user.birthday || '-'}</td>
+            <td><span class="status-badge ${user.status === 'Online' ? 'status-online' : 'status-offline'}">${user.status}</span></td>
+            <td>
+                <div class="actions">
+                    <button class="action-btn edit" onclick='openEditUserModal(${JSON.stringify(user)})' title="Edit"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><path d="M11 4H4a2 2 0 0 0-2 2v14a2 2 0 0 0 2 2h14a2 2 0 0 0 2-2v-7"/><path d="M18.5 2.5a2.121 2.121 0 0 1 3 3L12 15l-4 1 1-4 9.5-9.5z"/></svg></button>
+                    <button class="action-btn delete" onclick="deleteUser(${user.id}, '${user.full_name}')" title="Delete"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><polyline points="3 6 5 6 21 6"/><path d="M19 6v14a2 2 0 0 1-2 2H7a2 2 0 0 1-2-2V6m3 0V4a2 2 0 0 1 2-2h4a2 2 0 0 1 2 2v2"/></svg></button>
+                </div>
+            </td>
+        </tr>
+    `).join('');
+}
+
 async function deleteUser(userId, userName) {
     if (!confirm(`Are you sure you want to delete "${userName}"? This will also delete all their attendance records.`)) return;
     try {
@@ -303,7 +383,7 @@ async function deleteUser(userId, userName) {
         if (data.success) {
             showToast(data.message, 'success');
             loadUsersTable(document.getElementById('manageSearchInput').value);
-            refreshActiveUsers();
+            if (!isLive()) refreshActiveUsers();
         } else { showToast(data.message, 'error'); }
     } catch (error) {
         console.error('Error deleting user:', error);
@@ -311,6 +391,30 @@ async function deleteUser(userId, userName) {
     }
 }
 
+// Bulk import: valid rows are added, the rest are listed with their row number
+async function importUsersFile() {
+    const file = this.files[0];
+    this.value = '';
+    if (!file) return;
+    const formData = new FormData();
+    formData.append('file', file);
+    try {
+        const response = await fetch('/api/users/import', { method: 'POST', body: formData });
+        const data = await response.json();
+        if (!data.success) { showToast(data.message, 'error'); return; }
+        showToast(data.message, data.errors.length ? 'error' : 'success');
+        if (data.errors.length) {
+            const shown = data.errors.slice(0, IMPORT_ERRORS_SHOWN).map(e => `Row ${e.row}: ${e.message}`);
+            if (data.errors.length > shown.length) shown.push(`...and ${data.errors.length - shown.length} more`);
+            alert(`${data.message}\n\n${shown.join('\n')}`);
+        }
+        if (data.imported) loadUsersTable(document.getElementById('manageSearchInput').value);
+    } catch (error) {
+        console.error('Error importing users:', error);
+        showToast('An error occurred. Please try again.', 'error');
+    }
+}
+
 function openExportModal() {
     document.getElementById('exportModal').classList.add('active');
     setDefaultExportDates();
@@ -330,18 +434,111 @@ function formatDate(date) { return date.toISOString().split('T')[0]; }
 function exportDTR() {
     const startDate = document.getElementById('startDate').value;
     const endDate = document.getElementById('endDate').value;
+    const format = document.getElementById('exportFormat').value;
     if (!startDate || !endDate) { showToast('Please select both start and end dates.', 'error'); return; }
-    window.location.href = `/api/export/dtr?start_date=${startDate}&end_date=${endDate}`;
-    showToast('DTR export started. Download will begin shortly.', 'success');
+    const params = new URLSearchParams({ start_date: startDate, end_date: endDate, format: format });
+    runExportJob(`/api/export/dtr?${params}`, 'DTR');
     closeExportModal();
 }
 
 function exportRoster() {
-    window.location.href = '/api/export/roster';
-    showToast('Roster export started. Download will begin shortly.', 'success');
+    runExportJob('/api/export/roster', 'Roster');
     closeExportModal();
 }
 
+// Exports are built in the background: queue a job, poll its progress,
+// then download the finished file
+async function runExportJob(url, label) {
+    try {
+        const response = await fetch(url, { method: 'POST' });
+        const data = await response.json();
+        if (!data.success) { showToast(data.message, 'error'); return; }
+        showToast(`${label} export started. Download will begin when it is ready.`, 'success');
+        let job = data.job;
+        while (job.status === 'queued' || job.status === 'running') {
+            await new Promise(resolve => setTimeout(resolve, EXPORT_POLL_INTERVAL));
+            const status = await (await fetch(job.status_url)).json();
+            if (!status.success) { showToast(status.message, 'error'); return; }
+            job = status.job;
+        }
+        if (job.status === 'done') window.location.href = job.download_url;
+        else showToast(`${label} export failed: ${job.error}`, 'error');
+    } catch (error) {
+        console.error('Error exporting:', error);
+        showToast('An error occurred. Please try again.', 'error');
+    }
+}
+
+function openStatsModal() {
+    document.getElementById('statsModal').classList.add('active');
+    loadStats();
+}
+
+function closeStatsModal() { document.getElementById('statsModal').classList.remove('active'); }
+
+// Aggregates come from /api/stats, computed and cached on the server
+async function loadStats() {
+    try {
+        const [overview, headcount, hours, committees, streaks] = await Promise.all([
+            '/api/stats',
+            '/api/stats/daily-headcount',
+            '/api/stats/peak-hours',
+            '/api/stats/committee-hours',
+            '/api/stats/streaks'
+        ].map(url => fetch(url).then(response => response.json())));
+        const failed = [overview, headcount, hours, committees, streaks].find(data => !data.success);
+        if (failed) { showToast(failed.message, 'error'); return; }
+        
+        document.getElementById('statTodayMembers').textContent = overview.today.members;
+        document.getElementById('statTodayHours').textContent = overview.today.hours.toFixed(1);
+        document.getElementById('statWeekHours').textContent = overview.week.total_hours.toFixed(1);
+        document.getElementById('statBusiestHour').textContent =
+            overview.busiest_hour ? formatHour(overview.busiest_hour.hour) : '-';
+        
+        renderBarChart('statsHeadcountChart', headcount.daily_headcount.map(day => ({
+            value: day.members, label: day.date.slice(5), title: `${day.date}: ${day.members} members, ${day.hours} hours`
+        })), 5);
+        renderBarChart('statsHoursChart', hours.peak_hours.filter(hour => hour.hour >= 6 && hour.hour <= 21).map(hour => ({
+            value: hour.average, label: formatHour(hour.hour), title: `${formatHour(hour.hour)}: ${hour.average} on average, ${hour.peak} at most`
+        })), 2);
+        renderCommitteeHours(committees.committee_hours);
+        
+        document.getElementById('statsStreaksBody').innerHTML = streaks.streaks.length ? streaks.streaks.map(streak => `
+            <tr>
+                <td>${streak.full_name}</td>
+                <td>${streak.committee}</td>
+                <td>${streak.current} day${streak.current === 1 ? '' : 's'}</td>
+                <td>${streak.longest} day${streak.longest === 1 ? '' : 's'}</td>
+            </tr>
+        `).join('') : `<tr><td colspan="4" class="text-center" style="color: var(--gray-500);">No attendance yet</td></tr>`;
+    } catch (error) {
+        console.error('Error loading statistics:', error);
+        showToast('An error occurred. Please try again.', 'error');
+    }
+}
+
+function formatHour(hour) { return `${hour % 12 || 12} ${hour < 12 ? 'AM' : 'PM'}`; }
+
+// Plain div bars scaled to the largest value; every labelEvery-th bar is labelled
+function renderBarChart(elementId, bars, labelEvery) {
+    const max = Math.max(1, ...bars.map(bar => bar.value));
+    document.getElementById(elementId).innerHTML = bars.map((bar, index) => `
+        <div class="bar" style="height: ${bar.value / max * 100}%" title="${bar.title}">
+            ${index % labelEvery === 0 ? `<span>${bar.label}</span>` : ''}
+        </div>
+    `).join('');
+}
+
+function renderCommitteeHours(weeks) {
+    const committees = weeks.length ? Object.keys(weeks[0].committees) : [];
+    const header = `<thead><tr><th>Committee</th>${weeks.map(week => `<th>${week.week_start.slice(5)}</th>`).join('')}</tr></thead>`;
+    const rows = committees.map(committee => `
+        <tr><td>${committee}</td>${weeks.map(week => `<td>${week.committees[committee].hours.toFixed(1)}</td>`).join('')}</tr>
+    `).join('');
+    const total = `<tr><td><strong>Total</strong></td>${weeks.map(week => `<td><strong>${week.total_hours.toFixed(1)}</strong></td>`).join('')}</tr>`;
+    document.getElementById('statsCommitteeTable').innerHTML = `${header}<tbody>${rows}${total}</tbody>`;
+}
+
 function showToast(message, type = 'success') {
     const toast = document.getElementById('toast');
     const toastMessage = document.getElementById('toastMessage');
@@ -357,6 +554,7 @@ document.addEventListener('keydown', function(e) {
         closeUserModal();
         closeManageUsersModal();
         closeExportModal();
+        closeStatsModal();
         document.getElementById('searchResults').classList.remove('active');
     }
     if (!['INPUT', 'TEXTAREA', 'SELECT'].includes(document.activeElement.tagName)) {
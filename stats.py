@@ -0,0 +1,228 @@
+"""
+DLSU-D CSO Attendance System - Attendance Statistics
+Aggregates for the dashboard and /api/stats over the live database and any
+archived terms in the range, computed in SQL or from the occupancy timeline
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import archive
+import occupancy as occupancy_timeline
+from models import db, User
+
+HOURS = range(24)
+
+
+class StatsCache:
+    """
+    Least-recently-used cache of computed statistics.
+
+    Keys carry the version of the data a result was computed from (see
+    stats_version() in app.py), so entries never need invalidating; stale
+    ones simply stop being asked for and age out.
+    """
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        """Return the cached result for key, computing and storing it on a miss"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        result = compute()
+        if self.max_size > 0:
+            with self._lock:
+                self._entries[key] = result
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return result
+
+
+def daily_rows(start_date, end_date, with_committee=False):
+    """The range's daily_summary rows (live and archived) as a subquery"""
+    def select_days(schema):
+        days, users = schema.daily_summary, schema.users
+        columns = [days.c.date, days.c.user_id, days.c.total_seconds, days.c.session_count]
+        statement = db.select(*columns)
+        if with_committee:
+            statement = db.select(*columns, users.c.committee).join_from(
+                days, users, days.c.user_id == users.c.id
+            )
+        return statement.where(days.c.date >= start_date, days.c.date <= end_date)
+
+    return archive.span(select_days, start_date, end_date).subquery()
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def committee_hours(start_date, end_date):
+    """
+    Hours rendered per committee per week (weeks start on Monday)
+
+    Every week touching the range is listed, with every committee, so the
+    result can be charted as is. Members are counted once per week.
+    """
+    days = daily_rows(start_date, end_date, with_committee=True)
+    week = db.func.date(days.c.date, 'weekday 0', '-6 days')
+    rows = db.session.execute(
+        db.select(
+            week.label('week'),
+            days.c.committee,
+            db.func.sum(days.c.total_seconds).label('seconds'),
+            db.func.count(db.distinct(days.c.user_id)).label('members')
+        ).group_by(week, days.c.committee)
+    )
+
+    weeks = OrderedDict()
+    day = week_start(start_date)
+    while day <= end_date:
+        weeks[day.isoformat()] = {
+            committee: {'hours': 0.0, 'members': 0} for committee in User.COMMITTEES
+        }
+        day += timedelta(days=7)
+    for row in rows:
+        committees = weeks.get(row.week)
+        if committees is not None:
+            committees[row.committee] = {'hours': round(row.seconds / 3600, 2), 'members': row.members}
+
+    return [
+        {
+            'week_start': week,
+            'total_hours': round(sum(entry['hours'] for entry in committees.values()), 2),
+            'committees': committees
+        }
+        for week, committees in weeks.items()
+    ]
+
+
+def daily_headcount(start_date, end_date):
+    """Members who scanned, sessions and hours for every day of the range"""
+    days = daily_rows(start_date, end_date)
+    rows = db.session.execute(
+        db.select(
+            days.c.date,
+            db.func.count().label('members'),
+            db.func.sum(days.c.session_count).label('sessions'),
+            db.func.sum(days.c.total_seconds).label('seconds')
+        ).group_by(days.c.date)
+    )
+    totals = {row.date: row for row in rows}
+
+    result = []
+    day = start_date
+    while day <= end_date:
+        row = totals.get(day)
+        result.append({
+            'date': day.isoformat(),
+            'members': row.members if row else 0,
+            'sessions': row.sessions if row else 0,
+            'hours': round(row.seconds / 3600, 2) if row else 0.0
+        })
+        day += timedelta(days=1)
+    return result
+
+
+def peak_hours(start_date, end_date):
+    """
+    The most members in at once during each hour of the day
+
+    Taken from the per-minute occupancy timeline (see occupancy.py), so a
+    member who leaves and comes back within an hour is still one member.
+    Returns, per hour of the day, the highest count on any day and the
+    average over the days the office was used. Members still timed in
+    count until now when the range includes today.
+    """
+    now = datetime.now()
+    counts, _ = occupancy_timeline.timeline(start_date, end_date, now if end_date >= now.date() else None)
+    by_hour = counts.reshape(-1, 24, 60).max(axis=2)
+    used = by_hour[by_hour.any(axis=1)]
+
+    peaks = used.max(axis=0) if len(used) else [0] * 24
+    averages = used.mean(axis=0) if len(used) else [0.0] * 24
+    return [
+        {'hour': hour, 'peak': int(peaks[hour]), 'average': round(float(averages[hour]), 2)}
+        for hour in HOURS
+    ]
+
+
+def streaks(start_date, end_date, limit=10):
+    """
+    Members with the longest runs of consecutive office days in the range
+
+    Office days are days on which anyone scanned, so weekends and
+    holidays do not break a streak. A classic gaps-and-islands query:
+    numbering each member's days and the office days alike, a run is a
+    set of days whose two numbers differ by the same amount. current is
+    the run that reaches the latest office day (0 if there is none).
+    """
+    days = daily_rows(start_date, end_date)
+    office = db.select(
+        days.c.date,
+        db.func.row_number().over(order_by=days.c.date).label('number')
+    ).group_by(days.c.date).cte('office_days')
+    runs = db.select(
+        days.c.user_id,
+        days.c.date,
+        (office.c.number - db.func.row_number().over(
+            partition_by=days.c.user_id, order_by=days.c.date
+        )).label('run')
+    ).join_from(days, office, days.c.date == office.c.date).cte('runs')
+    islands = db.select(
+        runs.c.user_id,
+        db.func.count().label('length'),
+        db.func.max(runs.c.date).label('last_day')
+    ).group_by(runs.c.user_id, runs.c.run).subquery()
+
+    latest = db.select(db.func.max(office.c.date)).scalar_subquery()
+    longest = db.func.max(islands.c.length).label('longest')
+    current = db.func.max(
+        db.case((islands.c.last_day == latest, islands.c.length), else_=0)
+    ).label('current')
+    rows = db.session.execute(
+        db.select(User.student_id, User.full_name, User.committee, longest, current)
+        .join_from(islands, User, islands.c.user_id == User.id)
+        .group_by(islands.c.user_id)
+        .order_by(longest.desc(), current.desc(), User.full_name)
+        .limit(limit)
+    )
+    office_days = db.session.execute(db.select(db.func.count()).select_from(office)).scalar()
+
+    return {
+        'office_days': office_days,
+        'streaks': [
+            {
+                'student_id': row.student_id,
+                'full_name': row.full_name,
+                'committee': row.committee,
+                'longest': row.longest,
+                'current': row.current
+            }
+            for row in rows
+        ]
+    }
+
+
+def occupancy(start_date, end_date, interval=15):
+    """
+    Members in the office minute by minute (see occupancy.py)
+
+    Members still timed in count until now when the range includes today.
+    """
+    now = datetime.now()
+    return occupancy_timeline.summarize(
+        start_date, end_date, interval, now if end_date >= now.date() else None
+    )
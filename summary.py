@@ -0,0 +1,206 @@
+"""
+DLSU-D CSO Attendance System - Daily Summary
+Keeps the daily_summary table in step with attendance, and rebuilds it
+
+Usage: python summary.py [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+"""
+
+import argparse
+from datetime import datetime, time, timedelta
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import db, FETCH_SIZE, Attendance, DailySummary
+from dtr import events_frame, events_to_daily
+
+# Minimum number of events paired together when rebuilding (always whole days)
+REBUILD_BATCH_SIZE = 50000
+
+
+def record_scan(user_id, timestamp, event_type):
+    """
+    Fold a new scan into the summary, inside the caller's transaction
+
+    Must run before the scan's own attendance row is added. A Time Out
+    closes a session only if the user's previous event is a Time In on the
+    same day, which is exactly how pair_sessions() in dtr.py decides.
+    """
+    values = {
+        'user_id': user_id,
+        'date': timestamp.date(),
+        'first_in': None,
+        'last_out': None,
+        'total_seconds': 0,
+        'session_count': 0
+    }
+    statement = sqlite_insert(DailySummary)
+    excluded = statement.excluded
+
+    if event_type == 'Time In':
+        values['first_in'] = timestamp
+        changes = {
+            'first_in': db.func.coalesce(
+                db.func.min(DailySummary.first_in, excluded.first_in), excluded.first_in
+            )
+        }
+    else:
+        previous = db.session.query(Attendance.timestamp, Attendance.event_type).filter(
+            Attendance.user_id == user_id
+        ).order_by(Attendance.timestamp.desc()).first()
+
+        if (previous and previous.event_type == 'Time In'
+                and previous.timestamp.date() == values['date']):
+            values['total_seconds'] = (timestamp - previous.timestamp).total_seconds()
+            values['session_count'] = 1
+
+        values['last_out'] = timestamp
+        changes = {
+            'last_out': db.func.coalesce(
+                db.func.max(DailySummary.last_out, excluded.last_out), excluded.last_out
+            ),
+            'total_seconds': DailySummary.total_seconds + excluded.total_seconds,
+            'session_count': DailySummary.session_count + excluded.session_count
+        }
+
+    db.session.execute(
+        statement.values(**values).on_conflict_do_update(
+            index_elements=['user_id', 'date'], set_=changes
+        )
+    )
+
+
+def refresh_days(keys):
+    """
+    Recompute the summary for a set of (user_id, date) pairs from raw events
+
+    Used after inserting events out of order (e.g. replayed offline scans).
+    Every day between the earliest and latest date is recomputed for the
+    users involved. Runs inside the caller's transaction.
+    """
+    if not keys:
+        return
+
+    user_ids = sorted({user_id for user_id, _ in keys})
+    start = min(day for _, day in keys)
+    end = max(day for _, day in keys) + timedelta(days=1)
+    start_dt = datetime.combine(start, time.min)
+    end_dt = datetime.combine(end, time.min)
+
+    batch = []
+    for i in range(0, len(user_ids), 500):
+        chunk = user_ids[i:i + 500]
+        db.session.query(DailySummary).filter(
+            DailySummary.user_id.in_(chunk),
+            DailySummary.date >= start,
+            DailySummary.date < end
+        ).delete(synchronize_session=False)
+
+        batch.extend(db.session.query(
+            Attendance.user_id, Attendance.timestamp, Attendance.event_type
+        ).filter(
+            Attendance.user_id.in_(chunk),
+            Attendance.timestamp >= start_dt,
+            Attendance.timestamp < end_dt
+        ))
+
+    _write_daily(batch)
+
+
+def rebuild(start_date=None, end_date=None):
+    """
+    Rebuild the summary from the attendance table (requires an app context)
+
+    The range is inclusive and optional on both ends. Events are streamed in
+    timestamp order and paired a batch of whole days at a time, committing
+    after each batch so scans are never held up for long. Returns the
+    number of summary rows written.
+    """
+    summaries = db.session.query(DailySummary)
+    # Timestamps are read as text for events_frame()
+    events = db.session.query(
+        Attendance.user_id, db.cast(Attendance.timestamp, db.String), Attendance.event_type
+    )
+
+    if start_date:
+        summaries = summaries.filter(DailySummary.date >= start_date)
+        events = events.filter(Attendance.timestamp >= datetime.combine(start_date, time.min))
+    if end_date:
+        summaries = summaries.filter(DailySummary.date <= end_date)
+        events = events.filter(
+            Attendance.timestamp < datetime.combine(end_date + timedelta(days=1), time.min)
+        )
+
+    summaries.delete(synchronize_session=False)
+    db.session.commit()
+
+    written = 0
+    batch = []
+    current_date = None
+    for event in events.order_by(Attendance.timestamp).yield_per(FETCH_SIZE):
+        event_date = event[1][:10]
+        if event_date != current_date:
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                written += _write_daily(batch)
+                db.session.commit()
+                batch = []
+            current_date = event_date
+        batch.append(tuple(event))
+
+    written += _write_daily(batch)
+    db.session.commit()
+    return written
+
+
+def ensure_built():
+    """Build the summary once for databases that predate it"""
+    if db.session.query(DailySummary.user_id).first() is None and \
+            db.session.query(Attendance.id).first() is not None:
+        print("Building daily attendance summary...")
+        count = rebuild()
+        print(f"  {count} daily summary rows created")
+
+
+def _write_daily(events):
+    """Pair (user_id, timestamp, event_type) tuples and upsert their daily totals"""
+    if not events:
+        return 0
+
+    daily = events_to_daily(events_frame(events))
+
+    daily['date'] = daily['date'].dt.date
+    for column in ('first_in', 'last_out'):
+        daily[column] = daily[column].astype(object).where(daily[column].notna(), None)
+    rows = daily.astype({'user_id': int, 'session_count': int}).to_dict('records')
+
+    # Upsert, in case a scan created a row while a rebuild was running
+    statement = sqlite_insert(DailySummary.__table__)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=['user_id', 'date'],
+            set_={
+                column: statement.excluded[column]
+                for column in ('first_in', 'last_out', 'total_seconds', 'session_count')
+            }
+        ),
+        rows
+    )
+    return len(rows)
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild the daily attendance summary')
+    parser.add_argument('--start', type=parse_date, help='first day to rebuild (YYYY-MM-DD)')
+    parser.add_argument('--end', type=parse_date, help='last day to rebuild (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    from app import app
+
+    with app.app_context():
+        db.create_all()
+        print("Rebuilding daily attendance summary...")
+        count = rebuild(args.start, args.end)
+        print(f"✓ {count} daily summary rows written")
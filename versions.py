@@ -0,0 +1,46 @@
+"""
+DLSU-D CSO Attendance System - Change Tracking
+Monotonic data versions used for ETags and cache keys
+"""
+
+import threading
+import time
+
+
+class ChangeTracker:
+    """
+    Keeps a counter per data scope (e.g. 'users') that is bumped on every
+    write to that scope.
+
+    Versions live in memory, so every tag also carries a boot id; a tag
+    handed out before a restart can never match one handed out after it.
+
+    When several worker processes serve the app, their counters differ, so
+    shared_tag can be set to a callable returning a tag of the database
+    state that all of them agree on; tags then come from it instead.
+    """
+
+    def __init__(self, shared_tag=None):
+        self._lock = threading.Lock()
+        self._versions = {}
+        self.boot_id = format(time.time_ns(), 'x')
+        self.shared_tag = shared_tag
+
+    def bump(self, *scopes):
+        """Record a change to one or more scopes"""
+        with self._lock:
+            for scope in scopes:
+                self._versions[scope] = self._versions.get(scope, 0) + 1
+
+    def version(self, scope):
+        """Current version of a scope"""
+        with self._lock:
+            return self._versions.get(scope, 0)
+
+    def etag(self, *scopes):
+        """Opaque tag identifying the current state of the given scopes"""
+        if self.shared_tag is not None:
+            return f'shared-{self.shared_tag()}'
+        with self._lock:
+            parts = [str(self._versions.get(scope, 0)) for scope in scopes]
+        return '-'.join([self.boot_id] + parts)
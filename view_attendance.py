@@ -1,96 +1,201 @@
-"""Helper script to view attendance records from the database."""
+"""
+Helper script to view attendance records from the database.
 
-from app import app, db
-from database import User, Attendance
-from datetime import datetime, timedelta
+Records are streamed from the database as they are printed, newest first,
+including archived terms. Filters run in SQL, and csv / jsonl output can
+be piped into other tools.
 
-def view_all_attendance():
-    """Display all attendance records."""
-    with app.app_context():
-        records = db.session.query(
-            Attendance.timestamp,
-            Attendance.event_type,
-            User.id_number,
-            User.full_name
-        ).join(User).order_by(Attendance.timestamp.desc()).all()
-        
-        print(f"\n{'='*80}")
-        print(f"Total Records: {len(records)}")
-        print(f"{'='*80}")
-        print(f"{'Timestamp':<20} {'Type':<6} {'ID Number':<12} {'Name':<30}")
-        print(f"{'-'*80}")
-        
-        for record in records:
-            timestamp_str = record.timestamp.strftime('%Y-%m-%d %I:%M %p')
-            print(f"{timestamp_str:<20} {record.event_type:<6} {record.id_number:<12} {record.full_name:<30}")
-        print(f"{'='*80}\n")
-
-def view_today_attendance():
-    """Display today's attendance records."""
-    with app.app_context():
-        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = today_start + timedelta(days=1)
-        
-        records = db.session.query(
-            Attendance.timestamp,
-            Attendance.event_type,
-            User.id_number,
-            User.full_name
-        ).join(User).filter(
-            Attendance.timestamp >= today_start,
-            Attendance.timestamp < today_end
-        ).order_by(Attendance.timestamp.desc()).all()
-        
-        print(f"\n{'='*80}")
-        print(f"Today's Attendance: {datetime.now().strftime('%Y-%m-%d')}")
-        print(f"Total Records: {len(records)}")
-        print(f"{'='*80}")
-        print(f"{'Time':<12} {'Type':<6} {'ID Number':<12} {'Name':<30}")
-        print(f"{'-'*80}")
-        
-        for record in records:
-            time_str = record.timestamp.strftime('%I:%M %p')
-            print(f"{time_str:<12} {record.event_type:<6} {record.id_number:<12} {record.full_name:<30}")
-        print(f"{'='*80}\n")
-
-def view_user_attendance(id_number):
-    """Display attendance records for a specific user."""
+Usage:
+    python view_attendance.py                                  # menu
+    python view_attendance.py --today
+    python view_attendance.py --start 2025-01-01 --end 2025-01-31 --committee Finance
+    python view_attendance.py --user 20212345 --oldest-first
+    python view_attendance.py --start 2025-01-01 --format csv > january.csv
+    python view_attendance.py --format jsonl --limit 1000 | other-tool
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import date, datetime, time, timedelta
+
+import archive
+from app import app
+from models import db, FETCH_SIZE, User
+
+FORMATS = ['table', 'csv', 'jsonl']
+
+COLUMNS = ['timestamp', 'event_type', 'student_id', 'full_name', 'committee']
+
+
+def query_records(start_date=None, end_date=None, committee=None, student_id=None,
+                  oldest_first=False, limit=None):
+    """
+    Attendance records matching the filters, as a streaming result (requires an app context)
+
+    Dates are inclusive and either may be None. Archived terms in the
+    range are read from their own files, with members as they were when
+    the term was archived.
+    """
+    def select_records(schema):
+        events, users = schema.attendance, schema.users
+        statement = db.select(
+            events.c.timestamp,
+            events.c.event_type,
+            users.c.student_id,
+            users.c.full_name,
+            users.c.committee
+        ).join_from(events, users, events.c.user_id == users.c.id)
+
+        if start_date:
+            statement = statement.where(events.c.timestamp >= datetime.combine(start_date, time.min))
+        if end_date:
+            statement = statement.where(
+                events.c.timestamp < datetime.combine(end_date + timedelta(days=1), time.min)
+            )
+        if committee:
+            statement = statement.where(users.c.committee == committee)
+        if student_id:
+            statement = statement.where(users.c.student_id == student_id)
+        return statement
+
+    statement = archive.span(select_records, start_date or date.min, end_date or date.max)
+    timestamp = statement.selected_columns.timestamp
+    statement = statement.order_by(timestamp if oldest_first else timestamp.desc())
+    if limit:
+        statement = statement.limit(limit)
+    return db.session.execute(statement, execution_options={'yield_per': FETCH_SIZE})
+
+
+def write_table(records, title, page_size=50, out=sys.stdout):
+    """Print records as a table, pausing after every page_size rows on a terminal"""
+    pause = page_size and out.isatty() and sys.stdin.isatty()
+
+    print(f"\n{'='*100}", file=out)
+    print(title, file=out)
+    print(f"{'='*100}", file=out)
+    print(f"{'Timestamp':<20} {'Type':<9} {'Student ID':<12} {'Name':<32} {'Committee':<24}", file=out)
+    print(f"{'-'*100}", file=out)
+
+    count = 0
+    for record in records:
+        print(f"{record.timestamp.strftime('%Y-%m-%d %I:%M %p'):<20} {record.event_type:<9} "
+              f"{record.student_id:<12} {record.full_name[:32]:<32} {record.committee:<24}", file=out)
+        count += 1
+        if pause and count % page_size == 0:
+            if input('-- Enter for more, q to stop -- ').strip().lower() == 'q':
+                break
+
+    print(f"{'='*100}", file=out)
+    print(f"Records shown: {count}", file=out)
+    print(f"{'='*100}\n", file=out)
+
+
+def write_csv(records, out=sys.stdout):
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(COLUMNS)
+    for record in records:
+        writer.writerow([record.timestamp.isoformat(sep=' ')] + list(record[1:]))
+
+
+def write_jsonl(records, out=sys.stdout):
+    for record in records:
+        values = dict(zip(COLUMNS, record))
+        values['timestamp'] = record.timestamp.isoformat()
+        out.write(json.dumps(values) + '\n')
+
+
+def view(output='table', page_size=50, title='Attendance Records', **filters):
+    """Stream the records matching filters (see query_records) to stdout"""
     with app.app_context():
-        user = User.query.filter_by(id_number=id_number).first()
-        
-        if not user:
-            print(f"\n❌ User with ID {id_number} not found.\n")
-            return
-        
-        records = Attendance.query.filter_by(user_id=user.id).order_by(Attendance.timestamp.desc()).all()
-        
-        print(f"\n{'='*80}")
-        print(f"Attendance for: {user.full_name} (ID: {user.id_number})")
-        print(f"Total Records: {len(records)}")
-        print(f"{'='*80}")
-        print(f"{'Date':<12} {'Time':<12} {'Type':<6}")
-        print(f"{'-'*80}")
-        
-        for record in records:
-            date_str = record.timestamp.strftime('%Y-%m-%d')
-            time_str = record.timestamp.strftime('%I:%M %p')
-            print(f"{date_str:<12} {time_str:<12} {record.event_type:<6}")
-        print(f"{'='*80}\n")
+        # Older databases may not have the archived_terms table yet
+        db.create_all()
+        records = query_records(**filters)
+        if output == 'csv':
+            write_csv(records)
+        elif output == 'jsonl':
+            write_jsonl(records)
+        else:
+            write_table(records, title, page_size)
 
-if __name__ == '__main__':
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError('dates must be in YYYY-MM-DD format')
+
+
+def parse_committee(value):
+    committees = {name.lower(): name for name in User.COMMITTEES}
+    if value.lower() not in committees:
+        raise argparse.ArgumentTypeError('choose one of: ' + ', '.join(User.COMMITTEES))
+    return committees[value.lower()]
+
+
+def menu():
     print("DLSU-D CSO Attendance System - View Records")
     print("="*80)
     print("1. View all attendance records")
     print("2. View today's attendance")
     print("3. View specific user's attendance")
     choice = input("\nSelect option (1-3): ").strip()
-    
+
     if choice == '1':
-        view_all_attendance()
+        view()
     elif choice == '2':
-        view_today_attendance()
+        today = date.today()
+        view(title=f"Today's Attendance: {today}", start_date=today, end_date=today)
     elif choice == '3':
-        id_number = input("Enter ID Number: ").strip()
-        view_user_attendance(id_number)
+        student_id = input("Enter Student ID: ").strip()
+        view(title=f"Attendance for Student ID {student_id}", student_id=student_id)
     else:
-        print("Invalid option selected.")
\ No newline at end of file
+        print("Invalid option selected.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='DLSU-D CSO Attendance System - view attendance records')
+    parser.add_argument('--start', type=parse_date, help='first day to show (YYYY-MM-DD)')
+    parser.add_argument('--end', type=parse_date, help='last day to show (YYYY-MM-DD)')
+    parser.add_argument('--today', action='store_true', help="only today's records")
+    parser.add_argument('--committee', type=parse_committee, help='only members of this committee')
+    parser.add_argument('--user', metavar='STUDENT_ID', help="only this member's records")
+    parser.add_argument('--oldest-first', action='store_true', help='oldest records first (default: newest)')
+    parser.add_argument('--limit', type=int, help='stop after this many records')
+    parser.add_argument('--format', choices=FORMATS, default='table', help='output format (default: table)')
+    parser.add_argument('--page-size', type=int, default=50,
+                        help='table rows per page on a terminal (0: no pauses)')
+    args = parser.parse_args(argv)
+
+    if args.today:
+        args.start = args.end = date.today()
+    if args.start and args.end and args.start > args.end:
+        parser.error('--start must not be after --end')
+
+    view(
+        output=args.format,
+        page_size=args.page_size,
+        start_date=args.start,
+        end_date=args.end,
+        committee=args.committee,
+        student_id=args.user,
+        oldest_first=args.oldest_first,
+        limit=args.limit
+    )
+
+
+if __name__ == '__main__':
+    try:
+        if len(sys.argv) > 1:
+            main()
+        else:
+            menu()
+    except archive.ArchiveError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
+    except BrokenPipeError:
+        # The reader (e.g. head) stopped early; that is not an error
+        sys.stdout = open(os.devnull, 'w')
+        sys.exit(0)